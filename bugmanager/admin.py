@@ -62,14 +62,15 @@ class BugAdmin(admin.ModelAdmin):
     This class configures the Django admin interface for the Bugs model.
     It specifies the fields to be displayed in the list view (`list_display`),
     and defines a method `developers` to show the count of developers associated
-    with each bug in the list display.
+    with each bug in the list display. Bugs are created from error events,
+    so they cannot be added here.
     """
     list_display = ['bug_id', 'resolved',
-                    'created_at', 'developers', 'lambda_name']
+                    'created_at', 'developers', 'lambda_name', 'occurrences', 'last_seen']
     inlines = [BugOwnerInline]
 
-    readonly_fields = ['dimension', 'bug_id']
-    fields = ['bug_id', 'resolved']
+    readonly_fields = ['dimension', 'bug_id', 'message', 'occurrences', 'first_seen', 'last_seen']
+    fields = ['bug_id', 'resolved', 'message', 'occurrences', 'first_seen', 'last_seen']
 
     def has_add_permission(self, *kwargs):
         return False
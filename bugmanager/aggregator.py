@@ -0,0 +1,151 @@
+"""
+In-memory aggregation of error events into Bug rows.
+
+Occurrences are counted per (fingerprint, Dimension) in memory and written
+with one multi-row upsert per flush: `INSERT ... ON DUPLICATE KEY UPDATE`
+on MySQL, `INSERT ... ON CONFLICT DO UPDATE` elsewhere. The update adds
+the new occurrences to the stored count, so a burst of identical errors
+costs one row write per flush instead of one per error.
+"""
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .fingerprints import bug_id_for, fingerprint
+from .models import Bug
+
+BATCH_SIZE = 500
+COLUMNS = ['bug_id', 'dimension_id', 'fingerprint', 'message', 'occurrences',
+           'first_seen', 'last_seen', 'resolved', 'created_at', 'updated_at']
+
+
+def upsert_sql(rows):
+    """
+    Return the upsert statement of `rows` for the current database.
+    """
+
+    quote = connection.ops.quote_name
+    table = quote(Bug._meta.db_table)
+    columns = ', '.join(quote(column) for column in COLUMNS)
+    values = ', '.join(['(' + ', '.join(['%s'] * len(COLUMNS)) + ')'] * rows)
+
+    occurrences, first_seen, last_seen, updated_at = (
+        quote(column) for column in ['occurrences', 'first_seen', 'last_seen', 'updated_at'])
+    if connection.vendor == 'mysql':
+        return (
+            f'INSERT INTO {table} ({columns}) VALUES {values} ON DUPLICATE KEY UPDATE '
+            f'{occurrences} = {occurrences} + VALUES({occurrences}), '
+            f'{first_seen} = LEAST(COALESCE({first_seen}, VALUES({first_seen})), VALUES({first_seen})), '
+            f'{last_seen} = GREATEST(COALESCE({last_seen}, VALUES({last_seen})), VALUES({last_seen})), '
+            f'{updated_at} = VALUES({updated_at})'
+        )
+
+    least, greatest = ('MIN', 'MAX') if connection.vendor == 'sqlite' else ('LEAST', 'GREATEST')
+    return (
+        f'INSERT INTO {table} ({columns}) VALUES {values} ON CONFLICT ({quote("bug_id")}) DO UPDATE SET '
+        f'{occurrences} = {table}.{occurrences} + excluded.{occurrences}, '
+        f'{first_seen} = {least}(COALESCE({table}.{first_seen}, excluded.{first_seen}), excluded.{first_seen}), '
+        f'{last_seen} = {greatest}(COALESCE({table}.{last_seen}, excluded.{last_seen}), excluded.{last_seen}), '
+        f'{updated_at} = excluded.{updated_at}'
+    )
+
+
+def upsert_bugs(counts):
+    """
+    Create Bug rows or add occurrences to existing ones.
+
+    Parameters:
+    - counts: Dict of (fingerprint, dimension_id) to a list of
+      [occurrences, first_seen, last_seen, message].
+
+    Returns:
+    - int: The number of statements executed.
+    """
+
+    now = timezone.now()
+    field = Bug._meta.get_field('last_seen')
+
+    def db_datetime(value):
+        return field.get_db_prep_save(value, connection)
+
+    rows = [
+        [bug_id_for(fingerprint_, dimension_id), dimension_id, fingerprint_, message, occurrences,
+         db_datetime(first_seen), db_datetime(last_seen), False, db_datetime(now), db_datetime(now)]
+        for (fingerprint_, dimension_id), (occurrences, first_seen, last_seen, message)
+        in sorted(counts.items())
+    ]
+
+    statements = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            cursor.execute(upsert_sql(len(batch)), [value for row in batch for value in row])
+            statements += 1
+    return statements
+
+
+class BugAggregator:
+    """
+    Count error events per bug in memory and upsert them in batches.
+
+    Parameters:
+    - flush_interval: Seconds after which `maybe_flush` writes the counts.
+    - max_keys: Number of distinct bugs after which `maybe_flush` writes the counts.
+    - clock: Function returning the current time in seconds.
+    """
+
+    def __init__(self, flush_interval=10, max_keys=5000, clock=time.monotonic):
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self.clock = clock
+        self.counts = {}
+        self.flushed_at = clock()
+
+    def add(self, dimension_id, message, timestamp, fingerprint_=None):
+        """
+        Count one error event.
+
+        Parameters:
+        - dimension_id: The Dimension id of the event.
+        - message: The error message.
+        - timestamp: The aware datetime of the event.
+        - fingerprint_: The fingerprint of the message, if already computed.
+
+        Returns:
+        - str: The fingerprint of the message.
+        """
+
+        fingerprint_ = fingerprint_ or fingerprint(message)
+        entry = self.counts.get((fingerprint_, dimension_id))
+        if entry is None:
+            self.counts[(fingerprint_, dimension_id)] = [1, timestamp, timestamp, message]
+        else:
+            entry[0] += 1
+            entry[1] = min(entry[1], timestamp)
+            entry[2] = max(entry[2], timestamp)
+        return fingerprint_
+
+    def flush(self):
+        """
+        Write the pending counts and reset them.
+
+        Returns:
+        - int: The number of statements executed.
+        """
+
+        counts, self.counts = self.counts, {}
+        self.flushed_at = self.clock()
+        if not counts:
+            return 0
+        return upsert_bugs(counts)
+
+    def maybe_flush(self):
+        """
+        Flush if the interval elapsed or too many bugs are pending.
+        """
+
+        if (len(self.counts) >= self.max_keys
+                or self.clock() - self.flushed_at >= self.flush_interval):
+            return self.flush()
+        return 0
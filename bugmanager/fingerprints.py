@@ -0,0 +1,67 @@
+"""
+Fingerprints of error messages, used to group error events into bugs.
+
+A message is normalized by replacing the parts that differ between
+occurrences of the same error, like timestamps, request ids, addresses and
+numbers, with placeholders. The fingerprint is a hash of the result.
+"""
+import hashlib
+import re
+
+MAX_LINES = 30
+
+PATTERNS = [
+    # 2024-04-21T12:18:27.912Z, 2024-04-21 12:18:27,912
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'), '<time>'),
+    # Lambda request ids and other UUIDs
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'),
+     '<id>'),
+    # Memory addresses, e.g. <object at 0x7f3a2c1b9d30>
+    (re.compile(r'\b0x[0-9a-fA-F]+\b'), '<addr>'),
+    # Hashes, object ids and other long hex strings
+    (re.compile(r'\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{12,}\b'), '<hex>'),
+    (re.compile(r'\d+(?:\.\d+)?'), '<n>'),
+    (re.compile(r'[ \t]+'), ' '),
+]
+
+
+def normalize(message):
+    """
+    Return `message` with its variable parts replaced by placeholders.
+
+    Only the first MAX_LINES lines are kept, enough for the error and the
+    top of its stack trace. Blank lines are dropped.
+
+    Parameters:
+    - message: The error message or stack trace.
+
+    Returns:
+    - str: The normalized message.
+    """
+
+    lines = []
+    for line in message.splitlines():
+        for pattern, replacement in PATTERNS:
+            line = pattern.sub(replacement, line)
+        line = line.strip()
+        if line:
+            lines.append(line)
+        if len(lines) == MAX_LINES:
+            break
+    return '\n'.join(lines)
+
+
+def fingerprint(message):
+    """
+    Return the hex SHA-256 digest of the normalized `message`.
+    """
+
+    return hashlib.sha256(normalize(message).encode('utf-8')).hexdigest()
+
+
+def bug_id_for(fingerprint_, dimension_id):
+    """
+    Return the Bug primary key of a fingerprint in a Dimension.
+    """
+
+    return f'{dimension_id}-{fingerprint_}'
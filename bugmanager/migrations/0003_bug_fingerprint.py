@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bugmanager", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bug",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="bug",
+            name="first_seen",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bug",
+            name="last_seen",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bug",
+            name="message",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="bug",
+            name="occurrences",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
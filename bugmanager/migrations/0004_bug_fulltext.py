@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# The DDL is written out here rather than imported from core.fulltext, so
+# later changes to that module do not change what this migration does.
+TABLE = "bugmanager_bug"
+COLUMN = "message"
+INDEX = "bugmanager_bug_message_fulltext"
+FTS_TABLE = "bugmanager_bug_fts"
+
+
+def create_index(apps, schema_editor):
+    """
+    Create the full-text index of the message column.
+    """
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    table, column, fts = quote(TABLE), quote(COLUMN), quote(FTS_TABLE)
+    if vendor == "mysql":
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD FULLTEXT INDEX {quote(INDEX)} ({column})"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX {quote(INDEX)} ON {table} "
+            f"USING GIN (to_tsvector('simple', {column}))"
+        )
+    elif vendor == "sqlite":
+        drop_index(apps, schema_editor)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, "
+            f"content='{TABLE}', content_rowid='rowid')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {quote(TABLE + '_fts_insert')} AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.rowid, new.{column}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {quote(TABLE + '_fts_delete')} AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) "
+            f"VALUES ('delete', old.rowid, old.{column}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {quote(TABLE + '_fts_update')} AFTER UPDATE OF {column} "
+            f"ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) "
+            f"VALUES ('delete', old.rowid, old.{column}); "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.rowid, new.{column}); END"
+        )
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def drop_index(apps, schema_editor):
+    """
+    Drop the full-text index of the message column.
+    """
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    if vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {quote(TABLE)} DROP INDEX {quote(INDEX)}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {quote(INDEX)}")
+    elif vendor == "sqlite":
+        for suffix in ("insert", "delete", "update"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {quote(f'{TABLE}_fts_{suffix}')}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {quote(FTS_TABLE)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bugmanager", "0003_bug_fingerprint"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
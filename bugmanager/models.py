@@ -33,11 +33,20 @@ class Bug(models.Model):
     a unique bug ID, whether it has been resolved, and timestamps
     for when it was created and last updated.
 
+    Bugs are created from error events: events of one Dimension whose
+    normalized messages have the same fingerprint are one bug, with the
+    bug ID derived from both, see `bugmanager.fingerprints`.
+
     Attributes:
         bug_id (str): A unique identifier for the bug.
         resolved (bool): Indicates whether the bug has been resolved.
         created_at (datetime): The timestamp for when the bug was created.
         updated_at (datetime): The timestamp for when the bug was last updated.
+        fingerprint (str): The hash of the normalized error message.
+        message (str): An example error message.
+        occurrences (int): The number of error events seen.
+        first_seen (datetime): The timestamp of the first error event.
+        last_seen (datetime): The timestamp of the last error event.
     """
 
     bug_id = models.CharField(max_length=255, primary_key=True, unique=True)
@@ -45,6 +54,11 @@ class Bug(models.Model):
     resolved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    fingerprint = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    message = models.TextField(blank=True, default='')
+    occurrences = models.PositiveBigIntegerField(default=0)
+    first_seen = models.DateTimeField(null=True, blank=True)
+    last_seen = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         """
@@ -0,0 +1,85 @@
+"""
+Test error fingerprints and the Bug upserts.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from bugmanager.aggregator import BugAggregator
+from bugmanager.fingerprints import bug_id_for, fingerprint, normalize
+from bugmanager.models import Bug, Dimension
+
+T0 = datetime(2024, 4, 21, 12, 0, tzinfo=timezone.utc)
+
+
+def test_normalize_strips_variable_parts():
+    """
+    Test that ids, numbers, addresses and timestamps do not change the fingerprint.
+    """
+    first = ('2024-04-21T12:18:27.912Z\t1b2c3d4e-1111-2222-3333-444455556666\tERROR\t'
+             'Animal 42 not found at 0x7f3a2c1b9d30')
+    second = ('2024-04-22T08:01:02.003Z\taaaaaaaa-bbbb-cccc-dddd-eeeeeeeeeeee\tERROR\t'
+              'Animal 7 not found at 0x11')
+
+    assert normalize(first) == '<time> <id> ERROR Animal <n> not found at <addr>'
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint('ERROR Owner 42 not found')
+
+
+@pytest.mark.django_db
+class TestBugAggregator:
+    """
+    Test cases for BugAggregator.
+    """
+
+    def test_burst_is_written_with_one_statement(self):
+        """
+        Test that many identical errors are counted in memory and upserted once.
+        """
+        dimension = baker.make(Dimension)
+        aggregator = BugAggregator()
+        for index in range(1000):
+            aggregator.add(dimension.pk, f'ERROR timeout after {index} ms',
+                           T0 + timedelta(seconds=index))
+
+        with CaptureQueriesContext(connection) as queries:
+            assert aggregator.flush() == 1
+
+        assert len([query for query in queries if 'INSERT' in query['sql']]) == 1
+        bug = Bug.objects.get()
+        assert bug.occurrences == 1000
+        assert (bug.first_seen, bug.last_seen) == (T0, T0 + timedelta(seconds=999))
+
+    def test_later_flushes_add_to_existing_bugs(self):
+        """
+        Test that an upsert adds occurrences and keeps the resolved flag.
+        """
+        dimension = baker.make(Dimension)
+        aggregator = BugAggregator()
+        aggregator.add(dimension.pk, 'ERROR boom 1', T0)
+        aggregator.flush()
+        Bug.objects.update(resolved=True)
+
+        aggregator.add(dimension.pk, 'ERROR boom 2', T0 + timedelta(hours=1))
+        aggregator.add(dimension.pk, 'ERROR boom 3', T0 - timedelta(hours=1))
+        aggregator.flush()
+
+        bug = Bug.objects.get(pk=bug_id_for(fingerprint('ERROR boom 1'), dimension.pk))
+        assert bug.occurrences == 3
+        assert bug.resolved
+        assert (bug.first_seen, bug.last_seen) == (T0 - timedelta(hours=1), T0 + timedelta(hours=1))
+
+    def test_maybe_flush_waits_for_interval(self):
+        """
+        Test that maybe_flush only writes once the interval elapsed.
+        """
+        now = [0]
+        aggregator = BugAggregator(flush_interval=10, clock=lambda: now[0])
+        aggregator.add(baker.make(Dimension).pk, 'ERROR boom', T0)
+
+        assert aggregator.maybe_flush() == 0
+        now[0] = 10
+        assert aggregator.maybe_flush() == 1
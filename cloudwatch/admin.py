@@ -1,68 +1,56 @@
 """
-Import the official AWS SDK for Python,
+Import the shared AWS client factory,
 Django and models relared to cloudwatch.
 """
-import boto3
 from django.contrib import admin
 from django.contrib.admin import TabularInline
-from .models import Alarm, AlarmAction, AlermDimension, AlertSource, Dimension
-
-
-def make_cloudwatch_alarm(obj):
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from .alarm_templates import apply_alarm_template
+from .autocomplete import kind_for, search_ids
+from .batch import delete_alarms, set_alarms_enabled
+from .clients import get_client
+from .models import (Alarm, AlarmAction, AlarmOutbox, AlarmTemplate, AlarmTemplateAction,
+                     AlermDimension, AlertSource, Dimension)
+from .outbox import enqueue_alarm
+from .payloads import alarm_fingerprint, build_alarm_payload, load_alarm_relations, record_pushed
+
+
+def make_cloudwatch_alarm(obj, force=False):
     """
     Creates a CloudWatch alarm based on the provided `obj` instance.
 
     Parameters:
     - obj: An instance of the model representing the alarm configuration.
+    - force: Push the alarm even if its fingerprint did not change.
 
     The method retrieves necessary information from related models (AlarmAction, AlermDimension)
-    and uses boto3 to create a CloudWatch alarm with the specified parameters.
+    and uses the shared boto3 client to create a CloudWatch alarm with the specified parameters.
+    The call is skipped when the payload matches the fingerprint of the last push.
+    If the call fails, the alarm is queued in the AlarmOutbox so the
+    `process_alarm_outbox` worker retries it, and the error is raised.
 
     Returns:
-    - None
-    """
-
-    actions = AlarmAction.objects.select_related(
-        'arn').filter(alarm_id=obj.pk)
-    alarm_dimensions = AlermDimension.objects.filter(alarm_id=obj.pk)
-    ok_actions = [
-        action.arn.value for action in actions if action.action == 'OK']
-    alarm_actions = [
-        action.arn.value for action in actions if action.action != "OK"]
-    dimensions = [{"Value": alarm_dimension.dimension.value,
-                   "Name": alarm_dimension.dimension.name}
-                  for alarm_dimension in alarm_dimensions]
-
-    client = boto3.client('cloudwatch')
-
-    name = obj.name
-    description = obj.description
-    statistic = obj.statistic
-    threshold = obj.threshold
-    comparison_operator = obj.comparison_operator
-    period = obj.period
-    is_active = obj.is_active
-    metric_name = obj.metric_name
-    namespace = obj.namespace
-    evaluation_periods = obj.evaluation_periods
-    treat_missing_data = obj.treat_missing_data
-
-    client.put_metric_alarm(
-        AlarmName=name,
-        AlarmDescription=description,
-        MetricName=metric_name,
-        Namespace=namespace,
-        Statistic=statistic,
-        ComparisonOperator=comparison_operator,
-        Threshold=threshold,
-        Period=period,
-        EvaluationPeriods=evaluation_periods,
-        OKActions=ok_actions,
-        AlarmActions=alarm_actions,
-        Dimensions=dimensions,
-        ActionsEnabled=is_active,
-        TreatMissingData=treat_missing_data
-    )
+    - bool: True if the alarm was pushed to CloudWatch.
+    """
+
+    actions, dimensions = load_alarm_relations([obj.pk])
+    payload = build_alarm_payload(
+        obj, actions.get(obj.pk, []), dimensions.get(obj.pk, []))
+
+    fingerprint = alarm_fingerprint(payload)
+    if not force and fingerprint == obj.fingerprint:
+        return False
+
+    try:
+        get_client('cloudwatch').put_metric_alarm(**payload)
+    except Exception:
+        enqueue_alarm(obj)
+        raise
+    record_pushed([(obj, fingerprint)])
+
+    return True
 
 
 class ActionInline(TabularInline):
@@ -104,70 +92,178 @@ class AlarmAdmin(admin.ModelAdmin):
     """
     Admin interface for the Alarm model, used to create AWS CloudWatch alarms.
 
+    Saving an alarm queues it in the AlarmOutbox instead of calling AWS
+    during the request. Deleting alarms deletes them from CloudWatch once the
+    transaction commits, and the bulk actions enable or disable alarm actions,
+    using batch APIs that take 100 alarm names per call.
+
     Attributes:
     - list_display: List of fields to display in the admin list view.
     - inlines: List of inline models to include in the admin interface.
+    - actions: Bulk actions to enable or disable alarm actions.
     """
 
-    list_display = ['alarm_id', 'name']
+    list_display = ['alarm_id', 'name', 'is_active']
     inlines = [ActionInline, AlermDimensionInline]
+    actions = ['enable_alarms', 'disable_alarms']
 
-    def response_post_save_add(self, request, obj):
+    def save_related(self, request, form, formsets, change):
         """
-        Custom post-save method to handle the creation of CloudWatch alarms.
+        Queue the alarm for CloudWatch once the inlines are saved.
 
-        Retrieves related AlarmAction and AlermDimension instances, extracts necessary information,
-        and calls the make_cloudwatch_alarm method to create the CloudWatch alarm.
+        The admin saves the alarm and its inlines in one transaction, so the
+        AlarmOutbox row is committed together with them. The CloudWatch call
+        itself is made by the `process_alarm_outbox` worker.
 
         Args:
         - request: The request object.
-        - obj: The Alarm instance that was saved.
+        - form: The Alarm form.
+        - formsets: The inline formsets.
+        - change: True if an existing alarm was changed.
+        """
 
-        Returns:
-        - The response from the superclass method.
+        super().save_related(request, form, formsets, change)
+        enqueue_alarm(form.instance)
+
+    def delete_model(self, request, obj):
+        """
+        Delete the alarm and its CloudWatch alarm after the transaction commits.
         """
 
-        make_cloudwatch_alarm(obj)
+        self.delete_queryset(request, Alarm.objects.filter(pk=obj.pk))
 
-        return super().response_post_save_add(request, obj)
+    def delete_queryset(self, request, queryset):
+        """
+        Delete the alarms and their CloudWatch alarms in batches of 100 names.
 
-    def response_post_save_change(self, request, obj):
+        Names still used by another Alarm row are kept in CloudWatch.
         """
-        Custom post-save method to handle the creation of CloudWatch alarms.
 
-        Retrieves related AlarmAction and AlermDimension instances, extracts necessary information,
-        and calls the make_cloudwatch_alarm method to create the CloudWatch alarm.
+        names = set(queryset.values_list('name', flat=True))
+        super().delete_queryset(request, queryset)
+        names -= set(Alarm.objects.filter(name__in=names).values_list('name', flat=True))
+        if names:
+            transaction.on_commit(lambda: delete_alarms(names))
 
-        Args:
-        - request: The request object.
-        - obj: The Alarm instance that was saved.
+    @admin.action(description='Enable actions of selected alarms')
+    def enable_alarms(self, request, queryset):
+        """
+        Enable the actions of the selected alarms in CloudWatch.
+        """
 
-        Returns:
-        - The response from the superclass method.
+        calls = set_alarms_enabled(queryset, True)
+        self.message_user(request, f'Enabled alarm actions with {calls} API calls.')
+
+    @admin.action(description='Disable actions of selected alarms')
+    def disable_alarms(self, request, queryset):
+        """
+        Disable the actions of the selected alarms in CloudWatch.
         """
 
-        make_cloudwatch_alarm(obj)
+        calls = set_alarms_enabled(queryset, False)
+        self.message_user(request, f'Disabled alarm actions with {calls} API calls.')
 
-        return super().response_post_save_change(request, obj)
+
+class TemplateActionInline(TabularInline):
+    """
+    Inline formset for the actions copied to every alarm of an AlarmTemplate.
+    """
+
+    autocomplete_fields = ['arn']
+    model = AlarmTemplateAction
+    extra = 0
+    min_num = 1
+
+
+@admin.register(AlarmTemplate)
+class AlarmTemplateAdmin(admin.ModelAdmin):
+    """
+    Admin interface for AlarmTemplate, used to create alarms for many dimensions.
+
+    The `apply_templates` action creates the missing alarms of the selected
+    templates in bulk and queues them in the AlarmOutbox.
+    """
+
+    list_display = ['name', 'name_pattern', 'metric_name', 'namespace', 'is_active']
+    inlines = [TemplateActionInline]
+    autocomplete_fields = ['dimensions']
+    actions = ['apply_templates']
+
+    @admin.action(description='Create alarms for selected templates')
+    def apply_templates(self, request, queryset):
+        """
+        Create the missing alarms of the selected templates.
+        """
+
+        created = 0
+        for template in queryset:
+            created += apply_alarm_template(template)
+        self.message_user(request, f'Created {created} alarms.')
+
+
+@admin.register(AlarmOutbox)
+class AlarmOutboxAdmin(admin.ModelAdmin):
+    """
+    Admin interface to inspect queued and dead-lettered CloudWatch writes.
+
+    The `requeue` action makes selected rows pending and due again.
+    """
+
+    list_display = ['id', 'alarm', 'status', 'attempts', 'available_at', 'last_error']
+    list_filter = ['status']
+    list_select_related = ['alarm']
+    readonly_fields = ['alarm', 'attempts', 'last_error', 'created_at']
+    actions = ['requeue']
+
+    def has_add_permission(self, *kwargs):
+        return False
+
+    @admin.action(description='Requeue selected rows')
+    def requeue(self, request, queryset):
+        """
+        Make the selected rows pending and due now.
+        """
+
+        queryset.update(status=AlarmOutbox.STATUS_PENDING, attempts=0,
+                        available_at=timezone.now())
+
+
+class IndexedAutocompleteMixin:
+    """
+    Answer admin autocomplete requests from the AutocompleteToken index.
+
+    Autocomplete widgets send a request per keystroke. Those searches match
+    each typed word against indexed token prefixes and are cached briefly;
+    the changelist search still uses `search_fields`.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term and request is not None and request.path == reverse('admin:autocomplete'):
+            ids = search_ids(kind_for(self.model), search_term)
+            return queryset.filter(pk__in=ids), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 @admin.register(AlertSource)
-class AlertSourceAdmin(admin.ModelAdmin):
+class AlertSourceAdmin(IndexedAutocompleteMixin, admin.ModelAdmin):
     """
     Custom admin configuration for the AlertSource model.
 
     This admin class customizes the appearance and behavior of the ARN model
     in the Django admin interface. It excludes the 'arn_id' field from the admin
-    form, as it is automatically generated. It also adds a search field for the 'value'
-    field, allowing administrators to search for ARN instances by their value.
+    form, as it is automatically generated. Searching and filtering use the indexed
+    ARN components: an exact account id, region or service, or a prefix of the
+    resource or name. A full ARN can be pasted to find it by exact value.
     """
 
     exclude = ['arn_id']
-    search_fields = ['value']
+    list_display = ['name', 'value', 'account_id', 'region', 'service']
+    list_filter = ['service', 'region', 'account_id']
+    search_fields = ['=value', '=account_id', '=region', '=service', '^resource', '^name']
 
 
 @admin.register(Dimension)
-class DimensionAdmin(admin.ModelAdmin):
+class DimensionAdmin(IndexedAutocompleteMixin, admin.ModelAdmin):
     """
     Custom admin configuration for the Dimension model.
 
@@ -175,6 +271,7 @@ class DimensionAdmin(admin.ModelAdmin):
     in the Django admin interface. It specifies that the 'dimension_id' and 'value'
     fields should be displayed in the list view. It also adds a search field for the 'value'
     field, allowing administrators to search for Dimension instances by their value.
+    Autocomplete requests use the token index instead, see IndexedAutocompleteMixin.
     """
 
     list_display = ['dimension_id', 'value']
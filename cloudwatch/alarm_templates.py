@@ -0,0 +1,79 @@
+"""
+Materialize AlarmTemplate rows into Alarm rows for many dimensions at once.
+"""
+from django.db import transaction
+
+from .batch import chunked
+from .models import Alarm, AlarmAction, AlermDimension
+from .outbox import enqueue_alarms
+
+TEMPLATE_FIELDS = [
+    'description', 'statistic', 'threshold', 'comparison_operator', 'period',
+    'is_active', 'metric_name', 'namespace', 'treat_missing_data', 'evaluation_periods',
+]
+
+
+def apply_alarm_template(template, dimensions=None, batch_size=500):
+    """
+    Create one Alarm per dimension from `template` and queue them for CloudWatch.
+
+    Alarms, actions and dimension links are written with `bulk_create` in a
+    single transaction. Dimensions that already have an alarm from this
+    template are skipped, so applying a template again is idempotent. The new
+    alarms are queued in the AlarmOutbox and pushed in batches by the worker.
+
+    Parameters:
+    - template: The AlarmTemplate to apply.
+    - dimensions: The Dimension instances to create alarms for. Defaults to
+      the dimensions selected on the template.
+    - batch_size: Rows per INSERT statement.
+
+    Returns:
+    - int: The number of alarms created.
+    """
+
+    if '{dimension}' not in template.name_pattern:
+        raise ValueError('The name pattern of an alarm template must contain {dimension}.')
+
+    if dimensions is None:
+        dimensions = template.dimensions.all()
+    dimensions = list(dimensions)
+
+    done = set(AlermDimension.objects.filter(
+        alarm__template=template, dimension__in=dimensions
+    ).values_list('dimension_id', flat=True))
+    names = {dimension.pk: template.alarm_name(dimension)
+             for dimension in dimensions if dimension.pk not in done}
+    if not names:
+        return 0
+
+    actions = list(template.actions.values_list('action', 'arn_id'))
+    values = {field: getattr(template, field) for field in TEMPLATE_FIELDS}
+
+    with transaction.atomic():
+        alarm_ids = {}
+        for chunk in chunked(names.values(), batch_size):
+            alarm_ids.update(Alarm.objects.filter(
+                template=template, name__in=chunk).values_list('name', 'pk'))
+
+        created = [Alarm(template=template, name=name, **values)
+                   for name in set(names.values()) if name not in alarm_ids]
+        Alarm.objects.bulk_create(created, batch_size=batch_size)
+
+        # MySQL does not return the ids of bulk-created rows, so read them back.
+        for chunk in chunked(names.values(), batch_size):
+            alarm_ids.update(Alarm.objects.filter(
+                template=template, name__in=chunk).values_list('name', 'pk'))
+
+        AlarmAction.objects.bulk_create(
+            [AlarmAction(alarm_id=alarm_ids[name], action=action, arn_id=arn_id)
+             for name in set(names.values()) for action, arn_id in actions],
+            batch_size=batch_size, ignore_conflicts=True)
+        AlermDimension.objects.bulk_create(
+            [AlermDimension(alarm_id=alarm_ids[name], dimension_id=dimension_id)
+             for dimension_id, name in names.items()],
+            batch_size=batch_size, ignore_conflicts=True)
+
+        enqueue_alarms(alarm_ids[name] for name in names.values())
+
+    return len(created)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CloudwatchConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "cloudwatch"
+
+    def ready(self):
+        from . import signals  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
@@ -0,0 +1,29 @@
+"""
+Parsing of AWS ARNs (Amazon Resource Names).
+
+The general format is 'arn:partition:service:region:account-id:resource',
+where the resource may itself contain ':' or '/'.
+"""
+from collections import namedtuple
+
+ARN = namedtuple('ARN', ['partition', 'service', 'region', 'account_id', 'resource'])
+
+
+def parse_arn(value):
+    """
+    Split an ARN into its components.
+
+    Parameters:
+    - value: The ARN string.
+
+    Returns:
+    - ARN: Named tuple of partition, service, region, account_id and resource.
+
+    Raises:
+    - ValueError: If the value is not an ARN.
+    """
+
+    parts = value.split(':', 5)
+    if len(parts) != 6 or parts[0] != 'arn':
+        raise ValueError(f'Invalid AWS ARN: {value}')
+    return ARN(*parts[1:])
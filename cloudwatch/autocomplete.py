@@ -0,0 +1,155 @@
+"""
+Indexed, cached autocomplete for Dimension and AlertSource.
+
+Every object is split into lowercase tokens stored in AutocompleteToken.
+A search term matches the objects that have, for every word of the term, a
+token starting with that word, which is an indexed prefix lookup. Results
+are cached for AUTOCOMPLETE_CACHE_TIMEOUT seconds; saving or deleting an
+object bumps a version number in the cache so stale results are not used.
+The version only reaches other worker processes through a shared cache
+backend, which is why the `CACHES` setting uses the database cache.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import AlertSource, AutocompleteToken, Dimension
+
+MAX_RESULTS = 200
+TOKEN_MAX_LENGTH = 255
+SPLIT_PATTERN = re.compile(r'[^0-9A-Za-z]+')
+WORD_PATTERN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+KIND_MODELS = {
+    AutocompleteToken.KIND_DIMENSION: Dimension,
+    AutocompleteToken.KIND_ALERT_SOURCE: AlertSource,
+}
+
+
+def kind_for(model):
+    """
+    Return the AutocompleteToken kind of a model class, or None.
+    """
+
+    for kind, kind_model in KIND_MODELS.items():
+        if model is kind_model:
+            return kind
+    return None
+
+
+def tokenize(*values):
+    """
+    Split values into lowercase search tokens.
+
+    ARNs contribute their resource part, e.g. 'function:AnimalGetById' for a
+    Lambda ARN. Each value is split on punctuation, and each segment is kept
+    from every camelCase boundary to its end, so 'animal', 'getbyid' and
+    'id' are all prefixes of a token.
+
+    Returns:
+    - set: The tokens.
+    """
+
+    tokens = set()
+    for value in values:
+        if not value:
+            continue
+        if value.startswith('arn:'):
+            value = value.split(':', 5)[-1]
+        for segment in SPLIT_PATTERN.split(value):
+            if not segment:
+                continue
+            tokens.add(segment.lower()[:TOKEN_MAX_LENGTH])
+            words = [word.lower() for word in WORD_PATTERN.findall(segment)]
+            tokens.update(''.join(words[start:])[:TOKEN_MAX_LENGTH]
+                          for start in range(len(words)))
+    return tokens
+
+
+def object_tokens(obj):
+    """
+    Return the tokens of a Dimension or AlertSource instance.
+    """
+
+    return tokenize(obj.name, obj.value)
+
+
+def index_objects(kind, objects):
+    """
+    Replace the tokens of `objects` and invalidate cached results.
+
+    Parameters:
+    - kind: The AutocompleteToken kind of the objects.
+    - objects: Dimension or AlertSource instances.
+    """
+
+    objects = list(objects)
+    AutocompleteToken.objects.filter(
+        kind=kind, object_id__in=[obj.pk for obj in objects]).delete()
+    AutocompleteToken.objects.bulk_create(
+        [AutocompleteToken(kind=kind, object_id=obj.pk, token=token)
+         for obj in objects for token in object_tokens(obj)],
+        batch_size=1000,
+    )
+    invalidate(kind)
+
+
+def remove_objects(kind, object_ids):
+    """
+    Drop the tokens of deleted objects and invalidate cached results.
+    """
+
+    AutocompleteToken.objects.filter(kind=kind, object_id__in=object_ids).delete()
+    invalidate(kind)
+
+
+def version_key(kind):
+    """
+    Return the cache key holding the result version of `kind`.
+    """
+
+    return f'autocomplete:{kind}:version'
+
+
+def invalidate(kind):
+    """
+    Make every cached result of `kind` stale.
+    """
+
+    try:
+        cache.incr(version_key(kind))
+    except ValueError:
+        cache.set(version_key(kind), 1, None)
+
+
+def search_ids(kind, term):
+    """
+    Return up to MAX_RESULTS object ids matching every word of `term`.
+
+    Parameters:
+    - kind: The AutocompleteToken kind to search.
+    - term: The text typed by the user.
+
+    Returns:
+    - list: Matching primary keys.
+    """
+
+    if term.startswith('arn:'):
+        term = term.split(':', 5)[-1]
+    words = sorted({word.lower()[:TOKEN_MAX_LENGTH]
+                    for word in SPLIT_PATTERN.split(term) if word})
+    if not words:
+        return []
+
+    version = cache.get_or_set(version_key(kind), 1, None)
+    key = f'autocomplete:{kind}:{version}:{",".join(words)}'
+    ids = cache.get(key)
+    if ids is None:
+        queryset = KIND_MODELS[kind].objects.all()
+        for word in words:
+            queryset = queryset.filter(pk__in=AutocompleteToken.objects.filter(
+                kind=kind, token__startswith=word).values('object_id'))
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:MAX_RESULTS])
+        cache.set(key, ids, getattr(settings, 'AUTOCOMPLETE_CACHE_TIMEOUT', 30))
+    return ids
@@ -0,0 +1,77 @@
+"""
+Batched CloudWatch alarm operations.
+
+DeleteAlarms, EnableAlarmActions and DisableAlarmActions take up to 100
+alarm names per call, so acting on thousands of alarms takes one call per
+100 names instead of one call per alarm.
+"""
+from .clients import get_client
+from .payloads import alarm_fingerprint, compile_alarm_payloads, record_pushed
+
+BATCH_SIZE = 100
+
+
+def chunked(items, size=BATCH_SIZE):
+    """
+    Yield successive lists of at most `size` items.
+    """
+
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def delete_alarms(names):
+    """
+    Delete the CloudWatch alarms with the given names.
+
+    Parameters:
+    - names: Iterable of alarm names.
+
+    Returns:
+    - int: The number of DeleteAlarms calls made.
+    """
+
+    client = get_client('cloudwatch')
+    calls = 0
+    for chunk in chunked(sorted(set(names))):
+        client.delete_alarms(AlarmNames=chunk)
+        calls += 1
+    return calls
+
+
+def set_alarms_enabled(queryset, enabled):
+    """
+    Enable or disable the actions of every alarm in `queryset`.
+
+    Calls EnableAlarmActions or DisableAlarmActions in batches, and after
+    each call that succeeded updates `is_active` of its alarms. Alarms that
+    were in sync with CloudWatch get the fingerprint of their new payload, so
+    the next save does not push them again. If a call fails, the alarms of
+    the batches already sent stay updated and the rest keep their state.
+
+    Parameters:
+    - queryset: An Alarm queryset.
+    - enabled: True to enable the alarm actions, False to disable them.
+
+    Returns:
+    - int: The number of API calls made.
+    """
+
+    in_sync = {}
+    names = set()
+    for alarm, payload in compile_alarm_payloads(queryset):
+        names.add(alarm.name)
+        if alarm_fingerprint(payload) == alarm.fingerprint:
+            payload['ActionsEnabled'] = enabled
+            in_sync.setdefault(alarm.name, []).append((alarm, alarm_fingerprint(payload)))
+
+    client = get_client('cloudwatch')
+    operation = client.enable_alarm_actions if enabled else client.disable_alarm_actions
+    calls = 0
+    for chunk in chunked(sorted(names)):
+        operation(AlarmNames=chunk)
+        calls += 1
+        queryset.filter(name__in=chunk).update(is_active=enabled)
+        record_pushed([pushed for name in chunk for pushed in in_sync.get(name, [])])
+    return calls
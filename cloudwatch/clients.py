@@ -0,0 +1,68 @@
+"""
+Shared, lazily created boto3 clients.
+
+Clients are created on first use and cached per (service, region) in each
+thread, since boto3 sessions are not safe to share between threads. Every
+client goes through the shared rate limiter in `cloudwatch.ratelimit`.
+"""
+import threading
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+from .ratelimit import install_rate_limiter
+
+_local = threading.local()
+
+
+def get_client_config():
+    """
+    Build the botocore Config used for every client.
+
+    The options come from the `AWS_CLIENT_CONFIG` setting, e.g. connection
+    pool size, retry mode and timeouts.
+
+    Returns:
+    - botocore.config.Config
+    """
+
+    return Config(**getattr(settings, 'AWS_CLIENT_CONFIG', {}))
+
+
+def get_client(service, region=None):
+    """
+    Return the boto3 client for `service` in `region`, creating it if needed.
+
+    Parameters:
+    - service: The AWS service name, e.g. 'cloudwatch' or 'logs'.
+    - region: The AWS region. Defaults to the `AWS_REGION` setting and then
+      to the boto3 default region.
+
+    Returns:
+    - The boto3 client.
+    """
+
+    region = region or getattr(settings, 'AWS_REGION', None)
+    clients = getattr(_local, 'clients', None)
+    if clients is None:
+        clients = _local.clients = {}
+
+    key = (service, region)
+    if key not in clients:
+        session = getattr(_local, 'session', None)
+        if session is None:
+            session = _local.session = boto3.session.Session()
+        client = session.client(
+            service, region_name=region, config=get_client_config())
+        install_rate_limiter(client)
+        clients[key] = client
+
+    return clients[key]
+
+
+def clear_clients():
+    """
+    Drop the clients cached for the current thread.
+    """
+
+    _local.clients = {}
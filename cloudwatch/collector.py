@@ -0,0 +1,189 @@
+"""
+Incremental collection of the metrics behind Alarm rows with GetMetricData.
+
+Every distinct metric (namespace, metric name and dimensions) of the alarms
+is fetched at one-minute resolution with four statistics, the sum, sample
+count, minimum and maximum, and merged into the MetricStore. Up to
+MAX_QUERIES metric queries are sent per call and result pages are followed
+with NextToken. Each metric resumes at its collection watermark, the end of
+its last fetched window whether or not data came back, minus a short
+OVERLAP so that late datapoints of the last minutes are fetched again.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import chunked
+from .clients import get_client
+from .metricstore import ROW_DTYPE, MetricStore, from_epoch, metric_key, to_epoch
+from .models import AlermDimension
+
+PERIOD = 60
+OVERLAP = 2 * PERIOD
+MAX_QUERIES = 500
+STATISTICS = {
+    'sum': 'Sum',
+    'count': 'SampleCount',
+    'min': 'Minimum',
+    'max': 'Maximum',
+}
+
+Metric = namedtuple('Metric', ['namespace', 'metric_name', 'dimensions'])
+
+
+def alarm_metrics(queryset):
+    """
+    Return the distinct metrics of the alarms in `queryset`, in two queries.
+
+    Returns:
+    - dict: Metric key to Metric.
+    """
+
+    alarms = list(queryset.values_list('pk', 'namespace', 'metric_name'))
+    dimensions = {}
+    for alarm_id, name, value in AlermDimension.objects.filter(
+            alarm_id__in=[pk for pk, _, _ in alarms]).values_list(
+                'alarm_id', 'dimension__name', 'dimension__value'):
+        dimensions.setdefault(alarm_id, []).append((name, value))
+
+    metrics = {}
+    for pk, namespace, metric_name in alarms:
+        metric = Metric(namespace, metric_name, tuple(sorted(dimensions.get(pk, []))))
+        metrics[metric_key(*metric)] = metric
+    return metrics
+
+
+def build_queries(metrics):
+    """
+    Build the GetMetricData queries of `metrics`.
+
+    Parameters:
+    - metrics: List of (key, Metric) pairs.
+
+    Returns:
+    - tuple: The MetricDataQueries list and a dict mapping each query id to
+      the (key, column) it fills.
+    """
+
+    queries = []
+    targets = {}
+    for index, (key, metric) in enumerate(metrics):
+        for column, statistic in STATISTICS.items():
+            query_id = f'm{index}_{column}'
+            targets[query_id] = (key, column)
+            queries.append({
+                'Id': query_id,
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': metric.namespace,
+                        'MetricName': metric.metric_name,
+                        'Dimensions': [{'Name': name, 'Value': value}
+                                       for name, value in metric.dimensions],
+                    },
+                    'Period': PERIOD,
+                    'Stat': statistic,
+                },
+                'ReturnData': True,
+            })
+    return queries, targets
+
+
+def build_rows(columns):
+    """
+    Turn per-statistic datapoints into a ROW_DTYPE array.
+
+    Parameters:
+    - columns: Dict mapping column name to (timestamps, values) lists.
+
+    Returns:
+    - ndarray: Rows sorted by timestamp. Missing statistics are NaN.
+    """
+
+    timestamps = np.unique(np.concatenate(
+        [np.asarray(stamps, dtype=np.int64) for stamps, _ in columns.values()] or
+        [np.empty(0, dtype=np.int64)]))
+    rows = np.zeros(len(timestamps), dtype=ROW_DTYPE)
+    rows['timestamp'] = timestamps
+    for column in STATISTICS:
+        rows[column] = np.nan
+        stamps, values = columns.get(column, ([], []))
+        if stamps:
+            rows[column][np.searchsorted(timestamps, stamps)] = values
+    return rows
+
+
+def fetch_metrics(metrics, start, end):
+    """
+    Fetch one-minute datapoints of `metrics` between start and end.
+
+    Parameters:
+    - metrics: List of at most MAX_QUERIES // len(STATISTICS) (key, Metric) pairs.
+    - start, end: Epoch seconds.
+
+    Returns:
+    - tuple: A dict mapping metric key to its rows, and the number of calls.
+    """
+
+    queries, targets = build_queries(metrics)
+    columns = {key: {} for key, _ in metrics}
+    calls = 0
+
+    paginator = get_client('cloudwatch').get_paginator('get_metric_data')
+    for page in paginator.paginate(MetricDataQueries=queries, StartTime=from_epoch(start),
+                                   EndTime=from_epoch(end), ScanBy='TimestampAscending'):
+        calls += 1
+        for result in page.get('MetricDataResults', []):
+            key, column = targets[result['Id']]
+            stamps, values = columns[key].setdefault(column, ([], []))
+            stamps.extend(to_epoch(stamp) for stamp in result.get('Timestamps', []))
+            values.extend(result.get('Values', []))
+
+    return {key: build_rows(key_columns) for key, key_columns in columns.items()}, calls
+
+
+def collect_metrics(metrics, end, lookback, store=None):
+    """
+    Fetch the new datapoints of `metrics` and append them to the store.
+
+    A metric is fetched from OVERLAP seconds before its watermark, or from
+    `end - lookback` the first time, and its watermark then moves to `end`,
+    also for metrics without datapoints. Metrics with the same start are
+    fetched together, so on a steady schedule every metric shares the start
+    and one call is sent per MAX_QUERIES // 4 metrics.
+
+    Parameters:
+    - metrics: Dict of metric key to Metric, see `alarm_metrics`.
+    - end: Epoch seconds to collect up to, exclusive.
+    - lookback: Seconds to fetch for metrics that were never collected.
+    - store: The MetricStore. Defaults to the configured store.
+
+    Returns:
+    - dict: Counts of 'metrics', 'calls' and 'datapoints'.
+    """
+
+    store = store or MetricStore()
+    end -= end % PERIOD
+    stats = {'metrics': 0, 'calls': 0, 'datapoints': 0}
+
+    groups = {}
+    for key, metric in metrics.items():
+        watermark = store.watermark(key)
+        if watermark is None and store.last_timestamp(key) is not None:
+            # Stored before watermarks were kept.
+            watermark = store.last_timestamp(key) + PERIOD
+        if watermark is not None and watermark >= end:
+            continue
+        start = watermark - OVERLAP if watermark is not None else end - lookback
+        start -= start % PERIOD
+        groups.setdefault(start, []).append((key, metric))
+
+    for start, group in sorted(groups.items()):
+        for chunk in chunked(group, MAX_QUERIES // len(STATISTICS)):
+            rows, calls = fetch_metrics(chunk, start, end)
+            stats['calls'] += calls
+            for key, metric in chunk:
+                stats['metrics'] += 1
+                stats['datapoints'] += len(rows[key])
+                store.append(key, rows[key], identity=metric._asdict(), collected_until=end)
+
+    return stats
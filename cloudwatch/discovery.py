@@ -0,0 +1,175 @@
+"""
+Incremental discovery of AWS Lambda functions into Dimension rows.
+
+Each region is listed by its own thread with the ListFunctions paginator.
+Pages are handed to the calling thread through a bounded queue and upserted
+in chunks, so memory stays flat however many functions exist. Only new
+functions and functions whose LastModified changed are written.
+"""
+import hashlib
+import queue
+import threading
+
+from django.utils import timezone
+
+from .autocomplete import index_objects
+from .clients import get_client
+from .models import AutocompleteToken, Dimension, DiscoveryCheckpoint
+
+CHUNK_SIZE = 500
+_DONE = object()
+
+
+def iter_function_pages(region):
+    """
+    Yield the pages of Lambda functions of `region`.
+
+    Each page is a list of (function_name, function_arn, last_modified) tuples.
+    """
+
+    paginator = get_client('lambda', region).get_paginator('list_functions')
+    for page in paginator.paginate(PaginationConfig={'PageSize': 50}):
+        yield [(function['FunctionName'], function['FunctionArn'], function['LastModified'])
+               for function in page.get('Functions', [])]
+
+
+def upsert_functions(region, functions):
+    """
+    Create or update the Dimension rows of a chunk of Lambda functions.
+
+    New functions are named after the function; if that name is already
+    taken by another ARN, the region is appended. A row whose name was taken
+    meanwhile, e.g. by another region of the same run, is retried with the
+    next name, and skipped once both are taken. Existing rows only get a new
+    `last_modified` when it changed.
+
+    Parameters:
+    - region: The region the functions were listed in.
+    - functions: List of (function_name, function_arn, last_modified) tuples.
+
+    Returns:
+    - tuple: The number of created, updated, unchanged and skipped rows.
+    """
+
+    existing = {dimension.value: dimension
+                for dimension in Dimension.objects.filter(value__in=[arn for _, arn, _ in functions])}
+
+    changed = []
+    new = {}
+    for name, arn, last_modified in functions:
+        dimension = existing.get(arn)
+        if dimension is None:
+            new[arn] = ([name, f'{name}@{region}'], last_modified)
+        elif dimension.last_modified != last_modified:
+            dimension.last_modified = last_modified
+            changed.append(dimension)
+
+    created = 0
+    pending = dict(new)
+    while pending:
+        taken = set(Dimension.objects.filter(
+            name__in=[name for names, _ in pending.values() for name in names],
+        ).values_list('name', flat=True))
+        rows = {}
+        for arn, (names, last_modified) in pending.items():
+            name = next((name for name in names if name not in taken), None)
+            if name is not None:
+                taken.add(name)
+                rows[arn] = Dimension(name=name, value=arn, source=Dimension.SOURCE_LAMBDA,
+                                      last_modified=last_modified)
+        if not rows:
+            break
+        Dimension.objects.bulk_create(rows.values(), ignore_conflicts=True)
+
+        stored = dict(Dimension.objects.filter(value__in=list(rows)).values_list('value', 'name'))
+        for arn, row in rows.items():
+            if stored.get(arn) == row.name:
+                created += 1
+            if arn in stored:
+                # Created here, or by another process meanwhile.
+                del pending[arn]
+            else:
+                pending[arn][0].remove(row.name)
+
+    Dimension.objects.bulk_update(changed, ['last_modified'])
+
+    if created or changed:
+        index_objects(AutocompleteToken.KIND_DIMENSION, list(
+            Dimension.objects.filter(value__in=list(new) + [d.value for d in changed])))
+
+    skipped = len(pending)
+    return created, len(changed), len(functions) - created - len(changed) - skipped, skipped
+
+
+def _list_region(region, pages):
+    try:
+        for page in iter_function_pages(region):
+            pages.put((region, page, None))
+    except Exception as error:  # pylint: disable=broad-except
+        pages.put((region, None, error))
+    pages.put((region, _DONE, None))
+
+
+def discover_lambda_functions(regions, chunk_size=CHUNK_SIZE):
+    """
+    List the Lambda functions of `regions` in parallel and upsert them.
+
+    A DiscoveryCheckpoint is written for every region that was listed
+    without errors.
+
+    Parameters:
+    - regions: The regions to list.
+    - chunk_size: Functions written per upsert.
+
+    Returns:
+    - dict: Per region, a dict with 'created', 'updated', 'unchanged' and
+      'skipped' counts and the 'error' raised while listing, if any.
+    """
+
+    pages = queue.Queue(maxsize=len(regions) * 4)
+    threads = [threading.Thread(target=_list_region, args=(region, pages), daemon=True)
+               for region in regions]
+    for thread in threads:
+        thread.start()
+
+    stats = {region: {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'error': None}
+             for region in regions}
+    buffers = {region: [] for region in regions}
+    hashes = {region: hashlib.sha256() for region in regions}
+
+    def flush(region):
+        counts = upsert_functions(region, buffers[region])
+        for name, count in zip(['created', 'updated', 'unchanged', 'skipped'], counts):
+            stats[region][name] += count
+        buffers[region] = []
+
+    running = len(regions)
+    while running:
+        region, page, error = pages.get()
+        if error is not None:
+            stats[region]['error'] = error
+        elif page is _DONE:
+            running -= 1
+            if buffers[region]:
+                flush(region)
+            if stats[region]['error'] is None:
+                counts = stats[region]
+                DiscoveryCheckpoint.objects.update_or_create(
+                    source=Dimension.SOURCE_LAMBDA, region=region,
+                    defaults={
+                        'completed_at': timezone.now(),
+                        'resource_count': sum(counts[name] for name in [
+                            'created', 'updated', 'unchanged', 'skipped']),
+                        'listing_hash': hashes[region].hexdigest(),
+                    })
+        else:
+            for _, arn, last_modified in page:
+                hashes[region].update(f'{arn}\0{last_modified}\n'.encode('utf-8'))
+            buffers[region].extend(page)
+            if len(buffers[region]) >= chunk_size:
+                flush(region)
+
+    for thread in threads:
+        thread.join()
+
+    return stats
@@ -0,0 +1,196 @@
+"""
+Local, vectorized evaluation of Alarm definitions against metric datapoints.
+
+Raw datapoints are aggregated into `period` buckets with the alarm
+statistic, compared to the threshold, and evaluated over sliding windows of
+`evaluation_periods` buckets, giving the OK / ALARM / INSUFFICIENT_DATA
+state after every bucket. Everything is done with NumPy array operations,
+and many thresholds are evaluated at once by broadcasting, so an alarm can
+be backtested over weeks of data before it is pushed to CloudWatch.
+
+Semantics follow CloudWatch for alarms where all `evaluation_periods`
+datapoints must breach (the model has no DatapointsToAlarm):
+
+- breaching / notBreaching: missing buckets count as breaching or not.
+- missing: a window with no datapoints is INSUFFICIENT_DATA; otherwise
+  the datapoints present are evaluated.
+- ignore: a window with no datapoints keeps the previous state; otherwise
+  the datapoints present are evaluated.
+"""
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .models import Alarm
+
+STATE_OK = 0
+STATE_ALARM = 1
+STATE_INSUFFICIENT_DATA = 2
+STATE_NAMES = ['OK', 'ALARM', 'INSUFFICIENT_DATA']
+
+_KEEP = -1
+
+COMPARISONS = {
+    Alarm.THRESHOLD_GREATER_THAN_OR_EQUAL: np.greater_equal,
+    Alarm.THRESHOLD_GREATER_THAN: np.greater,
+    Alarm.THRESHOLD_LESS_THAN: np.less,
+    Alarm.THRESHOLD_LESS_THAN_OR_EQUAL: np.less_equal,
+}
+
+Backtest = namedtuple('Backtest', ['thresholds', 'alarms', 'alarm_periods', 'insufficient_periods'])
+
+
+def aggregate(timestamps, values, start, end, period, statistic):
+    """
+    Aggregate raw datapoints into period buckets.
+
+    Parameters:
+    - timestamps: Datapoint times in epoch seconds.
+    - values: Datapoint values.
+    - start: Epoch seconds of the first bucket.
+    - end: Epoch seconds after the last bucket.
+    - period: Bucket length in seconds.
+    - statistic: One of the Alarm.STATISTIC_* values.
+
+    Returns:
+    - ndarray: One float per bucket, NaN where the bucket has no datapoints.
+    """
+
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    buckets = int(np.ceil((end - start) / period))
+
+    index = np.floor((timestamps - start) / period).astype(np.int64)
+    inside = (index >= 0) & (index < buckets)
+    index, values = index[inside], values[inside]
+
+    counts = np.bincount(index, minlength=buckets).astype(np.float64)
+    if statistic == Alarm.STATISTIC_SAMPLE_COUNT:
+        result = counts
+    elif statistic in (Alarm.STATISTIC_SUM, Alarm.STATISTIC_AVERAGE):
+        result = np.bincount(index, weights=values, minlength=buckets)
+        if statistic == Alarm.STATISTIC_AVERAGE:
+            result = np.divide(result, counts, out=np.zeros(buckets), where=counts > 0)
+    elif statistic == Alarm.STATISTIC_MINIMUM:
+        result = np.full(buckets, np.inf)
+        np.minimum.at(result, index, values)
+    elif statistic == Alarm.STATISTIC_MAXIMUM:
+        result = np.full(buckets, -np.inf)
+        np.maximum.at(result, index, values)
+    else:
+        raise ValueError(f'Unsupported statistic: {statistic}')
+
+    result[counts == 0] = np.nan
+    return result
+
+
+def evaluate(series, comparison_operator, thresholds, evaluation_periods, treat_missing_data):
+    """
+    Compute the alarm state after every bucket of an aggregated series.
+
+    Parameters:
+    - series: Aggregated values, NaN for missing buckets, see `aggregate`.
+    - comparison_operator: One of the static Alarm.THRESHOLD_* operators.
+    - thresholds: A threshold, or a 1-d array of thresholds to evaluate at once.
+    - evaluation_periods: Number of buckets in each evaluation window.
+    - treat_missing_data: One of the Alarm.TREAT_DATA_AS_* values.
+
+    Returns:
+    - ndarray: int8 states (STATE_*), shaped like `series` for a single
+      threshold, or (len(thresholds), len(series)) for an array.
+
+    Raises:
+    - ValueError: For anomaly detection band operators, which need a model
+      that is only available in CloudWatch.
+    """
+
+    compare = COMPARISONS.get(comparison_operator)
+    if compare is None:
+        raise ValueError(f'Cannot evaluate {comparison_operator} locally.')
+
+    series = np.asarray(series, dtype=np.float64)
+    scalar = np.ndim(thresholds) == 0
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))[:, None]
+
+    present = ~np.isnan(series)
+    with np.errstate(invalid='ignore'):
+        breaching = compare(series, thresholds) & present
+
+    count = len(series)
+    states = np.full((len(thresholds), count), STATE_INSUFFICIENT_DATA, dtype=np.int8)
+    if count < evaluation_periods:
+        return states[0] if scalar else states
+
+    if treat_missing_data in (Alarm.TREAT_DATA_AS_BREACHING, Alarm.TREAT_DATA_AS_NOTBREACHING):
+        if treat_missing_data == Alarm.TREAT_DATA_AS_BREACHING:
+            breaching |= ~present
+        alarm = sliding_window_view(breaching, evaluation_periods, axis=1).all(axis=2)
+        window_states = np.where(alarm, STATE_ALARM, STATE_OK)
+    else:
+        present_count = sliding_window_view(present, evaluation_periods).sum(axis=1)
+        breach_count = sliding_window_view(breaching, evaluation_periods, axis=1).sum(axis=2)
+        window_states = np.where(breach_count == present_count, STATE_ALARM, STATE_OK)
+        empty = present_count == 0
+        if treat_missing_data == Alarm.TREAT_DATA_AS_MISSING:
+            window_states = np.where(empty, STATE_INSUFFICIENT_DATA, window_states)
+        elif treat_missing_data == Alarm.TREAT_DATA_AS_IGNORE:
+            window_states = _forward_fill(np.where(empty, _KEEP, window_states))
+        else:
+            raise ValueError(f'Unsupported treat_missing_data: {treat_missing_data}')
+
+    states[:, evaluation_periods - 1:] = window_states
+    return states[0] if scalar else states
+
+
+def _forward_fill(states):
+    """
+    Replace _KEEP entries with the previous state, INSUFFICIENT_DATA at first.
+    """
+
+    states = np.asarray(states)
+    positions = np.where(states != _KEEP, np.arange(states.shape[-1]), -1)
+    np.maximum.accumulate(positions, axis=-1, out=positions)
+    filled = np.take_along_axis(states, np.maximum(positions, 0), axis=-1)
+    return np.where(positions < 0, STATE_INSUFFICIENT_DATA, filled)
+
+
+def evaluate_alarm(alarm, timestamps, values, start, end, thresholds=None):
+    """
+    Compute the state timeline of an Alarm over raw datapoints.
+
+    Parameters:
+    - alarm: The Alarm instance, or any object with the same fields.
+    - timestamps, values, start, end: The datapoints and range, see `aggregate`.
+    - thresholds: Thresholds to try instead of `alarm.threshold`.
+
+    Returns:
+    - ndarray: The states after every period, see `evaluate`.
+    """
+
+    series = aggregate(timestamps, values, start, end, alarm.period, alarm.statistic)
+    return evaluate(series, alarm.comparison_operator,
+                    alarm.threshold if thresholds is None else thresholds,
+                    alarm.evaluation_periods, alarm.treat_missing_data)
+
+
+def backtest(alarm, timestamps, values, start, end, thresholds):
+    """
+    Summarize how an Alarm would have behaved with each of `thresholds`.
+
+    Returns:
+    - Backtest: Per threshold, the number of transitions into ALARM and the
+      number of periods spent in ALARM and in INSUFFICIENT_DATA.
+    """
+
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+    states = evaluate_alarm(alarm, timestamps, values, start, end, thresholds)
+
+    in_alarm = states == STATE_ALARM
+    entered = in_alarm[:, 1:] & ~in_alarm[:, :-1]
+    return Backtest(
+        thresholds=thresholds,
+        alarms=entered.sum(axis=1) + in_alarm[:, 0],
+        alarm_periods=in_alarm.sum(axis=1),
+        insufficient_periods=(states == STATE_INSUFFICIENT_DATA).sum(axis=1),
+    )
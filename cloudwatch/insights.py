@@ -0,0 +1,479 @@
+"""
+Async CloudWatch Logs Insights queries.
+
+`run_query` starts a query and awaits its results without holding a thread:
+boto3 calls run in the thread pool through `sync_to_async`, and the waits
+between GetQueryResults polls are `asyncio.sleep` calls, so one ASGI worker
+can serve many queries in flight. Polling starts fast and backs off while the
+query is still scheduled or running. A query that times out or whose task is
+cancelled is stopped with StopQuery, so it does not keep using the account's
+concurrent query quota.
+
+`fan_out` runs one query over many log groups, e.g. the `/aws/lambda/<fn>`
+groups of Dimension rows, packing MAX_LOG_GROUPS groups per query and
+running the queries concurrently under INSIGHTS_MAX_CONCURRENT_QUERIES. Results
+are yielded as each query completes.
+
+`sliced_query` splits a long time range into sub-ranges queried in
+parallel, halving any sub-range that hits the RESULT_LIMIT cap, and yields
+the rows of all sub-ranges in @timestamp order.
+
+`QueryCache` keeps recent results in memory, with a TTL and a size cap, and
+makes identical concurrent requests share one query.
+"""
+import asyncio
+import concurrent.futures
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+from .arn import parse_arn
+from .batch import chunked
+from .clients import get_client
+
+RESULT_LIMIT = 10000
+MAX_LOG_GROUPS = 50
+RUNNING_STATUSES = {'Scheduled', 'Running'}
+# Quoted strings and regexes, kept as they are, or a run of whitespace.
+QUERY_TOKEN_PATTERN = re.compile(
+    r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|`[^`]*`|/(?:[^/\\]|\\.)*/)|\s+')
+
+QueryResult = namedtuple('QueryResult', ['query_id', 'status', 'rows', 'statistics'])
+
+
+class InsightsQueryError(Exception):
+    """
+    Raised when an Insights query fails, is cancelled or times out in AWS.
+    """
+
+
+class InsightsTimeout(InsightsQueryError):
+    """
+    Raised when an Insights query does not complete within its timeout.
+    """
+
+
+def parse_rows(results):
+    """
+    Turn GetQueryResults rows into dicts of field to value.
+
+    The '@ptr' field, an opaque pointer to the log record, is dropped.
+    """
+
+    return [{field['field']: field.get('value') for field in row if field['field'] != '@ptr'}
+            for row in results]
+
+
+def _call(method, region, **kwargs):
+    return getattr(get_client('logs', region), method)(**kwargs)
+
+
+async def call_logs(method, region=None, **kwargs):
+    """
+    Call a CloudWatch Logs client method from the thread pool.
+    """
+
+    return await sync_to_async(_call, thread_sensitive=False)(method, region, **kwargs)
+
+
+async def stop_query(query_id, region=None):
+    """
+    Stop a running query, ignoring queries that already finished.
+    """
+
+    try:
+        await call_logs('stop_query', region, queryId=query_id)
+    except ClientError:
+        pass
+
+
+async def run_query(log_groups, query_string, start, end, limit=None, timeout=60,
+                    poll_interval=0.5, max_poll_interval=5, region=None):
+    """
+    Run a Logs Insights query and return its results.
+
+    Parameters:
+    - log_groups: Names of the log groups to query.
+    - query_string: The Insights query.
+    - start, end: Epoch seconds of the time range.
+    - limit: Maximum rows to return, at most RESULT_LIMIT.
+    - timeout: Seconds to wait for the query before stopping it.
+    - poll_interval: Seconds before the first poll. The interval grows by
+      half after every poll that finds the query still running.
+    - max_poll_interval: Upper bound of the poll interval.
+    - region: The AWS region of the log groups.
+
+    Returns:
+    - QueryResult: The query id, final status, rows as dicts and statistics.
+
+    Raises:
+    - InsightsTimeout: If the query did not complete within `timeout`.
+    - InsightsQueryError: If the query failed or was cancelled in AWS, or
+      AWS refused a call, e.g. for a log group that does not exist.
+    """
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    kwargs = {'logGroupNames': list(log_groups), 'queryString': query_string,
+              'startTime': int(start), 'endTime': int(end)}
+    if limit:
+        kwargs['limit'] = min(limit, RESULT_LIMIT)
+    try:
+        query_id = (await call_logs('start_query', region, **kwargs))['queryId']
+    except ClientError as error:
+        raise InsightsQueryError(f'Query could not start: {error}') from error
+
+    delay = poll_interval
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                await stop_query(query_id, region)
+                raise InsightsTimeout(f'Query {query_id} did not complete in {timeout}s.')
+            await asyncio.sleep(min(delay, remaining))
+
+            try:
+                response = await call_logs('get_query_results', region, queryId=query_id)
+            except ClientError as error:
+                await stop_query(query_id, region)
+                raise InsightsQueryError(
+                    f'Results of query {query_id} could not be read: {error}') from error
+            status = response['status']
+            if status == 'Complete':
+                return QueryResult(query_id, status, parse_rows(response.get('results', [])),
+                                   response.get('statistics', {}))
+            if status not in RUNNING_STATUSES:
+                raise InsightsQueryError(f'Query {query_id} ended with status {status}.')
+            delay = min(delay * 1.5, max_poll_interval)
+    except asyncio.CancelledError:
+        await asyncio.shield(stop_query(query_id, region))
+        raise
+
+
+def lambda_log_group(dimension):
+    """
+    Return the (region, log group) of the Lambda function of a Dimension.
+
+    The function name is taken from the ARN in `value`, dropping any version
+    or alias qualifier. Values that are not ARNs are used as the function
+    name, in the default region. ARNs of other services have no Lambda log
+    group, and None is returned for them.
+    """
+
+    try:
+        arn = parse_arn(dimension.value)
+    except ValueError:
+        return None, f'/aws/lambda/{dimension.value}'
+    if arn.service != 'lambda':
+        return None
+    name = arn.resource.split(':')[1] if arn.resource.startswith('function:') else arn.resource
+    return arn.region or None, f'/aws/lambda/{name}'
+
+
+def dimension_log_groups(dimensions):
+    """
+    Group the Lambda log groups of Dimension rows by region.
+
+    Dimensions whose ARN is not a Lambda ARN are left out.
+
+    Returns:
+    - dict: Region (None for the default region) to a sorted list of log groups.
+    """
+
+    groups = {}
+    for dimension in dimensions:
+        location = lambda_log_group(dimension)
+        if location is None:
+            continue
+        region, log_group = location
+        groups.setdefault(region, set()).add(log_group)
+    return {region: sorted(log_groups) for region, log_groups in groups.items()}
+
+
+async def fan_out(log_groups, query_string, start, end, concurrency=None, cache=None,
+                  return_exceptions=False, **kwargs):
+    """
+    Run a query over many log groups and yield results as queries complete.
+
+    Log groups are packed MAX_LOG_GROUPS per query. At most `concurrency`
+    queries run at once. If the consumer stops early or a query fails, the
+    queries still running are cancelled and stopped. With
+    `return_exceptions`, a failed query is yielded with its
+    InsightsQueryError instead, and the other queries go on.
+
+    Parameters:
+    - log_groups: Dict of region to log group names, see `dimension_log_groups`.
+    - query_string, start, end: The query and its range, see `run_query`.
+    - concurrency: Maximum queries in flight. Defaults to the
+      INSIGHTS_MAX_CONCURRENT_QUERIES setting.
+    - cache: A QueryCache to read results from, if any.
+    - return_exceptions: Yield the errors of failed queries instead of raising them.
+    - kwargs: Passed to `run_query`.
+
+    Yields:
+    - tuple: The log groups of a query and its QueryResult, or its
+      InsightsQueryError with `return_exceptions`.
+    """
+
+    semaphore = asyncio.Semaphore(
+        concurrency or getattr(settings, 'INSIGHTS_MAX_CONCURRENT_QUERIES', 10))
+    query = cache.run if cache is not None else run_query
+
+    async def run(region, chunk):
+        async with semaphore:
+            try:
+                return chunk, await query(chunk, query_string, start, end,
+                                          region=region, **kwargs)
+            except InsightsQueryError as error:
+                if not return_exceptions:
+                    raise
+                return chunk, error
+
+    tasks = [asyncio.ensure_future(run(region, chunk))
+             for region, groups in log_groups.items()
+             for chunk in chunked(groups, MAX_LOG_GROUPS)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def row_timestamp(row):
+    """
+    Return the epoch seconds of the '@timestamp' field of a result row.
+    """
+
+    value = datetime.strptime(row['@timestamp'], '%Y-%m-%d %H:%M:%S.%f')
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+async def sliced_query(log_groups, query_string, start, end, slice_seconds=None,
+                       concurrency=None, region=None, **kwargs):
+    """
+    Run a query over a long time range in parallel slices, in time order.
+
+    The range is split into slices of `slice_seconds`, queried concurrently.
+    A slice returning RESULT_LIMIT rows may be truncated, so it is split in
+    half and queried again, until every slice is complete. Slices do not
+    overlap, so the rows are yielded slice after slice, each sorted by
+    @timestamp, as soon as all earlier slices are done.
+
+    The query must return the @timestamp field and should not sort or limit
+    the rows itself.
+
+    Parameters:
+    - log_groups: Names of the log groups to query.
+    - query_string: The Insights query.
+    - start, end: Epoch seconds of the time range, end excluded.
+    - slice_seconds: Length of the initial slices. Defaults to splitting the
+      range in twice as many slices as queries may run at once.
+    - concurrency: Maximum queries in flight. Defaults to the
+      INSIGHTS_MAX_CONCURRENT_QUERIES setting.
+    - region: The AWS region of the log groups.
+    - kwargs: Passed to `run_query`.
+
+    Yields:
+    - dict: Result rows in ascending @timestamp order.
+
+    Raises:
+    - InsightsQueryError: If a single second holds more than RESULT_LIMIT rows.
+    """
+
+    concurrency = concurrency or getattr(settings, 'INSIGHTS_MAX_CONCURRENT_QUERIES', 10)
+    semaphore = asyncio.Semaphore(concurrency)
+    start, end = int(start), int(end)
+    if not slice_seconds:
+        slice_seconds = max(-(-(end - start) // (2 * concurrency)), 60)
+
+    async def run(slice_start, slice_end):
+        async with semaphore:
+            result = await run_query(log_groups, query_string, slice_start, slice_end,
+                                     limit=RESULT_LIMIT, region=region, **kwargs)
+        if len(result.rows) >= RESULT_LIMIT:
+            if slice_end - slice_start <= 1:
+                raise InsightsQueryError(
+                    f'More than {RESULT_LIMIT} rows at {slice_start}, results are incomplete.')
+            middle = (slice_start + slice_end) // 2
+            first, second = await asyncio.gather(run(slice_start, middle), run(middle, slice_end))
+            return first + second
+        # endTime is inclusive, so drop the rows of the next slice's first second.
+        rows = [(row_timestamp(row), row) for row in result.rows]
+        rows = [item for item in rows if slice_start <= item[0] < slice_end]
+        rows.sort(key=lambda item: item[0])
+        return [row for _, row in rows]
+
+    tasks = [asyncio.ensure_future(run(slice_start, min(slice_start + slice_seconds, end)))
+             for slice_start in range(start, end, slice_seconds)]
+    try:
+        for task in tasks:
+            for row in await task:
+                yield row
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def normalize_query(query_string):
+    """
+    Return `query_string` with each run of whitespace outside quoted strings
+    and regexes replaced by one space, and leading and trailing whitespace removed.
+    """
+
+    return QUERY_TOKEN_PATTERN.sub(
+        lambda match: match.group(1) or ' ', query_string).strip()
+
+
+class QueryCache:
+    """
+    In-memory LRU cache of query results, with single-flight.
+
+    Results are keyed by region, log groups, query string with the
+    whitespace outside its quoted strings normalized, result limit, and the
+    time range widened to whole buckets of
+    `bucket_seconds`, so requests made within the same bucket share a
+    result. Entries expire after `ttl` seconds, and the least recently used
+    entries are evicted when the results exceed `max_bytes`, as measured by
+    the size of their JSON.
+
+    A request for a key that is already being queried waits for that query
+    instead of starting another one. If the query fails, every waiter gets
+    its error; a cancelled query is reported as InsightsQueryError.
+
+    The cache can be shared by threads and event loops.
+
+    Parameters:
+    - ttl: Seconds a result stays valid.
+    - max_bytes: Upper bound of the cached results size.
+    - bucket_seconds: Granularity of the cached time ranges.
+    - clock: Function returning the current time in seconds.
+    """
+
+    def __init__(self, ttl=60, max_bytes=64 * 1024 * 1024, bucket_seconds=60,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self.size = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def window(self, start, end):
+        """
+        Return the (start, end) range widened to whole buckets.
+        """
+
+        bucket = self.bucket_seconds
+        return int(start) // bucket * bucket, -(-int(end) // bucket) * bucket
+
+    def key(self, log_groups, query_string, start, end, region=None, limit=None):
+        """
+        Return the cache key of a query.
+        """
+
+        return (region, tuple(sorted(set(log_groups))), normalize_query(query_string), limit,
+                *self.window(start, end))
+
+    def get(self, key):
+        """
+        Return the cached result of `key`, or None.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, result = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.size -= size
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        """
+        Cache `result` under `key`, evicting the least recently used entries.
+        """
+
+        size = len(json.dumps(result.rows, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (self.clock() + self.ttl, size, result)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    async def run(self, log_groups, query_string, start, end, region=None, **kwargs):
+        """
+        Return the result of a query from the cache, a query in flight, or a new query.
+
+        Parameters are those of `run_query`. The query runs over the
+        bucket-aligned range.
+        """
+
+        key = self.key(log_groups, query_string, start, end, region, kwargs.get('limit'))
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = concurrent.futures.Future()
+        if not leader:
+            # Shielded, so a waiter giving up does not cancel the shared query.
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            result = await run_query(log_groups, query_string, *self.window(start, end),
+                                     region=region, **kwargs)
+        except BaseException as error:
+            with self._lock:
+                del self._in_flight[key]
+            if not isinstance(error, Exception):
+                error = InsightsQueryError('The shared query was cancelled.')
+            future.set_exception(error)
+            raise
+
+        self.put(key, result)
+        with self._lock:
+            del self._in_flight[key]
+        future.set_result(result)
+        return result
+
+
+_cache = None
+
+
+def get_query_cache():
+    """
+    Return the process-wide QueryCache built from the `INSIGHTS_CACHE` setting.
+    """
+
+    global _cache  # pylint: disable=global-statement
+    if _cache is None:
+        config = getattr(settings, 'INSIGHTS_CACHE', {})
+        _cache = QueryCache(ttl=config.get('TTL', 60),
+                            max_bytes=config.get('MAX_BYTES', 64 * 1024 * 1024),
+                            bucket_seconds=config.get('BUCKET_SECONDS', 60))
+    return _cache
@@ -0,0 +1,44 @@
+"""
+Collect the metrics behind Alarm rows into the local metric store.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from cloudwatch.collector import alarm_metrics, collect_metrics
+from cloudwatch.models import Alarm
+
+
+class Command(BaseCommand):
+    """
+    Fetch new one-minute datapoints of every alarm metric with GetMetricData.
+
+    Each metric resumes shortly before the end of its last collected window,
+    so the command can run from cron as often as needed. Metrics never
+    collected are fetched from --lookback seconds ago.
+
+    Example:
+        python manage.py collect_metrics --lookback 86400 --namespace AWS/Lambda
+    """
+
+    help = 'Store datapoints of alarm metrics fetched with GetMetricData.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lookback', type=int, default=3 * 3600,
+                            help='Seconds to fetch for metrics collected for the first time.')
+        parser.add_argument('--namespace', action='append', default=[],
+                            help='Only collect metrics in this namespace. Can be repeated.')
+        parser.add_argument('--include-inactive', action='store_true',
+                            help='Also collect metrics of alarms where is_active is False.')
+
+    def handle(self, *args, **options):
+        queryset = Alarm.objects.all()
+        if not options['include_inactive']:
+            queryset = queryset.filter(is_active=True)
+        if options['namespace']:
+            queryset = queryset.filter(namespace__in=options['namespace'])
+
+        stats = collect_metrics(alarm_metrics(queryset), int(time.time()), options['lookback'])
+        self.stdout.write(
+            'Collected {datapoints} datapoints of {metrics} metrics '
+            'with {calls} calls.'.format(**stats))
@@ -0,0 +1,75 @@
+"""
+Discover AWS Lambda functions and store them as Dimension rows.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from cloudwatch.discovery import CHUNK_SIZE, discover_lambda_functions
+from cloudwatch.models import Dimension, DiscoveryCheckpoint
+
+
+class Command(BaseCommand):
+    """
+    List Lambda functions per region in parallel and upsert Dimension rows.
+
+    Only new functions and functions with a new LastModified are written.
+    Regions listed less than --max-age seconds ago, by default the
+    AWS_DISCOVERY_MAX_AGE setting, are skipped unless --force is given.
+
+    Example:
+        python manage.py discover_lambdas --region ap-southeast-2 --region us-east-1
+    """
+
+    help = 'Create or update Dimension rows for AWS Lambda functions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', action='append', default=[],
+                            help='Region to list. Can be repeated. Defaults to the '
+                                 'AWS_DISCOVERY_REGIONS setting.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Functions written per upsert.')
+        parser.add_argument('--max-age', type=int,
+                            default=getattr(settings, 'AWS_DISCOVERY_MAX_AGE', 3600),
+                            help='Skip regions discovered less than this many seconds ago.')
+        parser.add_argument('--force', action='store_true',
+                            help='List every region, however recently it was discovered.')
+
+    def handle(self, *args, **options):
+        regions = options['region'] or list(getattr(settings, 'AWS_DISCOVERY_REGIONS', []))
+        if not regions:
+            raise CommandError('No region given. Use --region or AWS_DISCOVERY_REGIONS.')
+
+        previous = {checkpoint.region: checkpoint
+                    for checkpoint in DiscoveryCheckpoint.objects.filter(
+                        source=Dimension.SOURCE_LAMBDA, region__in=regions)}
+        if options['max_age'] and not options['force']:
+            fresh_after = timezone.now() - timedelta(seconds=options['max_age'])
+            for region in [region for region in regions
+                           if region in previous and previous[region].completed_at > fresh_after]:
+                self.stdout.write(f'{region}: skipped, discovered at {previous[region].completed_at}.')
+                regions.remove(region)
+        if not regions:
+            return
+
+        stats = discover_lambda_functions(regions, options['chunk_size'])
+
+        failed = False
+        for region, counts in stats.items():
+            if counts['error'] is not None:
+                failed = True
+                self.stderr.write(f'{region}: {counts["error"]}')
+                continue
+            checkpoint = DiscoveryCheckpoint.objects.get(
+                source=Dimension.SOURCE_LAMBDA, region=region)
+            unchanged = (region in previous
+                         and previous[region].listing_hash == checkpoint.listing_hash)
+            self.stdout.write(
+                f'{region}: {counts["created"]} created, {counts["updated"]} updated, '
+                f'{counts["unchanged"]} unchanged, {counts["skipped"]} skipped (name taken)'
+                f'{" (listing unchanged since last run)" if unchanged else ""}.')
+
+        if failed:
+            raise CommandError('Discovery failed for some regions.')
@@ -0,0 +1,47 @@
+"""
+Drain the AlarmOutbox and push queued alarms to AWS CloudWatch.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from cloudwatch.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    """
+    Worker that pushes queued alarms to CloudWatch in batches.
+
+    Runs until interrupted, sleeping when the outbox is empty. Use --once to
+    process a single batch, e.g. from cron.
+
+    Example:
+        python manage.py process_alarm_outbox --batch-size 200
+    """
+
+    help = 'Push alarms queued in the outbox to AWS CloudWatch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of outbox rows claimed per batch.')
+        parser.add_argument('--max-attempts', type=int, default=8,
+                            help='Failed pushes before a row is dead-lettered.')
+        parser.add_argument('--idle-sleep', type=float, default=2.0,
+                            help='Seconds to wait when there is nothing to do.')
+        parser.add_argument('--once', action='store_true',
+                            help='Process one batch and exit.')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                stats = drain_outbox(options['batch_size'], options['max_attempts'])
+                if any(stats.values()):
+                    self.stdout.write(
+                        'Pushed {pushed}, unchanged {unchanged}, '
+                        'retried {retried}, dead {dead}.'.format(**stats))
+                if options['once']:
+                    return
+                if not any(stats.values()):
+                    time.sleep(options['idle_sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
@@ -0,0 +1,77 @@
+"""
+Report, and optionally fix, drift between Alarm rows and CloudWatch.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cloudwatch.batch import BATCH_SIZE, chunked
+from cloudwatch.clients import get_client
+from cloudwatch.models import Alarm
+from cloudwatch.payloads import alarm_fingerprint, record_pushed
+from cloudwatch.reconcile import (DRIFTED, EXTRA, MISSING, build_desired_state,
+                                  iter_remote_alarms, reconcile)
+
+
+class Command(BaseCommand):
+    """
+    Compare every Alarm with the CloudWatch alarm of the same name.
+
+    Missing and drifted alarms can be pushed again with --fix. Alarms that
+    only exist in CloudWatch are deleted with --delete-extra, in batches of
+    100 names per DeleteAlarms call, once the whole listing was read.
+    --delete-extra requires --prefix, so alarms owned by other tools, like
+    autoscaling, are never deleted.
+
+    Example:
+        python manage.py reconcile_alarms --prefix orivet- --fix
+    """
+
+    help = 'Find missing, extra and drifted CloudWatch alarms.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default=None,
+                            help='Only reconcile alarms whose name starts with this prefix.')
+        parser.add_argument('--fix', action='store_true',
+                            help='Push missing and drifted alarms.')
+        parser.add_argument('--delete-extra', action='store_true',
+                            help='Delete CloudWatch alarms under --prefix that have no Alarm row.')
+        parser.add_argument('--page-size', type=int, default=100,
+                            help='Alarms per DescribeAlarms page.')
+
+    def handle(self, *args, **options):
+        if options['delete_extra'] and not options['prefix']:
+            raise CommandError('--delete-extra requires --prefix.')
+        started = time.monotonic()
+        queryset = Alarm.objects.all()
+        if options['prefix']:
+            queryset = queryset.filter(name__startswith=options['prefix'])
+
+        desired, duplicates = build_desired_state(queryset)
+        for name in duplicates:
+            self.stderr.write(f'Alarm name used more than once: {name}')
+
+        client = get_client('cloudwatch')
+        remote = iter_remote_alarms(client, options['prefix'], options['page_size'])
+        counts = {MISSING: 0, EXTRA: 0, DRIFTED: 0}
+        pushed = []
+        extra = []
+
+        for kind, name, alarm, payload, fields in reconcile(desired, remote, options['prefix']):
+            counts[kind] += 1
+            detail = f': {", ".join(fields)}' if fields else ''
+            self.stdout.write(f'{kind} {name}{detail}')
+
+            if kind == EXTRA and options['delete_extra']:
+                extra.append(name)
+            elif kind != EXTRA and options['fix']:
+                client.put_metric_alarm(**payload)
+                pushed.append((alarm, alarm_fingerprint(payload)))
+
+        for names in chunked(extra, BATCH_SIZE):
+            client.delete_alarms(AlarmNames=names)
+        record_pushed(pushed)
+
+        self.stdout.write(
+            f'{len(desired)} alarms checked in {time.monotonic() - started:.2f}s: '
+            f'{counts[MISSING]} missing, {counts[EXTRA]} extra, {counts[DRIFTED]} drifted.')
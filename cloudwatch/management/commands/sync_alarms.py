@@ -0,0 +1,104 @@
+"""
+Push Alarm rows to AWS CloudWatch in bulk.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cloudwatch.clients import get_client
+from cloudwatch.models import Alarm
+from cloudwatch.payloads import alarm_fingerprint, compile_alarm_payloads, record_pushed
+
+
+class Command(BaseCommand):
+    """
+    Re-create CloudWatch alarms for every active Alarm.
+
+    Payloads are compiled in a fixed number of queries and sent with
+    `put_metric_alarm` through a bounded thread pool. Alarms whose payload
+    matches the fingerprint of their last push are skipped unless --force is given.
+
+    Example:
+        python manage.py sync_alarms --concurrency 16 --namespace AWS/Lambda
+    """
+
+    help = 'Push active alarms to AWS CloudWatch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Number of parallel put_metric_alarm calls.')
+        parser.add_argument('--namespace', action='append', default=[],
+                            help='Only sync alarms in this namespace. Can be repeated.')
+        parser.add_argument('--alarm-id', action='append', type=int, default=[],
+                            help='Only sync this alarm id. Can be repeated.')
+        parser.add_argument('--include-inactive', action='store_true',
+                            help='Also sync alarms where is_active is False.')
+        parser.add_argument('--force', action='store_true',
+                            help='Push alarms even if their fingerprint did not change.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Compile payloads without calling AWS.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1.')
+
+        queryset = Alarm.objects.order_by('alarm_id')
+        if not options['include_inactive']:
+            queryset = queryset.filter(is_active=True)
+        if options['namespace']:
+            queryset = queryset.filter(namespace__in=options['namespace'])
+        if options['alarm_id']:
+            queryset = queryset.filter(alarm_id__in=options['alarm_id'])
+
+        started = time.monotonic()
+        payloads = []
+        skipped = 0
+        for alarm, payload in compile_alarm_payloads(queryset):
+            fingerprint = alarm_fingerprint(payload)
+            if not options['force'] and fingerprint == alarm.fingerprint:
+                skipped += 1
+                continue
+            payloads.append((alarm, payload, fingerprint))
+        compiled = time.monotonic()
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'Compiled {len(payloads)} alarms in {compiled - started:.2f}s, '
+                f'{skipped} unchanged (dry run).')
+            return
+
+        pushed = []
+        failures = []
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            futures = {
+                executor.submit(self.push, payload): (alarm, fingerprint)
+                for alarm, payload, fingerprint in payloads
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    pushed.append(futures[future])
+                except Exception as error:  # pylint: disable=broad-except
+                    failures.append((futures[future][0], error))
+
+        record_pushed(pushed)
+        finished = time.monotonic()
+
+        for alarm, error in failures:
+            self.stderr.write(f'Alarm {alarm.pk} ({alarm.name}): {error}')
+
+        self.stdout.write(
+            f'Synced {len(payloads) - len(failures)}/{len(payloads)} alarms '
+            f'({len(failures)} failed, {skipped} unchanged). Compile {compiled - started:.2f}s, '
+            f'push {finished - compiled:.2f}s.')
+        if failures:
+            raise CommandError(f'{len(failures)} alarms failed to sync.')
+
+    @staticmethod
+    def push(payload):
+        """
+        Send one payload with the client of the current worker thread.
+        """
+        get_client('cloudwatch').put_metric_alarm(**payload)
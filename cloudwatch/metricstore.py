@@ -0,0 +1,292 @@
+"""
+Compact on-disk store for metric time series, with rollup tiers.
+
+Every metric (namespace, metric name and dimensions) has a directory named
+after a hash of its identity. It holds a `meta.json` file with the identity,
+the last stored timestamp and the collection watermark, and a sub-directory
+per resolution in
+RESOLUTIONS. Each resolution is split into files covering PARTITIONS
+seconds, e.g. one file per UTC day for one-minute rows. A file is a sorted
+NumPy structured array of ROW_DTYPE rows holding the sum, sample count,
+minimum and maximum of each period, so any statistic can be derived from it.
+
+Rows are appended at one-minute resolution. The rollup tiers are updated
+incrementally: only the coarser periods touched by the new rows are
+recomputed, each tier from the one below it. Queries read the coarsest tier
+that is at least as fine as the requested resolution, so a 30-day chart
+reads hourly rows instead of 43,200 minutes.
+
+Time-range reads only open the files overlapping the range, which are found
+from their names, and slice them with a binary search.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+MINUTE = 60
+DAY = 86400
+RESOLUTIONS = [MINUTE, 5 * MINUTE, 3600, DAY]
+PARTITIONS = {
+    MINUTE: DAY,
+    5 * MINUTE: 7 * DAY,
+    3600: 90 * DAY,
+    DAY: 3650 * DAY,
+}
+ROW_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('sum', '<f8'),
+    ('count', '<f8'),
+    ('min', '<f8'),
+    ('max', '<f8'),
+])
+
+
+def metric_key(namespace, metric_name, dimensions):
+    """
+    Return the directory name of a metric.
+
+    Parameters:
+    - namespace: The CloudWatch namespace.
+    - metric_name: The metric name.
+    - dimensions: Iterable of (name, value) pairs.
+
+    Returns:
+    - str: A hex digest identifying the metric.
+    """
+
+    identity = json.dumps([namespace, metric_name, sorted(map(list, dimensions))])
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def _write_atomic(path, write):
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as handle:
+        write(handle)
+    os.replace(tmp, path)
+
+
+class MetricStore:
+    """
+    Read and append metric rows under a root directory.
+
+    Parameters:
+    - root: The directory of the store. Defaults to the METRIC_STORE_PATH setting.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.METRIC_STORE_PATH)
+
+    def metric_dir(self, key):
+        """
+        Return the directory of the metric `key`.
+        """
+
+        return self.root / key
+
+    def meta(self, key):
+        """
+        Return the meta data of the metric `key`, or an empty dict.
+        """
+
+        try:
+            with open(self.metric_dir(key) / 'meta.json', encoding='utf-8') as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+
+    def last_timestamp(self, key):
+        """
+        Return the epoch seconds of the last stored row of `key`, or None.
+        """
+
+        return self.meta(key).get('last_timestamp')
+
+    def watermark(self, key):
+        """
+        Return the epoch seconds up to which `key` was collected, or None.
+
+        Unlike `last_timestamp`, it moves when a fetch returned no rows.
+        """
+
+        return self.meta(key).get('collected_until')
+
+    def partitions(self, key, resolution=MINUTE):
+        """
+        Return the sorted partition numbers (epoch seconds // span) of a tier.
+        """
+
+        directory = self.metric_dir(key) / str(resolution)
+        if not directory.is_dir():
+            return []
+        return sorted(int(path.stem) for path in directory.glob('*.npy'))
+
+    def partition_path(self, key, resolution, partition):
+        """
+        Return the file holding the rows of `key` for a partition of a tier.
+        """
+
+        return self.metric_dir(key) / str(resolution) / f'{partition}.npy'
+
+    def append(self, key, rows, identity=None, collected_until=None):
+        """
+        Merge one-minute rows into `key` and update its rollup tiers.
+
+        Rows replace stored rows with the same timestamp, so writing the same
+        minute twice is harmless.
+
+        Parameters:
+        - key: The metric key, see `metric_key`.
+        - rows: A ROW_DTYPE array.
+        - identity: Dict describing the metric, stored in meta.json.
+        - collected_until: Epoch seconds the rows were fetched up to, which
+          moves the watermark forward even when `rows` is empty.
+        """
+
+        rows = np.asarray(rows, dtype=ROW_DTYPE)
+        self.metric_dir(key).mkdir(parents=True, exist_ok=True)
+
+        meta = self.meta(key)
+        if identity:
+            meta.update(identity)
+        if collected_until is not None:
+            meta['collected_until'] = max(int(collected_until), meta.get('collected_until') or 0)
+
+        if len(rows):
+            meta['last_timestamp'] = max(int(rows['timestamp'].max()),
+                                         meta.get('last_timestamp') or 0)
+            self.write(key, MINUTE, rows)
+            for finer, resolution in zip(RESOLUTIONS, RESOLUTIONS[1:]):
+                # Recompute every coarser period touched by the new rows.
+                first = rows['timestamp'].min() // resolution * resolution
+                last = rows['timestamp'].max() // resolution * resolution + resolution
+                rows = rollup(self.read(key, first, last, finer), resolution)
+                self.write(key, resolution, rows)
+        _write_atomic(self.metric_dir(key) / 'meta.json',
+                      lambda handle: handle.write(json.dumps(meta).encode('utf-8')))
+
+    def write(self, key, resolution, rows):
+        """
+        Merge rows into the partition files of a tier.
+        """
+
+        span = PARTITIONS[resolution]
+        partitions = rows['timestamp'] // span
+        for partition in np.unique(partitions):
+            merged = rows[partitions == partition]
+            path = self.partition_path(key, resolution, int(partition))
+            if path.exists():
+                merged = np.concatenate([merged, np.load(path)])
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+            # np.unique keeps the first occurrence, i.e. the new row.
+            _, first = np.unique(merged['timestamp'], return_index=True)
+            merged = merged[first]
+            _write_atomic(path, lambda handle, data=merged: np.save(handle, data))
+
+    def read(self, key, start, end, resolution=MINUTE):
+        """
+        Return the rows of a tier of `key` with start <= timestamp < end.
+
+        Parameters:
+        - key: The metric key.
+        - start, end: Epoch seconds.
+        - resolution: One of RESOLUTIONS.
+
+        Returns:
+        - ndarray: A sorted ROW_DTYPE array.
+        """
+
+        span = PARTITIONS[resolution]
+        parts = []
+        for partition in self.partitions(key, resolution):
+            if partition < start // span or partition > (end - 1) // span:
+                continue
+            rows = np.load(self.partition_path(key, resolution, partition))
+            low, high = np.searchsorted(rows['timestamp'], [start, end])
+            parts.append(rows[low:high])
+        if not parts:
+            return np.empty(0, dtype=ROW_DTYPE)
+        return np.concatenate(parts)
+
+    def query(self, key, start, end, resolution=None, max_points=None):
+        """
+        Return the rows of `key` between start and end at a given resolution.
+
+        The coarsest stored tier that is not coarser than the resolution is
+        read, and rolled up further when the resolution falls between tiers.
+
+        Parameters:
+        - key: The metric key.
+        - start, end: Epoch seconds.
+        - resolution: Seconds per returned row. Defaults to the resolution
+          giving at most `max_points` rows, or one minute.
+        - max_points: Maximum number of rows wanted, e.g. the chart width.
+
+        Returns:
+        - tuple: The resolution of the rows and a sorted ROW_DTYPE array.
+        """
+
+        if resolution is None:
+            resolution = -(-(end - start) // max_points) if max_points else MINUTE
+        resolution = max(int(resolution), MINUTE)
+        tier = pick_resolution(resolution)
+
+        rows = self.read(key, start, end, tier)
+        if resolution != tier:
+            rows = rollup(rows, resolution)
+        return resolution, rows
+
+
+def pick_resolution(resolution):
+    """
+    Return the coarsest tier in RESOLUTIONS that is at most `resolution`.
+    """
+
+    return max(tier for tier in RESOLUTIONS if tier <= max(resolution, MINUTE))
+
+
+def rollup(rows, resolution):
+    """
+    Aggregate sorted rows into periods of `resolution` seconds.
+
+    Sums and counts are added, minimums and maximums combined, ignoring
+    statistics that are NaN.
+
+    Returns:
+    - ndarray: One ROW_DTYPE row per period that has rows.
+    """
+
+    if not len(rows):
+        return np.empty(0, dtype=ROW_DTYPE)
+
+    periods = rows['timestamp'] // resolution * resolution
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+
+    result = np.zeros(len(starts), dtype=ROW_DTYPE)
+    result['timestamp'] = periods[starts]
+    for column in ('sum', 'count'):
+        result[column] = np.add.reduceat(np.nan_to_num(rows[column]), starts)
+    result['min'] = np.fmin.reduceat(rows['min'], starts)
+    result['max'] = np.fmax.reduceat(rows['max'], starts)
+    return result
+
+
+def to_epoch(value):
+    """
+    Return the epoch seconds of an aware datetime.
+    """
+
+    return int(value.timestamp())
+
+
+def from_epoch(value):
+    """
+    Return the aware UTC datetime of epoch seconds.
+    """
+
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc)
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cloudwatch", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="alarm",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="alarm",
+            name="pushed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
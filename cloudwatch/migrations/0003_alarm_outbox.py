@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cloudwatch", "0002_alarm_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlarmOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("PENDING", "PENDING"), ("DEAD", "DEAD")],
+                        default="PENDING",
+                        max_length=55,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "alarm",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outbox",
+                        to="cloudwatch.alarm",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "cloudwatch_alarm_outbox",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"],
+                        name="cloudwatch__status_61729a_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cloudwatch", "0003_alarm_outbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateLimitBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, unique=True)),
+                ("tokens", models.FloatField()),
+                ("rate", models.FloatField()),
+                ("updated_at", models.FloatField()),
+            ],
+            options={
+                "db_table": "cloudwatch_rate_limit_bucket",
+            },
+        ),
+    ]
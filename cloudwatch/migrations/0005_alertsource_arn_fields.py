@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+ARN_FIELDS = ["partition", "service", "region", "account_id", "resource"]
+
+
+def parse_arn(value):
+    """
+    Split an ARN into its components.
+
+    A copy of cloudwatch.arn.parse_arn at the time of this migration, so
+    later changes to it do not change what the migration does.
+    """
+    parts = value.split(":", 5)
+    if len(parts) != 6 or parts[0] != "arn":
+        raise ValueError(f"Invalid AWS ARN: {value}")
+    return parts[1:]
+
+
+def backfill_arn_fields(apps, schema_editor):
+    """
+    Parse the ARN of existing AlertSource rows in batches.
+    """
+    AlertSource = apps.get_model("cloudwatch", "AlertSource")
+    batch = []
+    for source in AlertSource.objects.only("arn_id", "value").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        try:
+            arn = parse_arn(source.value)
+        except ValueError:
+            continue
+        for field, value in zip(ARN_FIELDS, arn):
+            setattr(source, field, value)
+        batch.append(source)
+        if len(batch) == BATCH_SIZE:
+            AlertSource.objects.bulk_update(batch, ARN_FIELDS)
+            batch = []
+    if batch:
+        AlertSource.objects.bulk_update(batch, ARN_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cloudwatch", "0004_rate_limit_bucket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="alertsource",
+            name="account_id",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="alertsource",
+            name="partition",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=32
+            ),
+        ),
+        migrations.AddField(
+            model_name="alertsource",
+            name="region",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=32
+            ),
+        ),
+        migrations.AddField(
+            model_name="alertsource",
+            name="resource",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="alertsource",
+            name="service",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+        migrations.RunPython(backfill_arn_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="alertsource",
+            index=models.Index(
+                fields=["account_id", "region", "service"],
+                name="cloudwatch__account_2fa3a3_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="alertsource",
+            index=models.Index(
+                fields=["service", "region"], name="cloudwatch__service_e44d0f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="alertsource",
+            index=models.Index(fields=["region"], name="cloudwatch__region_e816b0_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="alertsource",
+            index=models.Index(
+                fields=["resource"], name="cloudwatch__resourc_2abc73_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+import re
+
+from django.db import migrations, models
+
+TOKEN_MAX_LENGTH = 255
+SPLIT_PATTERN = re.compile(r"[^0-9A-Za-z]+")
+WORD_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+def tokenize(*values):
+    """
+    Split values into lowercase search tokens.
+
+    A copy of cloudwatch.autocomplete.tokenize at the time of this
+    migration, so later changes to it do not change what the migration does.
+    """
+    tokens = set()
+    for value in values:
+        if not value:
+            continue
+        if value.startswith("arn:"):
+            value = value.split(":", 5)[-1]
+        for segment in SPLIT_PATTERN.split(value):
+            if not segment:
+                continue
+            tokens.add(segment.lower()[:TOKEN_MAX_LENGTH])
+            words = [word.lower() for word in WORD_PATTERN.findall(segment)]
+            tokens.update(
+                "".join(words[start:])[:TOKEN_MAX_LENGTH] for start in range(len(words))
+            )
+    return tokens
+
+
+def build_index(apps, schema_editor):
+    """
+    Index the existing Dimension and AlertSource rows.
+    """
+    AutocompleteToken = apps.get_model("cloudwatch", "AutocompleteToken")
+    for kind, model_name in [
+        ("dimension", "Dimension"),
+        ("alertsource", "AlertSource"),
+    ]:
+        model = apps.get_model("cloudwatch", model_name)
+        tokens = []
+        for pk, name, value in model.objects.values_list(
+            "pk", "name", "value"
+        ).iterator(chunk_size=1000):
+            tokens.extend(
+                AutocompleteToken(kind=kind, object_id=pk, token=token)
+                for token in tokenize(name, value)
+            )
+            if len(tokens) >= 1000:
+                AutocompleteToken.objects.bulk_create(tokens)
+                tokens = []
+        AutocompleteToken.objects.bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cloudwatch", "0005_alertsource_arn_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AutocompleteToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("dimension", "dimension"),
+                            ("alertsource", "alertsource"),
+                        ],
+                        max_length=55,
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("token", models.CharField(max_length=255)),
+            ],
+            options={
+                "db_table": "cloudwatch_autocomplete_token",
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "token"], name="cloudwatch__kind_de38d6_idx"
+                    ),
+                    models.Index(
+                        fields=["kind", "object_id"], name="cloudwatch__kind_42ecdd_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
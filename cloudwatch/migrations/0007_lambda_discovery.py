@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cloudwatch", "0006_autocomplete_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dimension",
+            name="last_modified",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="dimension",
+            name="source",
+            field=models.CharField(
+                choices=[("manual", "manual"), ("lambda", "lambda")],
+                default="manual",
+                editable=False,
+                max_length=55,
+            ),
+        ),
+        migrations.CreateModel(
+            name="DiscoveryCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=55)),
+                ("region", models.CharField(max_length=32)),
+                ("completed_at", models.DateTimeField()),
+                ("resource_count", models.PositiveIntegerField(default=0)),
+                (
+                    "listing_hash",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+            ],
+            options={
+                "db_table": "cloudwatch_discovery_checkpoint",
+                "unique_together": {("source", "region")},
+            },
+        ),
+    ]
@@ -0,0 +1,195 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_alarm_dimensions(apps, schema_editor):
+    """
+    Keep the oldest link of each (alarm, dimension) pair before adding the constraint.
+    """
+    AlermDimension = apps.get_model("cloudwatch", "AlermDimension")
+    duplicates = (
+        AlermDimension.objects.values("alarm_id", "dimension_id")
+        .annotate(keep=Min("id"), links=Count("id"))
+        .filter(links__gt=1)
+    )
+    for duplicate in duplicates:
+        AlermDimension.objects.filter(
+            alarm_id=duplicate["alarm_id"], dimension_id=duplicate["dimension_id"]
+        ).exclude(id=duplicate["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cloudwatch", "0007_lambda_discovery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlarmTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                (
+                    "name_pattern",
+                    models.CharField(
+                        default="{dimension}-{metric_name}",
+                        help_text="Alarm name, ex: {dimension}-{metric_name}. Must contain {dimension}.",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "description",
+                    models.CharField(max_length=255),
+                ),
+                (
+                    "statistic",
+                    models.CharField(
+                        choices=[
+                            ("SampleCount", "SAMPLE_COUNT"),
+                            ("Sum", "SUM"),
+                            ("Average", "AVERAGE"),
+                            ("Minimum", "MINIMUM"),
+                            ("Maximum", "MAXIMUM"),
+                        ],
+                        max_length=55,
+                    ),
+                ),
+                ("threshold", models.PositiveSmallIntegerField()),
+                (
+                    "comparison_operator",
+                    models.CharField(
+                        choices=[
+                            ("GreaterThanOrEqualToThreshold", "GREATER_THAN_OR_EQUAL"),
+                            ("GreaterThanThreshold", "GREATER_THAN"),
+                            ("LessThanThreshold", "LESS_THAN"),
+                            ("LessThanOrEqualToThreshold", "LESS_THAN_OR_EQUAL"),
+                            (
+                                "LessThanLowerOrGreaterThanUpperThreshold",
+                                "LESS_THAN_LOWER_OR_GREATER_THAN_UPPER",
+                            ),
+                            ("LessThanLowerThreshold", "LESS_THAN_LOWER"),
+                            ("GreaterThanUpperThreshold", "GREATER_THAN_UPPER"),
+                        ],
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "period",
+                    models.PositiveSmallIntegerField(
+                        help_text="In seconds, greater than 10 seconds. ex: 10"
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("metric_name", models.CharField(max_length=55)),
+                (
+                    "namespace",
+                    models.CharField(
+                        choices=[("AWS/Lambda", "Lambda"), ("AWS/EC2", "EC2")],
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "treat_missing_data",
+                    models.CharField(
+                        choices=[
+                            ("breaching", "breaching"),
+                            ("notBreaching", "notBreaching"),
+                            ("ignore", "ignore"),
+                            ("missing", "missing"),
+                        ],
+                        max_length=255,
+                    ),
+                ),
+                ("evaluation_periods", models.PositiveSmallIntegerField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AlarmTemplateAction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("OK", "OK"),
+                            ("ALARM", "ALARM"),
+                            ("INSUFFICIENT_DATA", "INSUFFICIENT_DATA"),
+                        ],
+                        default="OK",
+                        max_length=55,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "cloudwatch_alarm_template_action",
+            },
+        ),
+        migrations.RunPython(
+            remove_duplicate_alarm_dimensions, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="alermdimension",
+            constraint=models.UniqueConstraint(
+                fields=("alarm", "dimension"), name="unique_alarm_dimension"
+            ),
+        ),
+        migrations.AddField(
+            model_name="alarmtemplate",
+            name="dimensions",
+            field=models.ManyToManyField(
+                blank=True, related_name="alarm_templates", to="cloudwatch.dimension"
+            ),
+        ),
+        migrations.AddField(
+            model_name="alarm",
+            name="template",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="alarms",
+                to="cloudwatch.alarmtemplate",
+            ),
+        ),
+        migrations.AddField(
+            model_name="alarmtemplateaction",
+            name="arn",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT, to="cloudwatch.alertsource"
+            ),
+        ),
+        migrations.AddField(
+            model_name="alarmtemplateaction",
+            name="template",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="actions",
+                to="cloudwatch.alarmtemplate",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="alarmtemplateaction",
+            unique_together={("template", "action", "arn")},
+        ),
+    ]
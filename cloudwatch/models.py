@@ -1,8 +1,11 @@
 """
 Imports the models module from Django's db package.
 It also imports a custom ARNValidator from a module named validations
+and the ARN parser from a module named arn
 """
 from django.db import models
+from django.utils import timezone
+from .arn import ARN, parse_arn
 from .validations import ARNValidator
 
 
@@ -48,6 +51,9 @@ class Alarm(models.Model):
     - namespace: CharField for the namespace (choices from NAMESPACE_CHOICES).
     - treat_missing_data: CharField for how to treat missing data (choices from TREAT_DATA_CHOICES).
     - evaluation_periods: PositiveSmallIntegerField for the number of evaluation periods.
+    - fingerprint: CharField with the hash of the payload last pushed to CloudWatch.
+    - pushed_at: DateTimeField for when the payload was last pushed to CloudWatch.
+    - template: ForeignKey to the AlarmTemplate the alarm was created from, if any.
 
     Methods:
     - __str__: Returns the name of the alarm.
@@ -121,11 +127,64 @@ class Alarm(models.Model):
     treat_missing_data = models.CharField(
         max_length=255, choices=TREAT_DATA_CHOICES)
     evaluation_periods = models.PositiveSmallIntegerField(default=1)
+    fingerprint = models.CharField(
+        max_length=64, blank=True, default='', editable=False)
+    pushed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    template = models.ForeignKey(
+        'AlarmTemplate', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='alarms')
 
     def __str__(self):
         return f'{self.name}'
 
 
+class AlarmTemplate(models.Model):
+    """
+    Model for an alarm definition that is fanned out across many dimensions.
+
+    Applying a template creates one Alarm per selected Dimension, with the
+    template settings and actions, see `cloudwatch.alarm_templates`.
+
+    Fields:
+    - name: CharField for the template name.
+    - name_pattern: CharField used to name the alarms. It may use {dimension},
+    {metric_name} and {namespace}, and must use {dimension}.
+    - dimensions: ManyToManyField to the Dimension instances to create alarms for.
+    - The remaining fields have the same meaning as on Alarm.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    name_pattern = models.CharField(
+        max_length=255, default='{dimension}-{metric_name}',
+        help_text="Alarm name, ex: {dimension}-{metric_name}. Must contain {dimension}.")
+    description = models.CharField(max_length=255, null=False, blank=False)
+    statistic = models.CharField(max_length=55, choices=Alarm.STATISTIC_CHOICES)
+    threshold = models.PositiveSmallIntegerField(null=False)
+    comparison_operator = models.CharField(
+        max_length=255, choices=Alarm.THRESHOLD_CHOICES)
+    period = models.PositiveSmallIntegerField(help_text="In seconds, greater than 10 seconds. ex: 10")
+    is_active = models.BooleanField(default=True)
+    metric_name = models.CharField(max_length=55, null=False)
+    namespace = models.CharField(max_length=255, choices=Alarm.NAMESPACE_CHOICES)
+    treat_missing_data = models.CharField(
+        max_length=255, choices=Alarm.TREAT_DATA_CHOICES)
+    evaluation_periods = models.PositiveSmallIntegerField(default=1)
+    dimensions = models.ManyToManyField(
+        'Dimension', blank=True, related_name='alarm_templates')
+
+    def __str__(self):
+        return f'{self.name}'
+
+    def alarm_name(self, dimension):
+        """
+        Return the name of the alarm created for `dimension`.
+        """
+
+        return self.name_pattern.format(
+            dimension=dimension.name, metric_name=self.metric_name,
+            namespace=self.namespace)[:255]
+
+
 class AlertSource(models.Model):
 
     """
@@ -135,18 +194,55 @@ class AlertSource(models.Model):
     - arn_id: AutoField for the ARN ID.
     - value: CharField for the ARN value with a length of up to 255 characters, 
     validated using ARNValidator.
+    - partition, service, region, account_id, resource: Indexed components of
+    the ARN, parsed from `value` on save.
 
     Methods:
     - __str__: Returns the value of the ARN.
     """
 
+    class Meta:
+        """
+        Meta:
+        - indexes: Lookups by account, region and service, and by resource prefix.
+        """
+        indexes = [
+            models.Index(fields=['account_id', 'region', 'service']),
+            models.Index(fields=['service', 'region']),
+            models.Index(fields=['region']),
+            models.Index(fields=['resource']),
+        ]
+
     arn_id = models.AutoField(primary_key=True, auto_created=True, unique=True)
     name = models.CharField(max_length=255, null=False)
     value = models.CharField(max_length=255, validators=[ARNValidator()])
+    partition = models.CharField(max_length=32, blank=True, default='', editable=False)
+    service = models.CharField(max_length=64, blank=True, default='', editable=False)
+    region = models.CharField(max_length=32, blank=True, default='', editable=False)
+    account_id = models.CharField(max_length=12, blank=True, default='', editable=False)
+    resource = models.CharField(max_length=255, blank=True, default='', editable=False)
 
     def __str__(self):
         return f'{self.value}'
 
+    def set_arn_fields(self):
+        """
+        Copy the components of `value` into the parsed ARN fields.
+
+        Values that are not ARNs leave the fields empty.
+        """
+
+        try:
+            arn = parse_arn(self.value)
+        except ValueError:
+            arn = ARN('', '', '', '', '')
+
+        self.partition, self.service, self.region, self.account_id, self.resource = arn
+
+    def save(self, *args, **kwargs):
+        self.set_arn_fields()
+        super().save(*args, **kwargs)
+
 
 class AlarmAction(models.Model):
 
@@ -193,6 +289,32 @@ class AlarmAction(models.Model):
     arn = models.ForeignKey(AlertSource, on_delete=models.PROTECT)
 
 
+class AlarmTemplateAction(models.Model):
+    """
+    Model representing an action copied to every alarm created from a template.
+
+    Attributes:
+    - template: ForeignKey to the AlarmTemplate, with CASCADE deletion.
+    - action: CharField for the action type, with choices from AlarmAction.ACTION_CHOICES.
+    - arn: ForeignKey to the AlertSource to notify, with PROTECT deletion.
+    """
+
+    class Meta:
+        """
+        Meta:
+        - db_table: Custom name for the database table.
+        - unique_together: Ensures the combination of template, action, and arn is unique.
+        """
+        db_table = 'cloudwatch_alarm_template_action'
+        unique_together = [['template', 'action', 'arn']]
+
+    template = models.ForeignKey(
+        AlarmTemplate, on_delete=models.CASCADE, related_name='actions')
+    action = models.CharField(
+        max_length=55, choices=AlarmAction.ACTION_CHOICES, default=AlarmAction.ACTION_OK)
+    arn = models.ForeignKey(AlertSource, on_delete=models.PROTECT)
+
+
 class Dimension(models.Model):
     """
     Model representing an alarm-affecting resource.
@@ -201,20 +323,65 @@ class Dimension(models.Model):
     - dimension_id: SmallAutoField for the dimension ID.
     - name: CharField for the name, uniquely identifying the dimension.
     - value: CharField for the AWS resource ARN.
+    - source: CharField telling whether the row was entered by hand or discovered.
+    - last_modified: CharField with the LastModified value of a discovered Lambda function.
 
     Each Dimension instance is uniquely identified by its name.
     """
 
+    SOURCE_MANUAL = 'manual'
+    SOURCE_LAMBDA = 'lambda'
+
+    SOURCE_CHOICES = [
+        (SOURCE_MANUAL, SOURCE_MANUAL),
+        (SOURCE_LAMBDA, SOURCE_LAMBDA),
+    ]
+
     dimension_id = models.SmallAutoField(
         primary_key=True, auto_created=True, unique=True)
     name = models.CharField(
         max_length=255, unique=True)
     value = models.CharField(max_length=255, null=False, unique=True)
+    source = models.CharField(
+        max_length=55, choices=SOURCE_CHOICES, default=SOURCE_MANUAL, editable=False)
+    last_modified = models.CharField(
+        max_length=64, blank=True, default='', editable=False)
 
     def __str__(self):
         return f'{self.value}'
 
 
+class DiscoveryCheckpoint(models.Model):
+    """
+    Model recording the last resource discovery run of one source and region.
+
+    Attributes:
+    - source: CharField for the discovered source, e.g. 'lambda'.
+    - region: CharField for the AWS region.
+    - completed_at: DateTimeField for when the last run finished.
+    - resource_count: PositiveIntegerField for the resources seen in the last run.
+    - listing_hash: CharField with a hash of the (ARN, LastModified) pairs seen.
+    """
+
+    class Meta:
+        """
+        Meta:
+        - db_table: Custom name for the database table.
+        - unique_together: One checkpoint per source and region.
+        """
+        db_table = 'cloudwatch_discovery_checkpoint'
+        unique_together = [['source', 'region']]
+
+    source = models.CharField(max_length=55)
+    region = models.CharField(max_length=32)
+    completed_at = models.DateTimeField()
+    resource_count = models.PositiveIntegerField(default=0)
+    listing_hash = models.CharField(max_length=64, blank=True, default='')
+
+    def __str__(self):
+        return f'{self.source} {self.region}'
+
+
 class AlermDimension(models.Model):
     """
     Model representing a relationship between an Alarm and a Dimension in the context 
@@ -225,6 +392,7 @@ class AlermDimension(models.Model):
     related_name 'dimension'.
     - dimension: ForeignKey to the associated Dimension instance, with PROTECT deletion.
 
+    Each Dimension can be linked to an Alarm only once.
     """
 
 
@@ -232,9 +400,143 @@ class AlermDimension(models.Model):
         """
         Meta:
         - db_table: Custom name for the database table.
+        - constraints: Ensures the combination of alarm and dimension is unique.
         """
         db_table = 'cloudwatch_alarm_dimension'
+        constraints = [
+            models.UniqueConstraint(fields=['alarm', 'dimension'],
+                                    name='unique_alarm_dimension'),
+        ]
 
     alarm = models.ForeignKey(
         Alarm, on_delete=models.CASCADE, related_name='dimension')
     dimension = models.ForeignKey(Dimension, on_delete=models.PROTECT)
+
+
+class AlarmOutbox(models.Model):
+    """
+    Model representing a pending CloudWatch write for an Alarm.
+
+    Rows are written in the same transaction as the Alarm save and drained by
+    the `process_alarm_outbox` worker, so the admin never waits on AWS.
+
+    Attributes:
+    - alarm: ForeignKey to the Alarm to push, with CASCADE deletion.
+    - status: CharField with the state of the row, PENDING or DEAD.
+    - attempts: PositiveSmallIntegerField for the number of failed pushes.
+    - available_at: DateTimeField for when the row may be picked up next.
+    - last_error: TextField with the error of the last failed push.
+    - created_at: DateTimeField for when the row was created.
+
+    Constants:
+    - STATUS_PENDING: 'PENDING'
+    - STATUS_DEAD: 'DEAD'
+    - STATUS_CHOICES: List of choices for the status.
+    """
+
+    class Meta:
+        """
+        Meta:
+        - db_table: Custom name for the database table.
+        - indexes: Index used by the worker to find due rows.
+        """
+        db_table = 'cloudwatch_alarm_outbox'
+        indexes = [models.Index(fields=['status', 'available_at'])]
+
+    STATUS_PENDING = 'PENDING'
+    STATUS_DEAD = 'DEAD'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, STATUS_PENDING),
+        (STATUS_DEAD, STATUS_DEAD),
+    ]
+
+    alarm = models.ForeignKey(
+        Alarm, on_delete=models.CASCADE, related_name='outbox')
+    status = models.CharField(
+        max_length=55, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.alarm_id} ({self.status})'
+
+
+class RateLimitBucket(models.Model):
+    """
+    Model storing the shared state of one AWS API token bucket.
+
+    Used by the database backend of `cloudwatch.ratelimit` so that every
+    process calling AWS draws from the same bucket.
+
+    Attributes:
+    - key: CharField identifying the bucket as 'service.Operation@region'.
+    - tokens: FloatField for the tokens currently available.
+    - rate: FloatField for the current refill rate in tokens per second.
+    - updated_at: FloatField with the epoch time of the last refill.
+    """
+
+    class Meta:
+        """
+        Meta:
+        - db_table: Custom name for the database table.
+        """
+        db_table = 'cloudwatch_rate_limit_bucket'
+
+    key = models.CharField(max_length=255, unique=True)
+    tokens = models.FloatField()
+    rate = models.FloatField()
+    updated_at = models.FloatField()
+
+    def __str__(self):
+        return f'{self.key}'
+
+
+class AutocompleteToken(models.Model):
+    """
+    Model representing one search token of a Dimension or AlertSource.
+
+    Tokens are lowercased parts of the name and of the ARN resource, cut at
+    camelCase and punctuation boundaries, e.g. 'animalgetbyid', 'getbyid',
+    'byid' and 'id' for a Lambda function named 'AnimalGetById'. The admin
+    autocomplete matches typed words as indexed prefixes of these tokens
+    instead of scanning the ARN column.
+
+    Attributes:
+    - kind: CharField for the model the token belongs to.
+    - object_id: PositiveIntegerField for the primary key of the object.
+    - token: CharField for the lowercased token.
+
+    Constants:
+    - KIND_DIMENSION: 'dimension'
+    - KIND_ALERT_SOURCE: 'alertsource'
+    """
+
+    class Meta:
+        """
+        Meta:
+        - db_table: Custom name for the database table.
+        - indexes: Prefix lookups by token, and cleanup by object.
+        """
+        db_table = 'cloudwatch_autocomplete_token'
+        indexes = [
+            models.Index(fields=['kind', 'token']),
+            models.Index(fields=['kind', 'object_id']),
+        ]
+
+    KIND_DIMENSION = 'dimension'
+    KIND_ALERT_SOURCE = 'alertsource'
+
+    KIND_CHOICES = [
+        (KIND_DIMENSION, KIND_DIMENSION),
+        (KIND_ALERT_SOURCE, KIND_ALERT_SOURCE),
+    ]
+
+    kind = models.CharField(max_length=55, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    token = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f'{self.token}'
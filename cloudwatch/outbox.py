@@ -0,0 +1,169 @@
+"""
+Transactional outbox for CloudWatch alarm writes.
+
+Alarm saves only write an AlarmOutbox row. The `process_alarm_outbox` worker
+drains the table in batches, pushes one payload per alarm no matter how many
+rows were queued for it, and retries failures with exponential backoff until
+they are dead-lettered.
+"""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .clients import get_client
+from .models import Alarm, AlarmOutbox
+from .payloads import alarm_fingerprint, compile_alarm_payloads, record_pushed
+
+BACKOFF_BASE = 2
+BACKOFF_MAX = 900
+LEASE_SECONDS = 300
+
+
+def enqueue_alarm(alarm):
+    """
+    Queue `alarm` to be pushed to CloudWatch.
+
+    Call this inside the transaction that saves the alarm. A pending row that
+    already exists for the alarm is reused, so repeated edits stay coalesced.
+
+    Parameters:
+    - alarm: The Alarm instance that was saved.
+    """
+
+    updated = AlarmOutbox.objects.filter(
+        alarm_id=alarm.pk, status=AlarmOutbox.STATUS_PENDING
+    ).update(available_at=timezone.now(), attempts=0, last_error='')
+
+    if not updated:
+        AlarmOutbox.objects.create(alarm_id=alarm.pk)
+
+
+def enqueue_alarms(alarm_ids):
+    """
+    Queue many alarms at once, e.g. after a bulk create.
+
+    Alarms that already have a pending row are made due again; the others
+    get a new row. Runs a fixed number of statements for any number of alarms.
+
+    Parameters:
+    - alarm_ids: The ids of the alarms to push.
+    """
+
+    alarm_ids = set(alarm_ids)
+    pending = AlarmOutbox.objects.filter(
+        alarm_id__in=alarm_ids, status=AlarmOutbox.STATUS_PENDING)
+    queued = set(pending.values_list('alarm_id', flat=True))
+    pending.update(available_at=timezone.now(), attempts=0, last_error='')
+    AlarmOutbox.objects.bulk_create(
+        [AlarmOutbox(alarm_id=alarm_id) for alarm_id in alarm_ids - queued],
+        batch_size=1000)
+
+
+def backoff_delay(attempts):
+    """
+    Return the delay in seconds before retry number `attempts`.
+
+    The delay doubles with every attempt up to BACKOFF_MAX, with jitter so
+    that rows failing together are not retried together.
+    """
+
+    delay = min(BACKOFF_BASE ** attempts, BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to `batch_size` due rows to the current worker.
+
+    Rows are locked with SKIP LOCKED where the database supports it and moved
+    LEASE_SECONDS into the future, so other workers skip them while they are
+    processed. If the worker dies, the rows become due again after the lease.
+
+    Returns:
+    - tuple: The claimed AlarmOutbox rows and the end of their lease.
+    """
+
+    now = timezone.now()
+    leased_until = now + timedelta(seconds=LEASE_SECONDS)
+    with transaction.atomic():
+        rows = list(
+            AlarmOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=AlarmOutbox.STATUS_PENDING, available_at__lte=now)
+            .order_by('available_at')[:batch_size]
+        )
+        AlarmOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+            available_at=leased_until)
+
+    return rows, leased_until
+
+
+def drain_outbox(batch_size=100, max_attempts=8):
+    """
+    Process one batch of due outbox rows.
+
+    Rows are grouped by alarm, the alarms are compiled in a fixed number of
+    queries and each alarm is pushed at most once. Alarms whose payload
+    matches their last pushed fingerprint are not sent again. Rows that were
+    re-queued by an edit while leased are left for the next batch.
+
+    Parameters:
+    - batch_size: The maximum number of rows to claim.
+    - max_attempts: Failed pushes before a row is dead-lettered.
+
+    Returns:
+    - dict: Counts of 'pushed', 'unchanged', 'retried' and 'dead' alarms.
+    """
+
+    stats = {'pushed': 0, 'unchanged': 0, 'retried': 0, 'dead': 0}
+    rows, leased_until = claim_batch(batch_size)
+    if not rows:
+        return stats
+
+    rows_by_alarm = {}
+    for row in rows:
+        rows_by_alarm.setdefault(row.alarm_id, []).append(row)
+
+    pushed = []
+    done = []
+    client = get_client('cloudwatch')
+
+    for alarm, payload in compile_alarm_payloads(Alarm.objects.filter(pk__in=rows_by_alarm)):
+        alarm_rows = rows_by_alarm[alarm.pk]
+        fingerprint = alarm_fingerprint(payload)
+
+        if fingerprint == alarm.fingerprint:
+            stats['unchanged'] += 1
+            done.extend(alarm_rows)
+            continue
+
+        try:
+            client.put_metric_alarm(**payload)
+        except Exception as error:  # pylint: disable=broad-except
+            attempts = max(row.attempts for row in alarm_rows) + 1
+            if attempts >= max_attempts:
+                status = AlarmOutbox.STATUS_DEAD
+                stats['dead'] += 1
+            else:
+                status = AlarmOutbox.STATUS_PENDING
+                stats['retried'] += 1
+            AlarmOutbox.objects.filter(
+                pk__in=[row.pk for row in alarm_rows], available_at=leased_until
+            ).update(
+                status=status,
+                attempts=attempts,
+                last_error=str(error),
+                available_at=timezone.now() + timedelta(seconds=backoff_delay(attempts)),
+            )
+            continue
+
+        stats['pushed'] += 1
+        pushed.append((alarm, fingerprint))
+        done.extend(alarm_rows)
+
+    record_pushed(pushed)
+    AlarmOutbox.objects.filter(
+        pk__in=[row.pk for row in done], available_at=leased_until).delete()
+
+    return stats
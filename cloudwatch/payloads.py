@@ -0,0 +1,139 @@
+"""
+Helpers to turn Alarm rows into AWS CloudWatch PutMetricAlarm payloads.
+"""
+import hashlib
+import json
+
+from django.utils import timezone
+from .models import Alarm, AlarmAction, AlermDimension
+
+
+def build_alarm_payload(alarm, actions, dimensions):
+    """
+    Build the keyword arguments for `put_metric_alarm` from an alarm.
+
+    Actions and dimensions are sorted, so the same alarm configuration always
+    produces the same payload and fingerprint.
+
+    Parameters:
+    - alarm: The Alarm instance.
+    - actions: Iterable of (action, arn) pairs for the alarm.
+    - dimensions: Iterable of (name, value) pairs for the alarm.
+
+    Returns:
+    - dict: The PutMetricAlarm payload.
+    """
+
+    actions = list(actions)
+    ok_actions = sorted(arn for action, arn in actions if action == 'OK')
+    alarm_actions = sorted(arn for action, arn in actions if action != 'OK')
+
+    return {
+        'AlarmName': alarm.name,
+        'AlarmDescription': alarm.description,
+        'MetricName': alarm.metric_name,
+        'Namespace': alarm.namespace,
+        'Statistic': alarm.statistic,
+        'ComparisonOperator': alarm.comparison_operator,
+        'Threshold': alarm.threshold,
+        'Period': alarm.period,
+        'EvaluationPeriods': alarm.evaluation_periods,
+        'OKActions': ok_actions,
+        'AlarmActions': alarm_actions,
+        'Dimensions': [{'Value': value, 'Name': name}
+                       for name, value in sorted(dimensions)],
+        'ActionsEnabled': alarm.is_active,
+        'TreatMissingData': alarm.treat_missing_data,
+    }
+
+
+def alarm_fingerprint(payload):
+    """
+    Return a stable hash of a PutMetricAlarm payload.
+
+    Parameters:
+    - payload: The dict returned by `build_alarm_payload`.
+
+    Returns:
+    - str: The hex SHA-256 digest of the payload.
+    """
+
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def record_pushed(pushed):
+    """
+    Store the fingerprint and push time of alarms sent to CloudWatch.
+
+    Parameters:
+    - pushed: Iterable of (alarm, fingerprint) pairs.
+    """
+
+    now = timezone.now()
+    alarms = []
+    for alarm, fingerprint in pushed:
+        alarm.fingerprint = fingerprint
+        alarm.pushed_at = now
+        alarms.append(alarm)
+
+    Alarm.objects.bulk_update(alarms, ['fingerprint', 'pushed_at'], batch_size=500)
+
+
+def load_alarm_relations(alarm_ids):
+    """
+    Load the actions and dimensions of many alarms in two queries.
+
+    Only the columns needed for the payload are selected, as plain tuples,
+    instead of building AlarmAction, AlermDimension and Dimension instances.
+
+    Parameters:
+    - alarm_ids: A list of alarm ids or an Alarm `values('pk')` subquery.
+
+    Returns:
+    - tuple: Dicts mapping alarm id to its (action, arn) pairs and to its
+      (name, value) dimension pairs.
+    """
+
+    actions = {}
+    for alarm_id, action, arn in AlarmAction.objects.filter(
+            alarm_id__in=alarm_ids).values_list('alarm_id', 'action', 'arn__value'):
+        actions.setdefault(alarm_id, []).append((action, arn))
+
+    dimensions = {}
+    for alarm_id, name, value in AlermDimension.objects.filter(
+            alarm_id__in=alarm_ids).values_list('alarm_id', 'dimension__name', 'dimension__value'):
+        dimensions.setdefault(alarm_id, []).append((name, value))
+
+    return actions, dimensions
+
+
+def compile_alarm_payloads(queryset):
+    """
+    Build PutMetricAlarm payloads for every alarm in `queryset`.
+
+    Runs three queries however many alarms the queryset contains: one for
+    the alarms and one each for their actions and dimensions.
+
+    Parameters:
+    - queryset: An Alarm queryset.
+
+    Returns:
+    - list: (alarm, payload) tuples.
+    """
+
+    alarms = list(queryset)
+    if not alarms:
+        return []
+
+    if queryset.query.is_sliced:
+        alarm_ids = [alarm.pk for alarm in alarms]
+    else:
+        alarm_ids = queryset.values('pk')
+    actions, dimensions = load_alarm_relations(alarm_ids)
+
+    return [
+        (alarm, build_alarm_payload(
+            alarm, actions.get(alarm.pk, []), dimensions.get(alarm.pk, [])))
+        for alarm in alarms
+    ]
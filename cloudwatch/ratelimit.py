@@ -0,0 +1,229 @@
+"""
+Cross-process token-bucket rate limiting for AWS API calls.
+
+Buckets are keyed by (service, operation, region) and their state lives in a
+shared backend, either lock files in a local directory or the
+RateLimitBucket table, so every worker and batch job draws from the same
+budget. When AWS reports throttling the bucket rate is halved, and it then
+recovers linearly back to the configured limit.
+
+Limits are configured with the `AWS_RATE_LIMIT` setting:
+
+    AWS_RATE_LIMIT = {
+        'BACKEND': 'file',  # or 'database'
+        'PATH': BASE_DIR / '.aws-rate-limits',
+        'LIMITS': {'cloudwatch.PutMetricAlarm': 3, 'logs.StartQuery': 5},
+    }
+
+Operations without a limit are not throttled.
+"""
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import RateLimitBucket
+
+THROTTLING_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+    'LimitExceededException',
+}
+MIN_RATE_FACTOR = 0.1
+RECOVERY_SECONDS = 60
+
+
+class FileBackend:
+    """
+    Keep bucket state in one JSON file per key, guarded by `flock`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    @contextmanager
+    def locked(self, key):
+        """
+        Yield the mutable state of `key` while holding an exclusive lock.
+        """
+
+        import fcntl  # pylint: disable=import-outside-toplevel  # POSIX only
+
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+        with open(os.path.join(self.path, f'{name}.json'), 'a+', encoding='utf-8') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                content = file.read()
+                state = json.loads(content) if content else {}
+                yield state
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps(state))
+                file.flush()
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+
+class DatabaseBackend:
+    """
+    Keep bucket state in the RateLimitBucket table, guarded by row locks.
+    """
+
+    @contextmanager
+    def locked(self, key):
+        """
+        Yield the mutable state of `key` while holding its row lock.
+        """
+
+        with transaction.atomic():
+            bucket = RateLimitBucket.objects.select_for_update().filter(key=key).first()
+            if bucket is None:
+                try:
+                    with transaction.atomic():
+                        bucket = RateLimitBucket.objects.create(
+                            key=key, tokens=0, rate=0, updated_at=0)
+                except IntegrityError:
+                    bucket = RateLimitBucket.objects.select_for_update().get(key=key)
+
+            state = ({'tokens': bucket.tokens, 'rate': bucket.rate, 'updated_at': bucket.updated_at}
+                     if bucket.updated_at else {})
+            yield state
+            RateLimitBucket.objects.filter(pk=bucket.pk).update(**state)
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter shared through a backend.
+
+    Parameters:
+    - backend: FileBackend or DatabaseBackend instance.
+    - limits: Dict of 'service.Operation' to calls per second.
+    - clock: Function returning the current epoch time.
+    - sleep: Function used to wait for tokens.
+    """
+
+    def __init__(self, backend, limits, clock=time.time, sleep=time.sleep):
+        self.backend = backend
+        self.limits = limits
+        self.clock = clock
+        self.sleep = sleep
+
+    def get_limit(self, service, operation):
+        """
+        Return the configured calls per second, or None if unlimited.
+        """
+
+        return self.limits.get(f'{service}.{operation}')
+
+    def refill(self, state, limit):
+        """
+        Bring `state` up to date for the current time.
+        """
+
+        now = self.clock()
+        if not state:
+            state.update(tokens=float(limit), rate=float(limit), updated_at=now)
+            return
+
+        elapsed = max(0.0, now - state['updated_at'])
+        state['rate'] = min(float(limit), state['rate'] + elapsed * limit / RECOVERY_SECONDS)
+        state['tokens'] = min(float(limit), state['tokens'] + elapsed * state['rate'])
+        state['updated_at'] = now
+
+    def acquire(self, service, operation, region=None):
+        """
+        Block until a token for the operation is available.
+
+        Returns:
+        - float: Seconds spent waiting.
+        """
+
+        limit = self.get_limit(service, operation)
+        if not limit:
+            return 0.0
+
+        key = f'{service}.{operation}@{region or "default"}'
+        waited = 0.0
+        while True:
+            with self.backend.locked(key) as state:
+                self.refill(state, limit)
+                if state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    return waited
+                delay = (1 - state['tokens']) / state['rate']
+            self.sleep(delay)
+            waited += delay
+
+    def throttled(self, service, operation, region=None):
+        """
+        Halve the rate of the bucket after AWS reported throttling.
+        """
+
+        limit = self.get_limit(service, operation)
+        if not limit:
+            return
+
+        key = f'{service}.{operation}@{region or "default"}'
+        with self.backend.locked(key) as state:
+            self.refill(state, limit)
+            state['rate'] = max(limit * MIN_RATE_FACTOR, state['rate'] / 2)
+            state['tokens'] = min(state['tokens'], 0.0)
+
+
+_limiter = None
+
+
+def get_rate_limiter():
+    """
+    Return the process-wide RateLimiter built from the `AWS_RATE_LIMIT` setting.
+    """
+
+    global _limiter  # pylint: disable=global-statement
+    if _limiter is None:
+        config = getattr(settings, 'AWS_RATE_LIMIT', {})
+        if config.get('BACKEND', 'file') == 'database':
+            backend = DatabaseBackend()
+        else:
+            backend = FileBackend(str(config.get('PATH', settings.BASE_DIR / '.aws-rate-limits')))
+        _limiter = RateLimiter(backend, config.get('LIMITS', {}))
+    return _limiter
+
+
+def _before_send(region, service, event_name, **kwargs):
+    # The event name is 'before-send.<service id>.<Operation>'. Returning
+    # None lets botocore send the request.
+    get_rate_limiter().acquire(service, event_name.rsplit('.', 1)[-1], region)
+
+
+def _needs_retry(region, response=None, operation=None, **kwargs):
+    if response is None or operation is None:
+        return
+    code = response[1].get('Error', {}).get('Code')
+    if code in THROTTLING_CODES:
+        get_rate_limiter().throttled(
+            operation.service_model.service_name, operation.name, region)
+
+
+def install_rate_limiter(client):
+    """
+    Route every call made by `client` through the shared rate limiter.
+
+    A token is taken before each HTTP attempt, including the retries
+    botocore makes after throttling, and throttling errors reported on any
+    attempt slow the bucket down.
+    """
+
+    region = client.meta.region_name
+    service = client.meta.service_model.service_name
+    client.meta.events.register('before-send', partial(_before_send, region, service))
+    client.meta.events.register('needs-retry', partial(_needs_retry, region))
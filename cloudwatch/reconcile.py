@@ -0,0 +1,127 @@
+"""
+Find drift between the Alarm tables and the alarms that exist in CloudWatch.
+
+The desired state is compiled from the database once and indexed by alarm
+name. Remote alarms are streamed page by page from `describe_alarms`, so
+memory does not grow with the number of remote pages.
+"""
+from .payloads import compile_alarm_payloads
+
+MISSING = 'MISSING'
+EXTRA = 'EXTRA'
+DRIFTED = 'DRIFTED'
+
+COMPARED_FIELDS = {
+    'AlarmDescription': '',
+    'MetricName': None,
+    'Namespace': None,
+    'Statistic': None,
+    'ComparisonOperator': None,
+    'Threshold': None,
+    'Period': None,
+    'EvaluationPeriods': None,
+    'OKActions': [],
+    'AlarmActions': [],
+    'Dimensions': [],
+    'ActionsEnabled': True,
+    'TreatMissingData': 'missing',
+}
+
+
+def normalize_alarm(alarm):
+    """
+    Reduce a PutMetricAlarm payload or a DescribeAlarms entry to the fields we manage.
+
+    Parameters:
+    - alarm: The payload or MetricAlarms entry.
+
+    Returns:
+    - dict: Comparable values, with lists sorted and numbers as floats.
+    """
+
+    normalized = {}
+    for field, default in COMPARED_FIELDS.items():
+        value = alarm.get(field, default)
+        if field in ('OKActions', 'AlarmActions'):
+            value = sorted(value or [])
+        elif field == 'Dimensions':
+            value = sorted((item['Name'], item['Value']) for item in value or [])
+        elif field == 'Threshold' and value is not None:
+            value = float(value)
+        elif field == 'AlarmDescription':
+            value = value or ''
+        normalized[field] = value
+    return normalized
+
+
+def build_desired_state(queryset):
+    """
+    Index the compiled payloads of `queryset` by alarm name.
+
+    Returns:
+    - tuple: The {name: (alarm, payload)} index and the list of names that
+      are used by more than one alarm (the last alarm wins).
+    """
+
+    desired = {}
+    duplicates = []
+    for alarm, payload in compile_alarm_payloads(queryset):
+        if alarm.name in desired:
+            duplicates.append(alarm.name)
+        desired[alarm.name] = (alarm, payload)
+    return desired, duplicates
+
+
+def iter_remote_alarms(client, prefix=None, page_size=100):
+    """
+    Yield every metric alarm in CloudWatch, one page at a time.
+
+    Parameters:
+    - client: The CloudWatch client.
+    - prefix: Only list alarms whose name starts with this prefix.
+    - page_size: Alarms requested per DescribeAlarms call (max 100).
+    """
+
+    kwargs = {'AlarmTypes': ['MetricAlarm'], 'PaginationConfig': {'PageSize': page_size}}
+    if prefix:
+        kwargs['AlarmNamePrefix'] = prefix
+
+    for page in client.get_paginator('describe_alarms').paginate(**kwargs):
+        yield from page.get('MetricAlarms', [])
+
+
+def reconcile(desired, remote_alarms, prefix=None):
+    """
+    Compare the desired state with the remote alarms.
+
+    `desired` is consumed as remote alarms are matched, so only the alarms
+    that were never seen remotely are left when the stream ends.
+
+    Parameters:
+    - desired: The index returned by `build_desired_state`.
+    - remote_alarms: Iterable of DescribeAlarms MetricAlarms entries.
+    - prefix: The name prefix the remote alarms were listed with.
+
+    Yields:
+    - tuple: (kind, name, alarm, payload, fields) where kind is MISSING,
+      EXTRA or DRIFTED and fields lists the differing fields of a drift.
+    """
+
+    pending = dict(desired)
+    for remote in remote_alarms:
+        name = remote['AlarmName']
+        entry = pending.pop(name, None)
+        if entry is None:
+            yield EXTRA, name, None, None, []
+            continue
+
+        alarm, payload = entry
+        wanted = normalize_alarm(payload)
+        actual = normalize_alarm(remote)
+        fields = [field for field in COMPARED_FIELDS if wanted[field] != actual[field]]
+        if fields:
+            yield DRIFTED, name, alarm, payload, fields
+
+    for name, (alarm, payload) in pending.items():
+        if not prefix or name.startswith(prefix):
+            yield MISSING, name, alarm, payload, []
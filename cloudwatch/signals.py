@@ -0,0 +1,28 @@
+"""
+Signal handlers keeping the autocomplete index in sync with saved rows.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .autocomplete import index_objects, kind_for, remove_objects
+from .models import AlertSource, Dimension
+
+
+@receiver(post_save, sender=Dimension)
+@receiver(post_save, sender=AlertSource)
+def index_saved_object(sender, instance, **kwargs):
+    """
+    Re-index a Dimension or AlertSource after it is saved.
+    """
+
+    index_objects(kind_for(sender), [instance])
+
+
+@receiver(post_delete, sender=Dimension)
+@receiver(post_delete, sender=AlertSource)
+def remove_deleted_object(sender, instance, **kwargs):
+    """
+    Drop the tokens of a deleted Dimension or AlertSource.
+    """
+
+    remove_objects(kind_for(sender), [instance.pk])
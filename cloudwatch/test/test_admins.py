@@ -2,10 +2,12 @@
 Testing woth pytest package.
 Test Alarm admin
 """
+from unittest import mock
+
 import pytest
 from django.contrib.admin.sites import AdminSite
 from cloudwatch.admin import AlarmAdmin, make_cloudwatch_alarm
-from cloudwatch.models import Alarm
+from cloudwatch.models import Alarm, AlarmOutbox
 
 @pytest.fixture
 def alarm_admin():
@@ -26,7 +28,7 @@ class TestAlarmAdmin:
         Test the list_display attribute of AlarmAdmin.
         """
         list_display = alarm_admin.get_list_display(None)
-        assert list_display == ['alarm_id', 'name']
+        assert list_display == ['alarm_id', 'name', 'is_active']
 
     def test_create_and_save_alarm(self, alarm_admin, alarm_model_instance):
         """
@@ -63,4 +65,31 @@ class TestAlarmAdmin:
             assert True
         except Exception:
             assert False
-    
+
+    def test_skip_unchanged_cloud_watch_alarm(self, alarm_model_instance):
+        """
+        Test that an unchanged alarm is only pushed once.
+        """
+        client = mock.Mock()
+        with mock.patch('cloudwatch.admin.get_client', return_value=client):
+            assert make_cloudwatch_alarm(alarm_model_instance)
+            assert not make_cloudwatch_alarm(alarm_model_instance)
+            alarm_model_instance.threshold += 1
+            assert make_cloudwatch_alarm(alarm_model_instance)
+
+        assert client.put_metric_alarm.call_count == 2
+        assert Alarm.objects.get(pk=alarm_model_instance.pk).pushed_at is not None
+
+    def test_failed_cloud_watch_alarm_is_queued(self, alarm_model_instance):
+        """
+        Test that a failed push is queued in the outbox and not recorded.
+        """
+        client = mock.Mock()
+        client.put_metric_alarm.side_effect = RuntimeError('throttled')
+        with mock.patch('cloudwatch.admin.get_client', return_value=client):
+            with pytest.raises(RuntimeError):
+                make_cloudwatch_alarm(alarm_model_instance)
+
+        assert AlarmOutbox.objects.filter(
+            alarm=alarm_model_instance, status=AlarmOutbox.STATUS_PENDING).count() == 1
+        assert Alarm.objects.get(pk=alarm_model_instance.pk).pushed_at is None
@@ -0,0 +1,68 @@
+"""
+Test alarm templates applied to many dimensions.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from cloudwatch.alarm_templates import apply_alarm_template
+from cloudwatch.models import (Alarm, AlarmAction, AlarmOutbox, AlarmTemplate,
+                               AlarmTemplateAction, AlermDimension, AlertSource, Dimension)
+
+
+@pytest.fixture
+def template():
+    template = baker.make(AlarmTemplate, name='errors', name_pattern='{dimension}-{metric_name}',
+                          metric_name='Errors', namespace='AWS/Lambda', period=60)
+    source = baker.make(AlertSource, value='arn:aws:sns:ap-southeast-2:123456789012:alerts')
+    baker.make(AlarmTemplateAction, template=template, action=AlarmAction.ACTION_ALARM, arn=source)
+    baker.make(AlarmTemplateAction, template=template, action=AlarmAction.ACTION_OK, arn=source)
+    return template
+
+
+@pytest.mark.django_db
+class TestApplyAlarmTemplate:
+    """
+    Test cases for apply_alarm_template.
+    """
+
+    def test_creates_alarms_in_constant_queries(self, template):
+        """
+        Test that alarms, actions, links and outbox rows are written in bulk.
+        """
+        dimensions = [baker.make(Dimension, name=f'fn-{index}', value=f'value-{index}')
+                      for index in range(50)]
+
+        with CaptureQueriesContext(connection) as queries:
+            created = apply_alarm_template(template, dimensions)
+
+        assert created == 50
+        assert len(queries) < 20
+        assert set(Alarm.objects.values_list('name', flat=True)) == {
+            f'fn-{index}-Errors' for index in range(50)}
+        assert AlarmAction.objects.count() == 100
+        assert AlermDimension.objects.count() == 50
+        assert AlarmOutbox.objects.count() == 50
+
+    def test_applying_again_is_idempotent(self, template):
+        """
+        Test that dimensions with an alarm from the template are skipped.
+        """
+        template.dimensions.set(baker.make(Dimension, _quantity=3))
+        apply_alarm_template(template)
+        template.dimensions.add(baker.make(Dimension))
+
+        assert apply_alarm_template(template) == 1
+        assert Alarm.objects.filter(template=template).count() == 4
+        assert AlermDimension.objects.count() == 4
+        assert AlarmOutbox.objects.count() == 4
+
+    def test_name_pattern_must_use_dimension(self, template):
+        """
+        Test that a pattern without {dimension} is rejected.
+        """
+        template.name_pattern = '{metric_name}'
+
+        with pytest.raises(ValueError):
+            apply_alarm_template(template, [baker.make(Dimension)])
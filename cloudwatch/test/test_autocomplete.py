@@ -0,0 +1,104 @@
+"""
+Test the indexed autocomplete for Dimension and AlertSource.
+"""
+from unittest import mock
+
+import pytest
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache, caches
+from django.test import RequestFactory
+from django.urls import reverse
+from model_bakery import baker
+
+from cloudwatch.admin import DimensionAdmin
+from cloudwatch.autocomplete import search_ids, tokenize
+from cloudwatch.models import AutocompleteToken, Dimension
+
+FUNCTION_ARN = ('arn:aws:lambda:ap-southeast-2:058188477434:function:'
+                'OrivetApi-OrivetNestedSta-AnimalGetByIdFunction045-GQhyRG6XvWeP')
+
+
+@pytest.fixture
+def clear_cache():
+    cache.clear()
+
+
+def test_tokenize_splits_arn_resource_and_camel_case():
+    """
+    Test that the function name is split into searchable words.
+    """
+    tokens = tokenize('AnimalGetById', FUNCTION_ARN)
+
+    assert {'animalgetbyid', 'getbyid', 'byid', 'id', 'function', 'orivetapi'} <= tokens
+    assert 'arn' not in tokens
+    assert '058188477434' not in tokens
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('clear_cache')
+class TestSearchIds:
+    """
+    Test cases for search_ids and the index signals.
+    """
+
+    def test_every_word_must_match_a_token_prefix(self):
+        """
+        Test that all words of the term are matched as prefixes.
+        """
+        animal = baker.make(Dimension, name='AnimalGetById', value=FUNCTION_ARN)
+        baker.make(Dimension, name='AnimalList', value='arn:aws:lambda:x:1:function:AnimalList')
+
+        assert search_ids(AutocompleteToken.KIND_DIMENSION, 'anim get') == [animal.pk]
+        assert len(search_ids(AutocompleteToken.KIND_DIMENSION, 'anim')) == 2
+
+    def test_saving_invalidates_cached_results(self):
+        """
+        Test that a renamed dimension is found right after it is saved.
+        """
+        dimension = baker.make(Dimension, name='OldName', value='old-value')
+        assert search_ids(AutocompleteToken.KIND_DIMENSION, 'newname') == []
+
+        dimension.name = 'NewName'
+        dimension.save()
+
+        assert search_ids(AutocompleteToken.KIND_DIMENSION, 'newname') == [dimension.pk]
+
+    def test_saving_invalidates_results_cached_by_another_process(self):
+        """
+        Test that a write invalidates results another worker cached.
+
+        Each worker has its own cache connection, so the version bump is only
+        seen by the other one through the shared backend.
+        """
+        other_worker = caches.create_connection('default')
+        dimension = baker.make(Dimension, name='OldName', value='old-value')
+        with mock.patch('cloudwatch.autocomplete.cache', other_worker):
+            assert search_ids(AutocompleteToken.KIND_DIMENSION, 'newname') == []
+
+        dimension.name = 'NewName'
+        dimension.save()
+
+        with mock.patch('cloudwatch.autocomplete.cache', other_worker):
+            assert search_ids(AutocompleteToken.KIND_DIMENSION, 'newname') == [dimension.pk]
+
+    def test_deleting_removes_tokens(self):
+        """
+        Test that a deleted dimension leaves no tokens behind.
+        """
+        dimension = baker.make(Dimension, name='Gone', value='gone-value')
+        dimension.delete()
+
+        assert not AutocompleteToken.objects.exists()
+
+    def test_admin_autocomplete_uses_index(self):
+        """
+        Test that autocomplete requests are answered from the token index.
+        """
+        animal = baker.make(Dimension, name='AnimalGetById', value=FUNCTION_ARN)
+        baker.make(Dimension, name='Other', value='other-value')
+        request = RequestFactory().get(reverse('admin:autocomplete'))
+
+        queryset, _ = DimensionAdmin(Dimension, AdminSite()).get_search_results(
+            request, Dimension.objects.all(), 'getbyid')
+
+        assert list(queryset) == [animal]
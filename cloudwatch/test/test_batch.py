@@ -0,0 +1,82 @@
+"""
+Test batched delete, enable and disable of CloudWatch alarms.
+"""
+from unittest import mock
+
+import pytest
+from django.contrib.admin.sites import AdminSite
+from model_bakery import baker
+
+from cloudwatch.admin import AlarmAdmin
+from cloudwatch.batch import delete_alarms, set_alarms_enabled
+from cloudwatch.models import Alarm
+from cloudwatch.payloads import alarm_fingerprint, compile_alarm_payloads
+
+
+@pytest.fixture
+def client():
+    client = mock.Mock()
+    with mock.patch('cloudwatch.batch.get_client', return_value=client):
+        yield client
+
+
+@pytest.mark.django_db
+class TestBatchOperations:
+    """
+    Test cases for delete_alarms and set_alarms_enabled.
+    """
+
+    def test_delete_alarms_chunks_names(self, client):
+        """
+        Test that 250 names are deleted with 3 calls.
+        """
+        calls = delete_alarms(f'alarm-{index}' for index in range(250))
+
+        assert calls == 3
+        assert [len(call.kwargs['AlarmNames'])
+                for call in client.delete_alarms.call_args_list] == [100, 100, 50]
+
+    def test_disable_updates_rows_and_fingerprints(self, client):
+        """
+        Test that disabling keeps in-sync alarms in sync.
+        """
+        alarms = baker.make(Alarm, is_active=True, _quantity=3)
+        for alarm, payload in compile_alarm_payloads(Alarm.objects.all()):
+            Alarm.objects.filter(pk=alarm.pk).update(fingerprint=alarm_fingerprint(payload))
+
+        calls = set_alarms_enabled(Alarm.objects.all(), False)
+
+        assert calls == 1
+        client.disable_alarm_actions.assert_called_once_with(
+            AlarmNames=sorted(alarm.name for alarm in alarms))
+        for alarm, payload in compile_alarm_payloads(Alarm.objects.all()):
+            assert not alarm.is_active
+            assert alarm.fingerprint == alarm_fingerprint(payload)
+
+    def test_failed_call_keeps_the_state_of_unsent_alarms(self, client):
+        """
+        Test that only the alarms of successful calls are marked disabled.
+        """
+        baker.make(Alarm, is_active=True, _quantity=150)
+        client.disable_alarm_actions.side_effect = [None, RuntimeError('throttled')]
+
+        with pytest.raises(RuntimeError):
+            set_alarms_enabled(Alarm.objects.all(), False)
+
+        assert Alarm.objects.filter(is_active=False).count() == 100
+        assert Alarm.objects.filter(is_active=True).count() == 50
+
+    def test_admin_delete_removes_cloudwatch_alarms_on_commit(
+            self, client, django_capture_on_commit_callbacks):
+        """
+        Test that deleting from the admin deletes the CloudWatch alarms once.
+        """
+        baker.make(Alarm, _quantity=5)
+        alarm_admin = AlarmAdmin(Alarm, AdminSite())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            alarm_admin.delete_queryset(None, Alarm.objects.all())
+
+        assert not Alarm.objects.exists()
+        client.delete_alarms.assert_called_once()
+        assert len(client.delete_alarms.call_args.kwargs['AlarmNames']) == 5
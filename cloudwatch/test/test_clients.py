@@ -0,0 +1,50 @@
+"""
+Test the shared boto3 client factory.
+"""
+import threading
+
+from django.test import override_settings
+
+from cloudwatch.clients import clear_clients, get_client
+
+
+class TestGetClient:
+    """
+    Test cases for get_client.
+    """
+
+    def setup_method(self):
+        clear_clients()
+
+    def test_client_is_cached_per_service_and_region(self):
+        """
+        Test that the same client is returned for the same service and region.
+        """
+        client = get_client('cloudwatch', 'ap-southeast-2')
+
+        assert get_client('cloudwatch', 'ap-southeast-2') is client
+        assert get_client('cloudwatch', 'us-east-1') is not client
+        assert get_client('logs', 'ap-southeast-2') is not client
+
+    def test_client_is_not_shared_between_threads(self):
+        """
+        Test that another thread gets its own client.
+        """
+        client = get_client('cloudwatch', 'ap-southeast-2')
+        other = []
+        thread = threading.Thread(
+            target=lambda: other.append(get_client('cloudwatch', 'ap-southeast-2')))
+        thread.start()
+        thread.join()
+
+        assert other[0] is not client
+
+    @override_settings(AWS_CLIENT_CONFIG={'max_pool_connections': 3, 'read_timeout': 7})
+    def test_client_uses_configured_config(self):
+        """
+        Test that AWS_CLIENT_CONFIG is applied to new clients.
+        """
+        client = get_client('logs', 'ap-southeast-2')
+
+        assert client.meta.config.max_pool_connections == 3
+        assert client.meta.config.read_timeout == 7
@@ -0,0 +1,167 @@
+"""
+Test the GetMetricData collector and the metric store.
+"""
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+import pytest
+from model_bakery import baker
+
+from cloudwatch.collector import Metric, alarm_metrics, collect_metrics
+from cloudwatch.metricstore import DAY, ROW_DTYPE, MetricStore, from_epoch, pick_resolution
+from cloudwatch.models import Alarm, AlermDimension, Dimension
+
+END = 100 * DAY
+
+
+def fake_paginator(pages_per_call=1):
+    """
+    Return a client whose get_metric_data paginator returns the last minute of each query.
+    """
+    client = mock.Mock()
+
+    def paginate(MetricDataQueries, StartTime, EndTime, **kwargs):
+        results = [{'Id': query['Id'], 'Timestamps': [EndTime - timedelta(seconds=60)], 'Values': [1.0]}
+                   for query in MetricDataQueries]
+        size = -(-len(results) // pages_per_call)
+        return [{'MetricDataResults': results[start:start + size]}
+                for start in range(0, len(results), size)]
+
+    client.get_paginator.return_value.paginate.side_effect = paginate
+    return client
+
+
+def test_store_reads_across_days(tmp_path):
+    """
+    Test that rows are split per day, merged and read back by range.
+    """
+    store = MetricStore(tmp_path)
+    rows = np.zeros(3, dtype=ROW_DTYPE)
+    rows['timestamp'] = [DAY - 60, DAY, DAY + 60]
+    rows['sum'] = [1, 2, 3]
+    store.append('key', rows)
+    rows['sum'] = [10, 20, 30]
+    store.append('key', rows[2:])
+
+    assert store.partitions('key') == [0, 1]
+    assert store.read('key', DAY - 60, DAY + 120)['sum'].tolist() == [1, 2, 30]
+    assert store.read('key', DAY, DAY + 60)['timestamp'].tolist() == [DAY]
+    assert store.last_timestamp('key') == DAY + 60
+
+
+def test_rollup_tiers_are_updated_incrementally(tmp_path):
+    """
+    Test that appended minutes are rolled up into every tier.
+    """
+    store = MetricStore(tmp_path)
+    rows = np.zeros(120, dtype=ROW_DTYPE)
+    rows['timestamp'] = np.arange(120) * 60
+    rows['sum'] = rows['count'] = 1
+    rows['min'] = rows['max'] = np.arange(120)
+    store.append('key', rows[:90])
+    store.append('key', rows[90:])
+
+    resolution, hourly = store.query('key', 0, DAY, max_points=24)
+    assert resolution == 3600
+    assert hourly['sum'].tolist() == [60, 60]
+    assert hourly['min'].tolist() == [0, 60]
+    assert hourly['max'].tolist() == [59, 119]
+    _, daily = store.query('key', 0, DAY, resolution=DAY)
+    assert daily['count'].tolist() == [120]
+    resolution, ten_minutes = store.query('key', 0, 3600, resolution=600)
+    assert resolution == 600
+    assert ten_minutes['sum'].tolist() == [10] * 6
+
+
+def test_pick_resolution_uses_coarsest_fitting_tier():
+    """
+    Test that queries read the coarsest tier not coarser than asked.
+    """
+    assert pick_resolution(30) == 60
+    assert pick_resolution(600) == 300
+    assert pick_resolution(7200) == 3600
+    assert pick_resolution(7 * DAY) == DAY
+
+
+@pytest.mark.django_db
+def test_alarm_metrics_are_deduplicated():
+    """
+    Test that alarms on the same metric and dimensions give one metric.
+    """
+    dimension = baker.make(Dimension, name='FunctionName', value='fn')
+    for alarm in baker.make(Alarm, namespace='AWS/Lambda', metric_name='Errors', _quantity=2):
+        baker.make(AlermDimension, alarm=alarm, dimension=dimension)
+
+    metrics = alarm_metrics(Alarm.objects.all())
+
+    assert list(metrics.values()) == [Metric('AWS/Lambda', 'Errors', (('FunctionName', 'fn'),))]
+
+
+class TestCollectMetrics:
+    """
+    Test cases for collect_metrics.
+    """
+
+    def test_batches_500_queries_per_call(self, tmp_path):
+        """
+        Test that 200 metrics with 4 statistics take 2 calls.
+        """
+        metrics = {f'key{index}': Metric('AWS/Lambda', 'Errors', (('FunctionName', f'fn{index}'),))
+                   for index in range(200)}
+        client = fake_paginator()
+
+        with mock.patch('cloudwatch.collector.get_client', return_value=client):
+            stats = collect_metrics(metrics, END, 3600, MetricStore(tmp_path))
+
+        queries = [len(call.kwargs['MetricDataQueries'])
+                   for call in client.get_paginator.return_value.paginate.call_args_list]
+        assert queries == [500, 300]
+        assert stats['datapoints'] == 200
+        row = MetricStore(tmp_path).read('key0', 0, END)[0]
+        assert (row['timestamp'], row['sum'], row['count']) == (END - 60, 1, 1)
+
+    def test_resumes_at_watermark_with_overlap(self, tmp_path):
+        """
+        Test that a run starts shortly before the previous end, and skips up-to-date metrics.
+        """
+        metrics = {'key': Metric('AWS/Lambda', 'Errors', ())}
+        client = fake_paginator(pages_per_call=2)
+
+        with mock.patch('cloudwatch.collector.get_client', return_value=client):
+            collect_metrics(metrics, END, 3600, MetricStore(tmp_path))
+            collect_metrics(metrics, END + 600, 3600, MetricStore(tmp_path))
+            stats = collect_metrics(metrics, END + 600, 3600, MetricStore(tmp_path))
+
+        starts = [call.kwargs['StartTime']
+                  for call in client.get_paginator.return_value.paginate.call_args_list]
+        assert starts == [from_epoch(END - 3600), from_epoch(END - 120)]
+        assert stats['calls'] == 0
+        assert MetricStore(tmp_path).watermark('key') == END + 600
+
+    def test_sparse_metrics_stay_in_one_batch(self, tmp_path):
+        """
+        Test that metrics without datapoints move forward with the others.
+        """
+        metrics = {f'key{index}': Metric('AWS/Lambda', 'Errors', (('FunctionName', f'fn{index}'),))
+                   for index in range(100)}
+        client = fake_paginator()
+        paginate = client.get_paginator.return_value.paginate
+        dense = paginate.side_effect
+
+        def sparse(MetricDataQueries, **kwargs):
+            pages = dense(MetricDataQueries, **kwargs)
+            for page in pages:
+                for result in page['MetricDataResults']:
+                    if int(result['Id'][1:].split('_')[0]) % 2:
+                        result['Timestamps'], result['Values'] = [], []
+            return pages
+
+        paginate.side_effect = sparse
+        with mock.patch('cloudwatch.collector.get_client', return_value=client):
+            collect_metrics(metrics, END, 3600, MetricStore(tmp_path))
+            stats = collect_metrics(metrics, END + 600, 3600, MetricStore(tmp_path))
+
+        assert stats['calls'] == 1
+        assert stats['metrics'] == 100
+        assert paginate.call_args.kwargs['StartTime'] == from_epoch(END - 120)
@@ -0,0 +1,99 @@
+"""
+Test the incremental Lambda function discovery.
+"""
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+
+from cloudwatch.discovery import discover_lambda_functions, upsert_functions
+from cloudwatch.models import AutocompleteToken, Dimension, DiscoveryCheckpoint
+
+
+def arn(region, name):
+    return f'arn:aws:lambda:{region}:058188477434:function:{name}'
+
+
+def fake_pages(listing):
+    """
+    Patch iter_function_pages to return `listing[region]` as one page per item.
+    """
+    return mock.patch('cloudwatch.discovery.iter_function_pages',
+                      side_effect=lambda region: iter(listing[region]))
+
+
+@pytest.mark.django_db
+class TestDiscoverLambdaFunctions:
+    """
+    Test cases for discover_lambda_functions.
+    """
+
+    def test_creates_and_indexes_new_functions(self):
+        """
+        Test that functions of every region become Dimension rows.
+        """
+        listing = {
+            'ap-southeast-2': [[('AnimalGetById', arn('ap-southeast-2', 'AnimalGetById'), 't1')],
+                               [('AnimalList', arn('ap-southeast-2', 'AnimalList'), 't1')]],
+            'us-east-1': [[('AnimalGetById', arn('us-east-1', 'AnimalGetById'), 't1')]],
+        }
+        with fake_pages(listing):
+            stats = discover_lambda_functions(['ap-southeast-2', 'us-east-1'], chunk_size=1)
+
+        assert stats['ap-southeast-2']['created'] == 2
+        assert stats['us-east-1']['created'] == 1
+        # Either region may get the plain name first.
+        assert set(Dimension.objects.values_list('name', flat=True)) in [
+            {'AnimalGetById', 'AnimalList', 'AnimalGetById@us-east-1'},
+            {'AnimalGetById', 'AnimalList', 'AnimalGetById@ap-southeast-2'},
+        ]
+        assert DiscoveryCheckpoint.objects.count() == 2
+        assert AutocompleteToken.objects.filter(token='animallist').exists()
+
+    def test_only_changed_functions_are_updated(self):
+        """
+        Test that a second run only writes functions whose LastModified changed.
+        """
+        baker.make(Dimension, name='Same', value=arn('ap-southeast-2', 'Same'),
+                   last_modified='t1')
+        baker.make(Dimension, name='Changed', value=arn('ap-southeast-2', 'Changed'),
+                   last_modified='t1')
+        listing = {'ap-southeast-2': [[('Same', arn('ap-southeast-2', 'Same'), 't1'),
+                                       ('Changed', arn('ap-southeast-2', 'Changed'), 't2')]]}
+
+        with fake_pages(listing):
+            stats = discover_lambda_functions(['ap-southeast-2'])
+
+        assert stats['ap-southeast-2'] == {
+            'created': 0, 'updated': 1, 'unchanged': 1, 'skipped': 0, 'error': None}
+        assert Dimension.objects.get(name='Changed').last_modified == 't2'
+
+    def test_taken_names_are_not_counted_as_created(self):
+        """
+        Test that a function whose names are both taken is skipped, not created.
+        """
+        baker.make(Dimension, name='Fn', value='manual-1')
+        baker.make(Dimension, name='Fn@us-east-1', value='manual-2')
+        baker.make(Dimension, name='Other', value='manual-3')
+
+        counts = upsert_functions('us-east-1', [('Fn', arn('us-east-1', 'Fn'), 't1'),
+                                                ('Other', arn('us-east-1', 'Other'), 't1')])
+
+        assert counts == (1, 0, 0, 1)
+        assert Dimension.objects.get(value=arn('us-east-1', 'Other')).name == 'Other@us-east-1'
+
+    def test_recent_regions_are_skipped_by_default(self):
+        """
+        Test that the command resumes from the checkpoint unless --force is given.
+        """
+        baker.make(DiscoveryCheckpoint, source=Dimension.SOURCE_LAMBDA, region='us-east-1',
+                   completed_at=timezone.now() - timedelta(minutes=5))
+
+        with fake_pages({'us-east-1': []}) as pages:
+            call_command('discover_lambdas', '--region', 'us-east-1')
+            pages.assert_not_called()
+            call_command('discover_lambdas', '--region', 'us-east-1', '--force')
+            pages.assert_called_once_with('us-east-1')
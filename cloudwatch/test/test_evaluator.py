@@ -0,0 +1,80 @@
+"""
+Test the local alarm evaluator.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from cloudwatch.evaluator import (STATE_ALARM, STATE_INSUFFICIENT_DATA, STATE_OK,
+                                  aggregate, backtest, evaluate)
+from cloudwatch.models import Alarm
+
+nan = np.nan
+A, O, I = STATE_ALARM, STATE_OK, STATE_INSUFFICIENT_DATA
+
+
+def test_aggregate_statistics():
+    """
+    Test that datapoints are bucketed per period with each statistic.
+    """
+    timestamps = [0, 10, 70, 200]
+    values = [1, 3, 5, 7]
+
+    assert aggregate(timestamps, values, 0, 180, 60, Alarm.STATISTIC_SUM).tolist()[:2] == [4, 5]
+    assert aggregate(timestamps, values, 0, 180, 60, Alarm.STATISTIC_AVERAGE)[0] == 2
+    assert aggregate(timestamps, values, 0, 180, 60, Alarm.STATISTIC_MAXIMUM)[0] == 3
+    assert aggregate(timestamps, values, 0, 180, 60, Alarm.STATISTIC_MINIMUM)[0] == 1
+    assert aggregate(timestamps, values, 0, 180, 60, Alarm.STATISTIC_SAMPLE_COUNT)[0] == 2
+    assert np.isnan(aggregate(timestamps, values, 0, 180, 60, Alarm.STATISTIC_SUM)[2])
+
+
+@pytest.mark.parametrize('treat_missing_data, expected', [
+    (Alarm.TREAT_DATA_AS_BREACHING, [I, A, A, A, O, O]),
+    (Alarm.TREAT_DATA_AS_NOTBREACHING, [I, A, O, O, O, O]),
+    (Alarm.TREAT_DATA_AS_MISSING, [I, A, A, I, O, O]),
+    (Alarm.TREAT_DATA_AS_IGNORE, [I, A, A, A, O, O]),
+])
+def test_treat_missing_data(treat_missing_data, expected):
+    """
+    Test the state timeline of each treat_missing_data mode.
+    """
+    series = [5, 5, nan, nan, 1, 1]
+
+    states = evaluate(series, Alarm.THRESHOLD_GREATER_THAN_OR_EQUAL, 5, 2, treat_missing_data)
+
+    assert states.tolist() == expected
+
+
+def test_thresholds_are_evaluated_at_once():
+    """
+    Test that an array of thresholds gives one timeline per threshold.
+    """
+    states = evaluate([1, 2, 3], Alarm.THRESHOLD_GREATER_THAN, [0, 1.5, 5], 1,
+                      Alarm.TREAT_DATA_AS_MISSING)
+
+    assert states.tolist() == [[A, A, A], [O, A, A], [O, O, O]]
+
+
+def test_band_operators_are_rejected():
+    """
+    Test that anomaly detection operators cannot be evaluated locally.
+    """
+    with pytest.raises(ValueError):
+        evaluate([1], Alarm.THRESHOLD_GREATER_THAN_UPPER, 1, 1, Alarm.TREAT_DATA_AS_MISSING)
+
+
+def test_backtest_counts_alarms_per_threshold():
+    """
+    Test that a backtest counts transitions into ALARM per threshold.
+    """
+    alarm = SimpleNamespace(period=60, statistic=Alarm.STATISTIC_MAXIMUM, threshold=10,
+                            comparison_operator=Alarm.THRESHOLD_GREATER_THAN,
+                            evaluation_periods=1, treat_missing_data=Alarm.TREAT_DATA_AS_MISSING)
+    timestamps = np.arange(0, 600, 60)
+    values = [0, 20, 0, 20, 20, 0, 5, 0, 20, 0]
+
+    result = backtest(alarm, timestamps, values, 0, 600, [1, 10, 50])
+
+    assert result.alarms.tolist() == [4, 3, 0]
+    assert result.alarm_periods.tolist() == [5, 4, 0]
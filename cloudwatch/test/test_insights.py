@@ -0,0 +1,352 @@
+"""
+Test the async Logs Insights query service.
+"""
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from cloudwatch.insights import (InsightsQueryError, InsightsTimeout, QueryCache, QueryResult,
+                                 dimension_log_groups, fan_out, normalize_query, run_query,
+                                 sliced_query)
+
+
+MISSING_GROUP = ClientError(
+    {'Error': {'Code': 'ResourceNotFoundException', 'Message': 'Log group does not exist'}},
+    'StartQuery')
+
+
+def logs_client(*statuses):
+    """
+    Return a logs client whose queries report `statuses` in turn.
+    """
+    client = mock.Mock()
+    client.start_query.return_value = {'queryId': 'q1'}
+    client.get_query_results.side_effect = [
+        {'status': status,
+         'results': [[{'field': '@message', 'value': 'boom'}, {'field': '@ptr', 'value': 'x'}]]}
+        for status in statuses]
+    return client
+
+
+@pytest.fixture
+def patch_client():
+    def patch(client):
+        return mock.patch('cloudwatch.insights.get_client', return_value=client)
+    return patch
+
+
+class TestRunQuery:
+    """
+    Test cases for run_query.
+    """
+
+    def test_polls_until_complete(self, patch_client):
+        """
+        Test that the query is polled until it completes.
+        """
+        client = logs_client('Scheduled', 'Running', 'Complete')
+
+        with patch_client(client):
+            result = asyncio.run(run_query(['group'], 'fields @message', 0, 60,
+                                           poll_interval=0.001))
+
+        assert result.rows == [{'@message': 'boom'}]
+        assert client.get_query_results.call_count == 3
+        client.stop_query.assert_not_called()
+
+    def test_timeout_stops_query(self, patch_client):
+        """
+        Test that a query still running at the timeout is stopped.
+        """
+        client = logs_client(*['Running'] * 100)
+
+        with patch_client(client), pytest.raises(InsightsTimeout):
+            asyncio.run(run_query(['group'], 'fields @message', 0, 60,
+                                  timeout=0.05, poll_interval=0.01))
+
+        client.stop_query.assert_called_once_with(queryId='q1')
+
+    def test_cancellation_stops_query(self, patch_client):
+        """
+        Test that cancelling the awaiting task stops the query.
+        """
+        client = logs_client(*['Running'] * 100)
+
+        async def cancel():
+            task = asyncio.create_task(run_query(['group'], 'q', 0, 60, poll_interval=0.01))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with patch_client(client):
+            asyncio.run(cancel())
+
+        client.stop_query.assert_called_once_with(queryId='q1')
+
+    def test_failed_query_raises(self, patch_client):
+        """
+        Test that a failed query raises InsightsQueryError.
+        """
+        with patch_client(logs_client('Failed')), pytest.raises(InsightsQueryError):
+            asyncio.run(run_query(['group'], 'q', 0, 60, poll_interval=0.001))
+
+    def test_refused_start_raises_query_error(self, patch_client):
+        """
+        Test that AWS refusing to start the query raises InsightsQueryError.
+        """
+        client = logs_client('Complete')
+        client.start_query.side_effect = MISSING_GROUP
+
+        with patch_client(client), pytest.raises(InsightsQueryError):
+            asyncio.run(run_query(['missing'], 'q', 0, 60, poll_interval=0.001))
+
+
+def test_dimension_log_groups_by_region():
+    """
+    Test that Lambda ARNs map to their log groups, grouped by region, and
+    that ARNs of other services are left out.
+    """
+    dimensions = [
+        SimpleNamespace(value='arn:aws:lambda:ap-southeast-2:1:function:Animal'),
+        SimpleNamespace(value='arn:aws:lambda:ap-southeast-2:1:function:Animal:live'),
+        SimpleNamespace(value='arn:aws:lambda:us-east-1:1:function:Owner'),
+        SimpleNamespace(value='Plain'),
+        SimpleNamespace(value='arn:aws:ec2:ap-southeast-2:1:instance/i-123'),
+        SimpleNamespace(value='arn:aws:sqs:us-east-1:1:queue'),
+    ]
+
+    assert dimension_log_groups(dimensions) == {
+        'ap-southeast-2': ['/aws/lambda/Animal'],
+        'us-east-1': ['/aws/lambda/Owner'],
+        None: ['/aws/lambda/Plain'],
+    }
+
+
+class TestFanOut:
+    """
+    Test cases for fan_out.
+    """
+
+    def test_packs_log_groups_under_the_concurrency_cap(self, patch_client):
+        """
+        Test that 120 log groups take 3 queries, at most 2 at a time.
+        """
+        running = 0
+        peak = 0
+
+        async def fake_run_query(log_groups, *args, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 * len(log_groups) / 50)
+            running -= 1
+            return QueryResult('q', 'Complete', [{'@log': group} for group in log_groups], {})
+
+        async def collect():
+            return [(len(groups), len(result.rows)) async for groups, result in fan_out(
+                {'ap-southeast-2': [f'/aws/lambda/fn{index}' for index in range(120)]},
+                'q', 0, 60, concurrency=2)]
+
+        with mock.patch('cloudwatch.insights.run_query', side_effect=fake_run_query):
+            batches = asyncio.run(collect())
+
+        assert sorted(batches) == [(20, 20), (50, 50), (50, 50)]
+        assert peak == 2
+
+    def test_stopping_early_cancels_running_queries(self, patch_client):
+        """
+        Test that closing the stream stops the queries still running.
+        """
+        client = logs_client(*['Complete'] + ['Running'] * 100)
+        client.start_query.side_effect = [{'queryId': 'q1'}, {'queryId': 'q2'}]
+
+        async def first():
+            stream = fan_out({None: [f'g{index}' for index in range(100)]}, 'q', 0, 60,
+                             poll_interval=0.01)
+            async for item in stream:
+                await stream.aclose()
+                return item
+
+        with patch_client(client):
+            asyncio.run(first())
+
+        client.stop_query.assert_called_once()
+
+    def test_failed_query_is_reported_for_its_log_groups_only(self):
+        """
+        Test that a missing log group fails its own query and not the others.
+        """
+        clients = {'ap-southeast-2': logs_client('Complete'), 'us-east-1': logs_client()}
+        clients['us-east-1'].start_query.side_effect = MISSING_GROUP
+
+        async def collect():
+            return {groups[0]: result async for groups, result in fan_out(
+                {'ap-southeast-2': ['/aws/lambda/Animal'], 'us-east-1': ['/aws/lambda/Gone']},
+                'q', 0, 60, return_exceptions=True, poll_interval=0.001)}
+
+        with mock.patch('cloudwatch.insights.get_client',
+                        side_effect=lambda service, region=None: clients[region]):
+            results = asyncio.run(collect())
+
+        assert results['/aws/lambda/Animal'].rows == [{'@message': 'boom'}]
+        assert isinstance(results['/aws/lambda/Gone'], InsightsQueryError)
+
+
+class TestSlicedQuery:
+    """
+    Test cases for sliced_query.
+    """
+
+    def test_splits_capped_slices_and_merges_in_order(self):
+        """
+        Test that a dense slice is split until complete and rows come out sorted.
+        """
+        events = sorted([7200 + second for second in range(0, 3600, 100)]
+                        + [10000 + second // 4 for second in range(40)])
+        calls = []
+
+        async def fake_run_query(log_groups, query_string, start, end, limit, **kwargs):
+            calls.append((start, end))
+            matched = [event for event in reversed(events) if start <= event <= end][:limit]
+            rows = [{'@timestamp': datetime.fromtimestamp(event, timezone.utc).strftime(
+                '%Y-%m-%d %H:%M:%S.000'), '@message': str(event)} for event in matched]
+            return QueryResult('q', 'Complete', rows, {})
+
+        async def collect():
+            return [row['@message'] async for row in sliced_query(
+                ['group'], 'fields @timestamp, @message', 0, 7 * 86400, concurrency=4)]
+
+        with mock.patch('cloudwatch.insights.RESULT_LIMIT', 10), \
+                mock.patch('cloudwatch.insights.run_query', side_effect=fake_run_query):
+            messages = asyncio.run(collect())
+
+        assert messages == [str(event) for event in events]
+        assert len(calls) > 8
+
+    def test_too_many_rows_in_one_second_raises(self):
+        """
+        Test that a second holding more rows than the cap is reported.
+        """
+        async def fake_run_query(log_groups, query_string, start, end, limit, **kwargs):
+            return QueryResult('q', 'Complete', [{'@timestamp': '1970-01-01 00:00:00.000'}] * limit, {})
+
+        async def collect():
+            return [row async for row in sliced_query(['group'], 'q', 0, 4, slice_seconds=4)]
+
+        with mock.patch('cloudwatch.insights.run_query', side_effect=fake_run_query), \
+                pytest.raises(InsightsQueryError):
+            asyncio.run(collect())
+
+
+class TestQueryCache:
+    """
+    Test cases for QueryCache.
+    """
+
+    def test_concurrent_identical_requests_share_one_query(self):
+        """
+        Test that identical requests in the same bucket start one query.
+        """
+        cache = QueryCache(bucket_seconds=60)
+        calls = []
+
+        async def fake_run_query(log_groups, query_string, start, end, **kwargs):
+            calls.append((start, end))
+            await asyncio.sleep(0.01)
+            return QueryResult('q', 'Complete', [{'@message': 'boom'}], {})
+
+        async def requests():
+            return await asyncio.gather(
+                cache.run(['b', 'a'], 'fields  @message', 61, 170),
+                cache.run(['a', 'b'], 'fields @message', 70, 179),
+                cache.run(['a', 'b'], 'fields @message', 100, 150))
+
+        with mock.patch('cloudwatch.insights.run_query', side_effect=fake_run_query):
+            results = asyncio.run(requests())
+            asyncio.run(cache.run(['a', 'b'], 'fields @message', 61, 170))
+
+        assert calls == [(60, 180)]
+        assert results[0] is results[1] is results[2]
+
+    def test_limit_is_part_of_the_key(self):
+        """
+        Test that requests with different limits do not share a result.
+        """
+        cache = QueryCache()
+        calls = []
+
+        async def fake_run_query(log_groups, query_string, start, end, limit=None, **kwargs):
+            calls.append(limit)
+            return QueryResult('q', 'Complete', [{'@message': 'boom'}] * limit, {})
+
+        with mock.patch('cloudwatch.insights.run_query', side_effect=fake_run_query):
+            first = asyncio.run(cache.run(['a'], 'q', 0, 60, limit=1))
+            second = asyncio.run(cache.run(['a'], 'q', 0, 60, limit=100))
+
+        assert calls == [1, 100]
+        assert (len(first.rows), len(second.rows)) == (1, 100)
+
+    def test_whitespace_in_quotes_is_kept(self):
+        """
+        Test that only whitespace outside quoted strings and regexes is normalized.
+        """
+        assert normalize_query(' fields  @message\n| filter @message like "a  b" ') == \
+            'fields @message | filter @message like "a  b"'
+        assert normalize_query("filter x = 'a  \\' b'  | filter y like /c  d/") == \
+            "filter x = 'a  \\' b' | filter y like /c  d/"
+        assert QueryCache().key(['a'], 'filter x = "a b"', 0, 60) != \
+            QueryCache().key(['a'], 'filter x = "a  b"', 0, 60)
+
+    def test_ttl_expires_entries(self):
+        """
+        Test that an expired entry is not returned.
+        """
+        now = [0]
+        cache = QueryCache(ttl=10, clock=lambda: now[0])
+        key = cache.key(['a'], 'q', 0, 60)
+        cache.put(key, QueryResult('q', 'Complete', [], {}))
+
+        assert cache.get(key) is not None
+        now[0] = 10
+        assert cache.get(key) is None
+
+    def test_lru_eviction_respects_memory_cap(self):
+        """
+        Test that the least recently used entries are evicted past max_bytes.
+        """
+        result = QueryResult('q', 'Complete', [{'@message': 'x' * 100}], {})
+        cache = QueryCache(max_bytes=300)
+        keys = [cache.key([group], 'q', 0, 60) for group in 'abc']
+        cache.put(keys[0], result)
+        cache.put(keys[1], result)
+        cache.get(keys[0])
+        cache.put(keys[2], result)
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.size <= 300
+
+    def test_failure_is_shared_and_not_cached(self):
+        """
+        Test that waiters get the error of the shared query and nothing is cached.
+        """
+        cache = QueryCache()
+
+        async def failing_run_query(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            raise InsightsQueryError('Failed')
+
+        async def requests():
+            return await asyncio.gather(cache.run(['a'], 'q', 0, 60), cache.run(['a'], 'q', 0, 60),
+                                        return_exceptions=True)
+
+        with mock.patch('cloudwatch.insights.run_query', side_effect=failing_run_query):
+            errors = asyncio.run(requests())
+
+        assert all(isinstance(error, InsightsQueryError) for error in errors)
+        assert cache.get(cache.key(['a'], 'q', 0, 60)) is None
@@ -49,3 +49,19 @@ class TestAlerModel(TestCase):
         alert_instance = baker.make(Alarm, statistic=Alarm.STATISTIC_AVERAGE, comparison_operator=Alarm.THRESHOLD_GREATER_THAN_OR_EQUAL,
                                     period=10, metric_name='Errors', treat_missing_data=Alarm.TREAT_DATA_AS_MISSING)
         assert alert_instance.pk > 0
+
+
+class TestAlertSourceArnFields(TestCase):
+
+    def test_arn_is_parsed_on_save(self):
+        alert = baker.make(
+            AlertSource, value='arn:aws:lambda:ap-southeast-2:058188477434:function:ErrorLogFunctionPython')
+
+        assert (alert.partition, alert.service, alert.region, alert.account_id, alert.resource) == (
+            'aws', 'lambda', 'ap-southeast-2', '058188477434', 'function:ErrorLogFunctionPython')
+        assert AlertSource.objects.filter(account_id='058188477434', service='lambda').get() == alert
+
+    def test_invalid_arn_leaves_fields_empty(self):
+        alert = baker.make(AlertSource, value='invalid arn')
+
+        assert alert.account_id == ''
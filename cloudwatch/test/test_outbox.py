@@ -0,0 +1,65 @@
+"""
+Test the CloudWatch alarm outbox.
+"""
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from cloudwatch.models import AlarmOutbox
+from cloudwatch.outbox import drain_outbox, enqueue_alarm
+
+
+@pytest.mark.django_db
+class TestAlarmOutbox:
+    """
+    Test cases for enqueue_alarm and drain_outbox.
+    """
+
+    def test_repeated_edits_are_coalesced(self, alarm_model_instance):
+        """
+        Test that ten edits queue one row and produce one API call.
+        """
+        for _ in range(10):
+            enqueue_alarm(alarm_model_instance)
+        client = mock.Mock()
+
+        with mock.patch('cloudwatch.outbox.get_client', return_value=client):
+            stats = drain_outbox()
+
+        assert stats['pushed'] == 1
+        client.put_metric_alarm.assert_called_once()
+        assert not AlarmOutbox.objects.exists()
+
+    def test_failed_push_is_retried_later(self, alarm_model_instance):
+        """
+        Test that a failed push stays pending with a later available_at.
+        """
+        enqueue_alarm(alarm_model_instance)
+        client = mock.Mock()
+        client.put_metric_alarm.side_effect = RuntimeError('throttled')
+
+        with mock.patch('cloudwatch.outbox.get_client', return_value=client):
+            stats = drain_outbox()
+
+        row = AlarmOutbox.objects.get()
+        assert stats['retried'] == 1
+        assert row.status == AlarmOutbox.STATUS_PENDING
+        assert row.attempts == 1
+        assert row.last_error == 'throttled'
+        assert row.available_at > timezone.now()
+
+    def test_row_is_dead_lettered_after_max_attempts(self, alarm_model_instance):
+        """
+        Test that a row becomes DEAD once it reaches max_attempts.
+        """
+        enqueue_alarm(alarm_model_instance)
+        AlarmOutbox.objects.update(attempts=2)
+        client = mock.Mock()
+        client.put_metric_alarm.side_effect = RuntimeError('denied')
+
+        with mock.patch('cloudwatch.outbox.get_client', return_value=client):
+            stats = drain_outbox(max_attempts=3)
+
+        assert stats['dead'] == 1
+        assert AlarmOutbox.objects.get().status == AlarmOutbox.STATUS_DEAD
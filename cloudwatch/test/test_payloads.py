@@ -0,0 +1,63 @@
+"""
+Test the set-based PutMetricAlarm payload compiler.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from cloudwatch.models import Alarm, AlarmAction, AlermDimension, AlertSource, Dimension
+from cloudwatch.payloads import compile_alarm_payloads
+
+
+def make_alarms(count):
+    """
+    Create `count` alarms with two actions and three dimensions each.
+    """
+    ok_source = baker.make(AlertSource, value='arn:aws:sns:ap-southeast-2:058188477434:Ok')
+    alarm_source = baker.make(AlertSource, value='arn:aws:sns:ap-southeast-2:058188477434:Alarm')
+    for _ in range(count):
+        alarm = baker.make(Alarm)
+        baker.make(AlarmAction, alarm=alarm, arn=ok_source, action=AlarmAction.ACTION_OK)
+        baker.make(AlarmAction, alarm=alarm, arn=alarm_source, action=AlarmAction.ACTION_ALARM)
+        for dimension in baker.make(Dimension, _quantity=3):
+            baker.make(AlermDimension, alarm=alarm, dimension=dimension)
+
+
+def count_queries(queryset):
+    """
+    Return the number of queries run to compile `queryset`.
+    """
+    with CaptureQueriesContext(connection) as context:
+        compile_alarm_payloads(queryset)
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestCompileAlarmPayloads:
+    """
+    Test cases for compile_alarm_payloads.
+    """
+
+    def test_query_count_does_not_grow_with_alarms(self):
+        """
+        Test that 1 and 25 alarms are compiled with the same number of queries.
+        """
+        make_alarms(1)
+        single = count_queries(Alarm.objects.all())
+        make_alarms(24)
+        many = count_queries(Alarm.objects.all())
+
+        assert single == many == 3
+
+    def test_payload_contains_actions_and_dimensions(self):
+        """
+        Test that actions are split by type and dimensions are included.
+        """
+        make_alarms(1)
+
+        [(_, payload)] = compile_alarm_payloads(Alarm.objects.all())
+
+        assert payload['OKActions'] == ['arn:aws:sns:ap-southeast-2:058188477434:Ok']
+        assert payload['AlarmActions'] == ['arn:aws:sns:ap-southeast-2:058188477434:Alarm']
+        assert len(payload['Dimensions']) == 3
@@ -0,0 +1,135 @@
+"""
+Test the cross-process AWS rate limiter.
+"""
+from unittest import mock
+
+import pytest
+from botocore.awsrequest import AWSResponse
+
+from cloudwatch.clients import clear_clients, get_client
+from cloudwatch.ratelimit import DatabaseBackend, FileBackend, RateLimiter
+
+
+class FakeClock:
+    """
+    Clock that only advances when the limiter sleeps.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return RateLimiter(FileBackend(str(tmp_path)), {'cloudwatch.PutMetricAlarm': 2},
+                       clock=clock.time, sleep=clock.sleep)
+
+
+class TestRateLimiter:
+    """
+    Test cases for RateLimiter with the file backend.
+    """
+
+    def test_burst_then_wait(self, limiter, clock):
+        """
+        Test that calls beyond the bucket size wait for a refill.
+        """
+        for _ in range(4):
+            limiter.acquire('cloudwatch', 'PutMetricAlarm', 'ap-southeast-2')
+
+        assert sum(clock.slept) == pytest.approx(1.0)
+
+    def test_unlimited_operation_never_waits(self, limiter, clock):
+        """
+        Test that operations without a limit are not throttled.
+        """
+        for _ in range(10):
+            limiter.acquire('cloudwatch', 'DescribeAlarms')
+
+        assert not clock.slept
+
+    def test_throttling_halves_the_rate(self, limiter, clock):
+        """
+        Test that a throttling error slows the bucket down.
+        """
+        limiter.throttled('cloudwatch', 'PutMetricAlarm', 'ap-southeast-2')
+        limiter.acquire('cloudwatch', 'PutMetricAlarm', 'ap-southeast-2')
+
+        assert sum(clock.slept) == pytest.approx(1.0, rel=0.05)
+
+    def test_state_is_shared_between_limiters(self, tmp_path, clock):
+        """
+        Test that two limiters on the same directory share one bucket.
+        """
+        limits = {'logs.StartQuery': 1}
+        first = RateLimiter(FileBackend(str(tmp_path)), limits, clock.time, clock.sleep)
+        second = RateLimiter(FileBackend(str(tmp_path)), limits, clock.time, clock.sleep)
+
+        first.acquire('logs', 'StartQuery')
+        second.acquire('logs', 'StartQuery')
+
+        assert sum(clock.slept) == pytest.approx(1.0)
+
+
+@pytest.mark.django_db
+class TestDatabaseBackend:
+    """
+    Test cases for RateLimiter with the database backend.
+    """
+
+    def test_burst_then_wait(self, clock):
+        """
+        Test that the database backend enforces the same limit.
+        """
+        limiter = RateLimiter(DatabaseBackend(), {'logs.StartQuery': 1},
+                              clock=clock.time, sleep=clock.sleep)
+        limiter.acquire('logs', 'StartQuery')
+        limiter.acquire('logs', 'StartQuery')
+
+        assert sum(clock.slept) == pytest.approx(1.0)
+
+
+class TestClientHooks:
+    """
+    Test that clients from get_client go through the limiter.
+    """
+
+    def test_every_attempt_acquires_a_token(self, monkeypatch):
+        """
+        Test that the retries after throttling also take a token, and slow the bucket.
+        """
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+        clear_clients()
+        client = get_client('logs', 'ap-southeast-2')
+        limiter = mock.Mock()
+        bodies = [b'{"__type": "ThrottlingException", "message": "Rate exceeded"}',
+                  b'{"logGroups": []}']
+
+        def send(request, **kwargs):
+            body = bodies.pop(0)
+            raw = mock.Mock(stream=mock.Mock(return_value=iter([body])))
+            return AWSResponse(request.url, 400 if bodies else 200, {}, raw)
+
+        client.meta.events.register('before-send', send)
+        with mock.patch('cloudwatch.ratelimit.get_rate_limiter', return_value=limiter), \
+                mock.patch('time.sleep'):
+            client.describe_log_groups()
+        clear_clients()
+
+        assert limiter.acquire.call_args_list == [
+            mock.call('logs', 'DescribeLogGroups', 'ap-southeast-2')] * 2
+        limiter.throttled.assert_called_once_with('logs', 'DescribeLogGroups', 'ap-southeast-2')
@@ -0,0 +1,108 @@
+"""
+Test the drift reconciliation between Alarm rows and CloudWatch.
+"""
+from unittest import mock
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from django.core.management import CommandError, call_command
+from model_bakery import baker
+
+from cloudwatch.models import Alarm
+from cloudwatch.reconcile import (DRIFTED, EXTRA, MISSING, build_desired_state,
+                                  iter_remote_alarms, reconcile)
+
+
+def remote_alarm(alarm, **changes):
+    """
+    Build the DescribeAlarms entry CloudWatch would return for `alarm`.
+    """
+    entry = {
+        'AlarmName': alarm.name,
+        'AlarmDescription': alarm.description,
+        'MetricName': alarm.metric_name,
+        'Namespace': alarm.namespace,
+        'Statistic': alarm.statistic,
+        'ComparisonOperator': alarm.comparison_operator,
+        'Threshold': float(alarm.threshold),
+        'Period': alarm.period,
+        'EvaluationPeriods': alarm.evaluation_periods,
+        'OKActions': [],
+        'AlarmActions': [],
+        'Dimensions': [],
+        'ActionsEnabled': alarm.is_active,
+        'TreatMissingData': alarm.treat_missing_data,
+    }
+    entry.update(changes)
+    return entry
+
+
+@pytest.mark.django_db
+class TestReconcile:
+    """
+    Test cases for reconcile and iter_remote_alarms.
+    """
+
+    def test_classifies_missing_extra_and_drifted(self):
+        """
+        Test that each kind of difference is reported once.
+        """
+        in_sync = baker.make(Alarm, name='in-sync', treat_missing_data='missing')
+        drifted = baker.make(Alarm, name='drifted', threshold=5, treat_missing_data='missing')
+        baker.make(Alarm, name='missing')
+        desired, _ = build_desired_state(Alarm.objects.all())
+
+        remote = [
+            remote_alarm(in_sync),
+            remote_alarm(drifted, Threshold=10.0),
+            {'AlarmName': 'extra'},
+        ]
+        result = [(kind, name, fields)
+                  for kind, name, _, _, fields in reconcile(desired, remote)]
+
+        assert result == [
+            (DRIFTED, 'drifted', ['Threshold']),
+            (EXTRA, 'extra', []),
+            (MISSING, 'missing', []),
+        ]
+
+    def test_remote_alarms_are_paged(self):
+        """
+        Test that every DescribeAlarms page is streamed.
+        """
+        client = boto3.client('cloudwatch', region_name='ap-southeast-2')
+        with Stubber(client) as stubber:
+            stubber.add_response('describe_alarms',
+                                 {'MetricAlarms': [{'AlarmName': 'a'}], 'NextToken': 'page-2'})
+            stubber.add_response('describe_alarms', {'MetricAlarms': [{'AlarmName': 'b'}]})
+
+            names = [alarm['AlarmName'] for alarm in iter_remote_alarms(client)]
+
+        assert names == ['a', 'b']
+
+    def test_delete_extra_requires_prefix(self):
+        """
+        Test that --delete-extra without --prefix is refused before any call.
+        """
+        with mock.patch('cloudwatch.management.commands.reconcile_alarms.get_client') as get_client, \
+                pytest.raises(CommandError):
+            call_command('reconcile_alarms', '--delete-extra')
+
+        get_client.assert_not_called()
+
+    def test_extra_alarms_are_deleted_after_listing(self):
+        """
+        Test that extra alarms are deleted once every page was read.
+        """
+        client = boto3.client('cloudwatch', region_name='ap-southeast-2')
+        with Stubber(client) as stubber, mock.patch(
+                'cloudwatch.management.commands.reconcile_alarms.get_client', return_value=client):
+            stubber.add_response('describe_alarms',
+                                 {'MetricAlarms': [{'AlarmName': 'app-a'}], 'NextToken': 'page-2'})
+            stubber.add_response('describe_alarms', {'MetricAlarms': [{'AlarmName': 'app-b'}]})
+            stubber.add_response('delete_alarms', {}, {'AlarmNames': ['app-a', 'app-b']})
+
+            call_command('reconcile_alarms', '--prefix', 'app-', '--delete-extra')
+
+            stubber.assert_no_pending_responses()
@@ -0,0 +1,81 @@
+"""
+Test the sync_alarms management command.
+"""
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from cloudwatch.models import Alarm, AlarmAction, AlermDimension, AlertSource, Dimension
+
+
+@pytest.fixture
+def alarms():
+    """
+    Fixture creating active alarms with one action and one dimension each.
+    """
+    source = baker.make(
+        AlertSource, value='arn:aws:sns:ap-southeast-2:058188477434:LambdaErrorMetrix')
+    created = []
+    for index in range(3):
+        alarm = baker.make(Alarm, name=f'alarm-{index}', namespace=Alarm.NAMESPACE_LAMBDA,
+                           is_active=True)
+        baker.make(AlarmAction, alarm=alarm, arn=source, action=AlarmAction.ACTION_ALARM)
+        baker.make(AlermDimension, alarm=alarm, dimension=baker.make(Dimension))
+        created.append(alarm)
+    return created
+
+
+@pytest.mark.django_db
+class TestSyncAlarms:
+    """
+    Test cases for the sync_alarms command.
+    """
+
+    def test_pushes_every_active_alarm(self, alarms):
+        """
+        Test that each active alarm is sent once.
+        """
+        baker.make(Alarm, is_active=False)
+        client = mock.Mock()
+        out = StringIO()
+
+        with mock.patch('cloudwatch.management.commands.sync_alarms.get_client',
+                        return_value=client):
+            call_command('sync_alarms', concurrency=2, stdout=out)
+
+        names = sorted(call.kwargs['AlarmName']
+                       for call in client.put_metric_alarm.call_args_list)
+        assert names == ['alarm-0', 'alarm-1', 'alarm-2']
+        assert 'Synced 3/3 alarms' in out.getvalue()
+
+    def test_filters_by_alarm_id(self, alarms):
+        """
+        Test that --alarm-id limits the alarms that are sent.
+        """
+        client = mock.Mock()
+
+        with mock.patch('cloudwatch.management.commands.sync_alarms.get_client',
+                        return_value=client):
+            call_command('sync_alarms', alarm_id=[alarms[1].pk], stdout=StringIO())
+
+        client.put_metric_alarm.assert_called_once()
+        assert client.put_metric_alarm.call_args.kwargs['AlarmName'] == 'alarm-1'
+
+    def test_skips_unchanged_alarms(self, alarms):
+        """
+        Test that a second run does not push alarms that did not change.
+        """
+        client = mock.Mock()
+
+        with mock.patch('cloudwatch.management.commands.sync_alarms.get_client',
+                        return_value=client):
+            call_command('sync_alarms', stdout=StringIO())
+            Alarm.objects.filter(pk=alarms[0].pk).update(threshold=99)
+            client.reset_mock()
+            call_command('sync_alarms', stdout=StringIO())
+
+        client.put_metric_alarm.assert_called_once()
+        assert client.put_metric_alarm.call_args.kwargs['AlarmName'] == 'alarm-0'
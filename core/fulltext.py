@@ -0,0 +1,148 @@
+"""
+Full-text indexes on text columns, for MySQL, SQLite and PostgreSQL.
+
+- MySQL: an InnoDB FULLTEXT index, queried in boolean mode.
+- SQLite: an external-content FTS5 table named `<table>_fts`, kept in sync
+  with the table by triggers.
+- PostgreSQL: a GIN index on `to_tsvector('simple', column)`.
+
+All three are updated by the database as rows are inserted, so new rows are
+searchable right away, and a search reads the index instead of scanning the
+table. Other databases fall back to LIKE filters.
+
+`create_fulltext_index` and `drop_fulltext_index` give the DDL of each
+database. Migrations copy it instead of importing them, so a later change
+here does not change an applied migration. On SQLite, a migration that
+rebuilds the table (most AlterField operations) drops the triggers, so it
+must create the index again.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def index_name(table, column):
+    """
+    Return the name of the full-text index of `column`.
+    """
+
+    return f'{table}_{column}_fulltext'
+
+
+def fts_table(table):
+    """
+    Return the name of the SQLite FTS5 table of `table`.
+    """
+
+    return f'{table}_fts'
+
+
+def create_fulltext_index(schema_editor, table, column):
+    """
+    Create the full-text index of `column`, from a RunPython operation.
+    """
+
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    if vendor == 'mysql':
+        schema_editor.execute(
+            f'ALTER TABLE {quote(table)} ADD FULLTEXT INDEX '
+            f'{quote(index_name(table, column))} ({quote(column)})')
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {quote(index_name(table, column))} ON {quote(table)} '
+            f"USING GIN (to_tsvector('simple', {quote(column)}))")
+    elif vendor == 'sqlite':
+        drop_fulltext_index(schema_editor, table, column)
+        fts = quote(fts_table(table))
+        column = quote(column)
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {fts} USING fts5({column}, '
+            f"content='{table}', content_rowid='rowid')")
+        schema_editor.execute(
+            f'CREATE TRIGGER {quote(table + "_fts_insert")} AFTER INSERT ON {quote(table)} BEGIN '
+            f'INSERT INTO {fts}(rowid, {column}) VALUES (new.rowid, new.{column}); END')
+        schema_editor.execute(
+            f'CREATE TRIGGER {quote(table + "_fts_delete")} AFTER DELETE ON {quote(table)} BEGIN '
+            f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.rowid, old.{column}); END")
+        schema_editor.execute(
+            f'CREATE TRIGGER {quote(table + "_fts_update")} AFTER UPDATE OF {column} '
+            f'ON {quote(table)} BEGIN '
+            f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.rowid, old.{column}); "
+            f'INSERT INTO {fts}(rowid, {column}) VALUES (new.rowid, new.{column}); END')
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def drop_fulltext_index(schema_editor, table, column):
+    """
+    Drop the full-text index of `column`, from a RunPython operation.
+    """
+
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    if vendor == 'mysql':
+        schema_editor.execute(
+            f'ALTER TABLE {quote(table)} DROP INDEX {quote(index_name(table, column))}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {quote(index_name(table, column))}')
+    elif vendor == 'sqlite':
+        for suffix in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {quote(f"{table}_fts_{suffix}")}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {quote(fts_table(table))}')
+
+
+def search_words(text):
+    """
+    Return the words of a search text, lowercased.
+    """
+
+    return [word.lower() for word in WORD_PATTERN.findall(text)]
+
+
+def filter_fulltext(queryset, column, text):
+    """
+    Filter `queryset` to rows whose `column` contains every word of `text`.
+
+    Each word also matches as a prefix, e.g. 'time' matches 'timeout'.
+
+    Parameters:
+    - queryset: A queryset of the model owning the indexed column.
+    - column: The indexed column name.
+    - text: The text typed by the user.
+
+    Returns:
+    - QuerySet: The filtered queryset.
+    """
+
+    words = search_words(text)
+    if not words:
+        return queryset
+
+    model = queryset.model
+    table = model._meta.db_table
+    quote = connection.ops.quote_name
+    pk = quote(model._meta.pk.column)
+
+    if connection.vendor == 'mysql':
+        match = ' '.join(f'+{word}*' for word in words)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT {pk} FROM {quote(table)} '
+            f'WHERE MATCH({quote(column)}) AGAINST (%s IN BOOLEAN MODE)', [match]))
+    if connection.vendor == 'postgresql':
+        match = ' & '.join(f'{word}:*' for word in words)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT {pk} FROM {quote(table)} '
+            f"WHERE to_tsvector('simple', {quote(column)}) @@ to_tsquery('simple', %s)", [match]))
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{word}"*' for word in words)
+        fts = quote(fts_table(table))
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT {pk} FROM {quote(table)} WHERE rowid IN '
+            f'(SELECT rowid FROM {fts} WHERE {fts} MATCH %s)', [match]))
+
+    for word in words:
+        queryset = queryset.filter(**{f'{column}__icontains': word})
+    return queryset
@@ -0,0 +1,82 @@
+"""
+Keyset pagination for large, append-mostly tables.
+
+Pages are requested with an opaque cursor holding the sort key of the last
+row of the previous page, instead of an OFFSET, so reading page 1000 costs
+the same index range scan as reading page 1.
+"""
+import base64
+import json
+from collections import namedtuple
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+def encode_cursor(values):
+    """
+    Encode the sort key values of a row as a URL-safe string.
+    """
+
+    encoded = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value
+                          for value in values])
+    return base64.urlsafe_b64encode(encoded.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by `encode_cursor`.
+
+    Raises:
+    - ValueError: If the cursor is not valid.
+    """
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError) as error:
+        raise ValueError('Invalid cursor.') from error
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor.')
+    return [parse_datetime(value) or value if isinstance(value, str) else value
+            for value in values]
+
+
+def keyset_page(queryset, fields, cursor=None, limit=50):
+    """
+    Return one page of `queryset` in descending order of `fields`.
+
+    Parameters:
+    - queryset: The queryset to paginate.
+    - fields: Field names forming a unique sort key, e.g. ['timestamp', 'id'].
+    - cursor: The `next_cursor` of the previous page, or None for the first page.
+    - limit: Rows per page.
+
+    Returns:
+    - Page: The rows and the cursor of the next page, None on the last page.
+
+    Raises:
+    - ValueError: If the cursor is not valid.
+    """
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise ValueError('Invalid cursor.')
+        after = Q()
+        for index, field in enumerate(fields):
+            condition = Q(**{f'{field}__lt': values[index]})
+            for previous, value in zip(fields[:index], values):
+                condition &= Q(**{previous: value})
+            after |= condition
+        queryset = queryset.filter(after)
+
+    limit = max(limit, 0)
+    items = list(queryset.order_by(*[f'-{field}' for field in fields])[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        if items:
+            next_cursor = encode_cursor([getattr(items[-1], field) for field in fields])
+    return Page(items, next_cursor)
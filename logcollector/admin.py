@@ -0,0 +1,37 @@
+"""
+Admin configuration for the ingested error events and their cursors.
+"""
+from django.contrib import admin
+
+from .models import ErrorEvent, LogCursor
+
+
+@admin.register(ErrorEvent)
+class ErrorEventAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for ErrorEvent rows, which are written by `ingest_errors`.
+    """
+
+    list_display = ['timestamp', 'log_group', 'dimension', 'message']
+    list_filter = ['dimension']
+    list_select_related = ['dimension']
+    date_hierarchy = 'timestamp'
+
+    def has_add_permission(self, *kwargs):
+        return False
+
+    def has_change_permission(self, *kwargs):
+        return False
+
+
+@admin.register(LogCursor)
+class LogCursorAdmin(admin.ModelAdmin):
+    """
+    Admin to inspect how far each log group was ingested.
+    """
+
+    list_display = ['log_group', 'region', 'last_timestamp', 'updated_at']
+    readonly_fields = ['event_ids', 'updated_at']
+
+    def has_add_permission(self, *kwargs):
+        return False
@@ -0,0 +1,57 @@
+"""
+Row generators for exporting error events and bugs, see `core.export`.
+"""
+from django.db.models import Prefetch
+
+from bugmanager.models import BugOwner
+from core.export import CHUNK_SIZE, iter_chunks
+
+EVENT_FIELDS = ['id', 'timestamp', 'log_group', 'log_stream', 'event_id', 'dimension',
+                'fingerprint', 'message']
+BUG_FIELDS = ['bug_id', 'dimension', 'resolved', 'occurrences', 'first_seen', 'last_seen',
+              'created_at', 'owners', 'message']
+
+
+def error_event_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yield a dict of EVENT_FIELDS per ErrorEvent, with its Dimension joined.
+    """
+
+    queryset = queryset.select_related('dimension')
+    for chunk in iter_chunks(queryset, chunk_size):
+        for event in chunk:
+            yield {
+                'id': event.pk,
+                'timestamp': event.timestamp,
+                'log_group': event.log_group,
+                'log_stream': event.log_stream,
+                'event_id': event.event_id,
+                'dimension': event.dimension.name if event.dimension else None,
+                'fingerprint': event.fingerprint,
+                'message': event.message,
+            }
+
+
+def bug_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yield a dict of BUG_FIELDS per Bug.
+
+    The Dimension is joined in the query, and the owners of each chunk of
+    bugs are loaded with one more query per chunk.
+    """
+
+    queryset = queryset.select_related('dimension').prefetch_related(
+        Prefetch('developers', queryset=BugOwner.objects.select_related('user__user')))
+    for chunk in iter_chunks(queryset, chunk_size):
+        for bug in chunk:
+            yield {
+                'bug_id': bug.bug_id,
+                'dimension': bug.dimension.name,
+                'resolved': bug.resolved,
+                'occurrences': bug.occurrences,
+                'first_seen': bug.first_seen,
+                'last_seen': bug.last_seen,
+                'created_at': bug.created_at,
+                'owners': ';'.join(owner.user.user.username for owner in bug.developers.all()),
+                'message': bug.message,
+            }
@@ -0,0 +1,184 @@
+"""
+Checkpointed, incremental ingestion of error events from CloudWatch Logs.
+
+Events are pulled per log group with FilterLogEvents, starting at the
+LogCursor of the group, and streamed page by page into ErrorEvent rows
+inserted in chunks. Each chunk is inserted in the same transaction as the
+cursor update, so an interrupted run resumes at the last stored event
+without skipping or duplicating events. Events at the cursor timestamp
+that were already stored are recognized by their event ids.
+
+Events are fingerprinted, and when a BugAggregator is given the events
+its chunk actually inserted are counted and their Bug occurrences upserted
+in the transaction of the chunk, so bugs are counted exactly once too.
+"""
+from datetime import datetime, timezone
+
+from django.db import transaction
+from django.db.models import Max
+
+from bugmanager.fingerprints import fingerprint
+from cloudwatch.clients import get_client
+from cloudwatch.insights import lambda_log_group
+from cloudwatch.models import Dimension
+from .models import ErrorEvent, LogCursor
+
+CHUNK_SIZE = 500
+ERROR_FILTER_PATTERN = '?ERROR ?Error ?Exception'
+
+
+def iter_log_events(log_group, start, filter_pattern=ERROR_FILTER_PATTERN, region=None):
+    """
+    Yield the events of `log_group` matching `filter_pattern` from `start` on.
+
+    Parameters:
+    - log_group: The log group name.
+    - start: Epoch milliseconds of the first event, inclusive.
+    - filter_pattern: A CloudWatch Logs filter pattern.
+    - region: The AWS region of the log group.
+
+    Yields:
+    - dict: FilterLogEvents events, page after page.
+    """
+
+    paginator = get_client('logs', region).get_paginator('filter_log_events')
+    for page in paginator.paginate(logGroupName=log_group, startTime=start,
+                                   filterPattern=filter_pattern):
+        yield from page.get('events', [])
+
+
+def dimension_ids_by_log_group():
+    """
+    Return a dict of Lambda log group name to Dimension id.
+    """
+
+    log_groups = {}
+    for dimension in Dimension.objects.only('pk', 'value'):
+        location = lambda_log_group(dimension)
+        if location is not None:
+            log_groups[location[1]] = dimension.pk
+    return log_groups
+
+
+def build_event(log_group, log_stream, event_id, timestamp, message, dimension_id=None):
+    """
+    Return an unsaved ErrorEvent.
+
+    Parameters:
+    - log_group, log_stream: Where the event was logged.
+    - event_id: The CloudWatch Logs event id.
+    - timestamp: Epoch milliseconds of the event.
+    - message: The log message.
+    - dimension_id: The Dimension id of the log group, if known.
+
+    Returns:
+    - ErrorEvent: The event, with its fingerprint.
+    """
+
+    return ErrorEvent(
+        log_group=log_group,
+        log_stream=log_stream,
+        event_id=event_id,
+        timestamp=datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc),
+        message=message,
+        dimension_id=dimension_id,
+        fingerprint=fingerprint(message),
+    )
+
+
+def insert_events(events, aggregator=None, batch_size=None):
+    """
+    Insert the events that are not stored yet and count them into `aggregator`.
+
+    Events already stored, e.g. by a retried push or by the polling worker,
+    are skipped by the insert. The rows this insert created are then read
+    back as the rows of its keys with a primary key above the largest one
+    seen before it, and only those are counted, so a skipped duplicate never
+    adds a Bug occurrence. Call it in a transaction, with the aggregator
+    flush after it.
+
+    Parameters:
+    - events: Unsaved ErrorEvent instances, unique by (log_group, event_id).
+    - aggregator: A BugAggregator counting the inserted events of known dimensions.
+    - batch_size: Rows per INSERT statement.
+
+    Returns:
+    - int: The number of events inserted.
+    """
+
+    if not events:
+        return 0
+    last_pk = ErrorEvent.objects.aggregate(last=Max('pk'))['last'] or 0
+    ErrorEvent.objects.bulk_create(events, batch_size=batch_size, ignore_conflicts=True)
+
+    event_ids = {}
+    for event in events:
+        event_ids.setdefault(event.log_group, []).append(event.event_id)
+    inserted = set()
+    for log_group, ids in event_ids.items():
+        inserted.update((log_group, event_id) for event_id in ErrorEvent.objects.filter(
+            log_group=log_group, event_id__in=ids, pk__gt=last_pk,
+        ).values_list('event_id', flat=True))
+
+    if aggregator is not None:
+        for event in events:
+            if event.dimension_id is not None and (event.log_group, event.event_id) in inserted:
+                aggregator.add(event.dimension_id, event.message, event.timestamp,
+                               event.fingerprint)
+    return len(inserted)
+
+
+def ingest_log_group(log_group, region=None, since=None, chunk_size=CHUNK_SIZE,
+                     filter_pattern=ERROR_FILTER_PATTERN, dimension_id=None, aggregator=None):
+    """
+    Store the new error events of a log group and move its cursor.
+
+    Parameters:
+    - log_group: The log group name.
+    - region: The AWS region of the log group.
+    - since: Epoch milliseconds to start from when the group has no cursor yet.
+      Defaults to the beginning of the log group.
+    - chunk_size: Events inserted per transaction.
+    - filter_pattern: A CloudWatch Logs filter pattern.
+    - dimension_id: The Dimension id stored on the events.
+    - aggregator: A BugAggregator counting the events of the dimension.
+
+    Returns:
+    - int: The number of events stored.
+    """
+
+    cursor, _ = LogCursor.objects.get_or_create(log_group=log_group, region=region or '')
+    start = cursor.last_timestamp if cursor.last_timestamp is not None else (since or 0)
+    seen = set(cursor.event_ids)
+    stored = 0
+    chunk = []
+
+    def flush():
+        cursor.event_ids = sorted(seen)
+        with transaction.atomic():
+            inserted = insert_events(chunk, aggregator)
+            if aggregator is not None:
+                aggregator.flush()
+            cursor.save(update_fields=['last_timestamp', 'event_ids', 'updated_at'])
+        return inserted
+
+    for event in iter_log_events(log_group, start, filter_pattern, region):
+        timestamp = event['timestamp']
+        if timestamp == cursor.last_timestamp and event['eventId'] in seen:
+            continue
+
+        chunk.append(build_event(log_group, event.get('logStreamName', ''), event['eventId'],
+                                 timestamp, event.get('message', ''), dimension_id))
+        if cursor.last_timestamp is None or timestamp > cursor.last_timestamp:
+            cursor.last_timestamp = timestamp
+            seen = set()
+        if timestamp == cursor.last_timestamp:
+            seen.add(event['eventId'])
+
+        if len(chunk) >= chunk_size:
+            stored += flush()
+            chunk = []
+
+    if chunk:
+        stored += flush()
+    return stored
@@ -0,0 +1,79 @@
+"""
+Export error events or bugs as CSV or NDJSON.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from core.export import CHUNK_SIZE, FORMATS, export
+from logcollector.views import EXPORTS
+
+
+class Command(BaseCommand):
+    """
+    Stream error events or bugs to a file or stdout.
+
+    Rows are read and written in chunks, so memory use does not grow with
+    the number of rows.
+
+    Example:
+        python manage.py export_errors events --format ndjson --gzip -o events.ndjson.gz
+    """
+
+    help = 'Export error events or bugs as CSV or NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('-o', '--output', default='-',
+                            help='File to write, or - for stdout.')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Rows read per query.')
+        parser.add_argument('--q', default='', help='Words that must appear in the message.')
+        parser.add_argument('--dimension', action='append', type=int, default=[],
+                            help='Only rows of this Dimension id. Can be repeated.')
+        parser.add_argument('--start', help='Only rows at or after this ISO 8601 time.')
+        parser.add_argument('--end', help='Only rows before this ISO 8601 time.')
+        parser.add_argument('--resolved', choices=['true', 'false'],
+                            help='Only rows of resolved or unresolved bugs.')
+
+    def handle(self, *args, **options):
+        queryset_for, rows_for, fields = EXPORTS[options['kind']]
+        filters = {'text': options['q'], 'dimension_ids': options['dimension']}
+        for name in ('start', 'end'):
+            if options[name]:
+                filters[name] = parse_datetime(options[name])
+                if filters[name] is None:
+                    raise CommandError(f'Invalid --{name}.')
+        if options['resolved']:
+            filters['resolved'] = options['resolved'] == 'true'
+
+        chunks = export(rows_for(queryset_for(**filters), options['chunk_size']),
+                        fields, options['format'], options['gzip'])
+        if options['output'] == '-':
+            self.write_stdout(chunks, options['gzip'])
+        else:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+
+    def write_stdout(self, chunks, compressed):
+        """
+        Write the encoded chunks to `self.stdout`.
+
+        The bytes go to the binary buffer of the stream when it has one, e.g.
+        the console. A text stream, e.g. the StringIO given to call_command,
+        gets the decoded text, so gzipped output needs -o there.
+        """
+
+        stream = getattr(self.stdout, 'buffer', None)
+        if stream is None:
+            if compressed:
+                raise CommandError('Use -o to write gzipped output to a text stream.')
+            for chunk in chunks:
+                self.stdout.write(chunk.decode('utf-8'), ending='')
+            self.stdout.flush()
+            return
+        for chunk in chunks:
+            stream.write(chunk)
+        stream.flush()
@@ -0,0 +1,85 @@
+"""
+Pull error events from CloudWatch Logs into ErrorEvent rows.
+"""
+import time
+
+from botocore.exceptions import ClientError
+from django.core.management.base import BaseCommand
+
+from bugmanager.aggregator import BugAggregator
+from cloudwatch.insights import dimension_log_groups
+from cloudwatch.models import Dimension
+from logcollector.ingest import (CHUNK_SIZE, ERROR_FILTER_PATTERN, dimension_ids_by_log_group,
+                                 ingest_log_group)
+
+
+class Command(BaseCommand):
+    """
+    Worker that ingests new error events of every Lambda log group.
+
+    Each log group resumes from its LogCursor, so restarting the worker
+    neither duplicates nor re-reads events. Log groups default to the
+    `/aws/lambda/<fn>` groups of the Dimension rows with Lambda ARNs. A log
+    group that cannot be read, e.g. of a function that never ran, is
+    reported and skipped until the next pass. Events of known dimensions are
+    counted into Bug rows by fingerprint. Use --once to make a single pass,
+    e.g. from cron.
+
+    Example:
+        python manage.py ingest_errors --since 3600 --once
+    """
+
+    help = 'Store new error events of the Lambda log groups.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log-group', action='append', default=[],
+                            help='Log group to ingest. Can be repeated. Defaults to '
+                                 'the log groups of the Dimension rows.')
+        parser.add_argument('--region', default=None,
+                            help='Region of the --log-group log groups.')
+        parser.add_argument('--since', type=int, default=3600,
+                            help='Seconds of history to ingest for log groups without a cursor.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Events inserted per transaction.')
+        parser.add_argument('--filter-pattern', default=ERROR_FILTER_PATTERN,
+                            help='CloudWatch Logs filter pattern of the events to store.')
+        parser.add_argument('--idle-sleep', type=float, default=30.0,
+                            help='Seconds to wait between passes.')
+        parser.add_argument('--once', action='store_true',
+                            help='Make one pass and exit.')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                self.ingest(options)
+                if options['once']:
+                    return
+                time.sleep(options['idle_sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def ingest(self, options):
+        """
+        Ingest every log group once.
+        """
+
+        if options['log_group']:
+            log_groups = {options['region']: options['log_group']}
+        else:
+            log_groups = dimension_log_groups(Dimension.objects.all())
+        dimension_ids = dimension_ids_by_log_group()
+        aggregator = BugAggregator()
+        since = int((time.time() - options['since']) * 1000)
+
+        for region, groups in log_groups.items():
+            for log_group in groups:
+                try:
+                    stored = ingest_log_group(
+                        log_group, region, since=since, chunk_size=options['chunk_size'],
+                        filter_pattern=options['filter_pattern'],
+                        dimension_id=dimension_ids.get(log_group), aggregator=aggregator)
+                except ClientError as error:
+                    self.stderr.write(f'{log_group}: {error}')
+                    continue
+                if stored:
+                    self.stdout.write(f'{log_group}: {stored} events.')
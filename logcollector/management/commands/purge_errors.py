@@ -0,0 +1,44 @@
+"""
+Delete error events older than the retention period.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from logcollector.models import ErrorEvent
+from logcollector.retention import CHUNK_SIZE, SLEEP, purge_error_events
+
+
+class Command(BaseCommand):
+    """
+    Delete the error events logged more than --days days ago.
+
+    Rows are deleted in chunks with a pause between them, so the purge can
+    run, e.g. from a daily cron, while the ingestion worker is writing.
+
+    Example:
+        python manage.py purge_errors --days 30
+    """
+
+    help = 'Delete error events older than the retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ERROR_EVENT_RETENTION_DAYS,
+                            help='Days of error events to keep.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Events deleted per statement.')
+        parser.add_argument('--sleep', type=float, default=SLEEP,
+                            help='Seconds to wait between chunks.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count the events to delete without deleting them.')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        if options['dry_run']:
+            count = ErrorEvent.objects.filter(timestamp__lt=before).count()
+            self.stdout.write(f'{count} events before {before.isoformat()}.')
+            return
+        deleted = purge_error_events(before, options['chunk_size'], options['sleep'])
+        self.stdout.write(f'Deleted {deleted} events before {before.isoformat()}.')
@@ -0,0 +1,91 @@
+"""
+Replay recorded CloudWatch Logs subscription payloads against the push endpoint.
+"""
+import json
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from logcollector.push import GZIP_MAGIC, get_writer
+from logcollector.views import push_events
+
+
+class Command(BaseCommand):
+    """
+    Post recorded request bodies to the push endpoint and report the rate.
+
+    Each file is one request body: a Firehose request, a forwarding Lambda
+    event, or a base64 or gzip payload, e.g. from the Firehose S3 backup.
+    Without --url the requests go through the view in this process and the
+    command waits until the writer stored every event, so the rate covers
+    the whole pipeline.
+
+    Example:
+        python manage.py replay_payloads recordings/ --repeat 10
+    """
+
+    help = 'Replay recorded subscription payloads against the push endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Files, or directories of files, to post.')
+        parser.add_argument('--url', help='Post to this URL instead of this process.')
+        parser.add_argument('--access-key', default=None,
+                            help="Defaults to the LOG_PUSH['ACCESS_KEY'] setting.")
+        parser.add_argument('--repeat', type=int, default=1,
+                            help='Times each file is posted.')
+
+    def handle(self, *args, **options):
+        files = []
+        for path in map(Path, options['paths']):
+            files.extend(sorted(p for p in path.iterdir() if p.is_file())
+                         if path.is_dir() else [path])
+        if not files:
+            raise CommandError('No payload files.')
+        bodies = [path.read_bytes() for path in files]
+        access_key = options['access_key']
+        if access_key is None:
+            access_key = getattr(settings, 'LOG_PUSH', {}).get('ACCESS_KEY', '')
+
+        started = time.monotonic()
+        events = 0
+        for _ in range(options['repeat']):
+            for path, body in zip(files, bodies):
+                status, data = self.post(body, access_key, options['url'])
+                if status != 200:
+                    raise CommandError(f'{path}: HTTP {status} {data.decode("utf-8", "replace")}')
+                events += json.loads(data).get('events', 0)
+        if not options['url']:
+            get_writer().queue.join()
+        elapsed = time.monotonic() - started
+
+        requests = len(bodies) * options['repeat']
+        self.stdout.write(f'{requests} requests, {events} events in {elapsed:.2f}s '
+                          f'({events / max(elapsed, 1e-9):.0f} events/s).')
+
+    def post(self, body, access_key, url):
+        """
+        Post one body and return the status and content of the response.
+        """
+
+        content_type = ('application/octet-stream' if body[:2] == GZIP_MAGIC
+                        else 'application/json')
+        headers = {'X-Amz-Firehose-Access-Key': access_key}
+        if url is None:
+            request = RequestFactory().post(
+                '/logs/push/', data=body, content_type=content_type,
+                headers=headers)
+            response = push_events(request)
+            return response.status_code, response.content
+
+        request = urllib.request.Request(
+            url, data=body, method='POST', headers={**headers, 'Content-Type': content_type})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("cloudwatch", "0008_alarm_templates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LogCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("log_group", models.CharField(max_length=512)),
+                ("region", models.CharField(blank=True, default="", max_length=32)),
+                ("last_timestamp", models.BigIntegerField(blank=True, null=True)),
+                ("event_ids", models.JSONField(blank=True, default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "logcollector_log_cursor",
+                "unique_together": {("log_group", "region")},
+            },
+        ),
+        migrations.CreateModel(
+            name="ErrorEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("log_group", models.CharField(max_length=512)),
+                (
+                    "log_stream",
+                    models.CharField(blank=True, default="", max_length=512),
+                ),
+                ("event_id", models.CharField(max_length=64)),
+                ("timestamp", models.DateTimeField()),
+                ("message", models.TextField()),
+                ("ingested_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "dimension",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="error_events",
+                        to="cloudwatch.dimension",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "logcollector_error_event",
+                "indexes": [
+                    models.Index(
+                        fields=["timestamp"], name="logcollecto_timesta_9dec12_idx"
+                    ),
+                    models.Index(
+                        fields=["log_group", "timestamp"],
+                        name="logcollecto_log_gro_f40530_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("log_group", "event_id"), name="unique_log_group_event"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logcollector", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="errorevent",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=64
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+"""Import Django models and the Dimension model."""
+from django.db import models
+from cloudwatch.models import Dimension
+
+
+class LogCursor(models.Model):
+    """
+    Model recording how far the error events of a log group were ingested.
+
+    Fields:
+    - log_group: CharField for the CloudWatch Logs group name.
+    - region: CharField for the AWS region of the log group, blank for the default.
+    - last_timestamp: BigIntegerField with the epoch milliseconds of the last
+    ingested event.
+    - event_ids: JSONField with the ids of the ingested events at last_timestamp,
+    which are skipped when ingestion resumes from that timestamp.
+    - updated_at: DateTimeField for when the cursor last moved.
+    """
+
+    class Meta:
+        """
+        Meta:
+        - db_table: Custom name for the database table.
+        - unique_together: One cursor per log group and region.
+        """
+        db_table = 'logcollector_log_cursor'
+        unique_together = [['log_group', 'region']]
+
+    log_group = models.CharField(max_length=512)
+    region = models.CharField(max_length=32, blank=True, default='')
+    last_timestamp = models.BigIntegerField(null=True, blank=True)
+    event_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.log_group}'
+
+
+class ErrorEvent(models.Model):
+    """
+    Model representing an error log event pulled from CloudWatch Logs.
+
+    Fields:
+    - log_group: CharField for the log group the event was read from.
+    - log_stream: CharField for the log stream of the event.
+    - event_id: CharField for the CloudWatch Logs event id.
+    - timestamp: DateTimeField for when the event was logged.
+    - message: TextField with the log message.
+    - dimension: ForeignKey to the Dimension (Lambda function) of the log group, if known.
+    - fingerprint: CharField with the fingerprint of the message, which with
+    the dimension identifies the Bug of the event.
+    - ingested_at: DateTimeField for when the event was stored.
+    """
+
+    class Meta:
+        """
+        Meta:
+        - db_table: Custom name for the database table.
+        - constraints: An event is stored once per log group.
+        - indexes: Time-range reads, overall and per log group.
+        """
+        db_table = 'logcollector_error_event'
+        constraints = [
+            models.UniqueConstraint(fields=['log_group', 'event_id'],
+                                    name='unique_log_group_event'),
+        ]
+        indexes = [
+            models.Index(fields=['timestamp']),
+            models.Index(fields=['log_group', 'timestamp']),
+        ]
+
+    log_group = models.CharField(max_length=512)
+    log_stream = models.CharField(max_length=512, blank=True, default='')
+    event_id = models.CharField(max_length=64)
+    timestamp = models.DateTimeField()
+    message = models.TextField()
+    dimension = models.ForeignKey(
+        Dimension, on_delete=models.SET_NULL, null=True, blank=True, related_name='error_events')
+    fingerprint = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    ingested_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.log_group} {self.timestamp}'
@@ -0,0 +1,400 @@
+"""
+Push ingestion of CloudWatch Logs subscription payloads.
+
+A subscription filter delivers batches of log events as gzipped JSON,
+either through a Kinesis Data Firehose HTTP endpoint (base64 records in a
+JSON envelope) or a forwarding Lambda (the base64 `awslogs.data` string, or
+the raw gzip bytes). The endpoint reads the request body in chunks and
+decompresses it as it reads, with a cap on the decompressed size, then only
+parses and queues the payloads before answering.
+
+An EventWriter thread takes the queued payloads, turns them into ErrorEvent
+rows and writes them with one bulk insert per batch, counting bugs like the
+polling worker, see `logcollector.ingest`. Events already stored, e.g.
+after the sender retried a request, are skipped by the insert and only the
+inserted rows are counted, so they are not counted twice. Payloads queued
+but not yet written are lost if the process stops; keep the sender's retry
+or backup options on.
+"""
+import base64
+import binascii
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from bugmanager.aggregator import BugAggregator
+from .ingest import build_event, dimension_ids_by_log_group, insert_events
+from .models import ErrorEvent
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+MAX_PAYLOAD_BYTES = 64 * 1024 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+BATCH_SIZE = 1000
+FLUSH_INTERVAL = 1.0
+MAX_QUEUE = 1000
+DIMENSION_TTL = 60
+
+
+class PayloadError(ValueError):
+    """
+    Raised when a request body is not a valid subscription payload.
+    """
+
+
+def read_chunks(stream, size=READ_SIZE):
+    """
+    Yield the content of a file-like object in chunks of `size` bytes.
+    """
+
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_all(chunks, max_bytes=MAX_PAYLOAD_BYTES):
+    """
+    Join byte chunks, at most `max_bytes` in total.
+
+    Raises:
+    - PayloadError: If there are more bytes.
+    """
+
+    data = []
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise PayloadError('Payload too large.')
+        data.append(chunk)
+    return b''.join(data)
+
+
+def gunzip(chunks, max_bytes=MAX_PAYLOAD_BYTES):
+    """
+    Decompress gzip data given in chunks.
+
+    No chunk is expanded past the remaining allowance, so a small, highly
+    compressed body cannot use more than `max_bytes` of memory.
+
+    Parameters:
+    - chunks: Iterable of compressed bytes.
+    - max_bytes: Maximum size of the decompressed data.
+
+    Returns:
+    - bytes: The decompressed data.
+
+    Raises:
+    - PayloadError: If the data is not gzip, is truncated or is too large.
+    """
+
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    data = []
+    total = 0
+    try:
+        for chunk in chunks:
+            while chunk and not decompressor.eof:
+                part = decompressor.decompress(chunk, max_bytes - total + 1)
+                total += len(part)
+                if total > max_bytes:
+                    raise PayloadError('Payload too large.')
+                data.append(part)
+                chunk = decompressor.unconsumed_tail
+    except zlib.error as error:
+        raise PayloadError('Invalid gzip data.') from error
+    if not decompressor.eof:
+        raise PayloadError('Truncated gzip data.')
+    return b''.join(data)
+
+
+def parse_messages(data):
+    """
+    Return the DATA_MESSAGE subscription payloads in JSON `data`.
+
+    `data` may hold several JSON objects one after the other, as Firehose
+    writes them when it decompresses records itself. Control messages, sent
+    when a subscription is created, are dropped.
+
+    Raises:
+    - PayloadError: If the data is not JSON subscription payloads.
+    """
+
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError as error:
+        raise PayloadError('Invalid payload encoding.') from error
+
+    decoder = json.JSONDecoder()
+    messages = []
+    index = 0
+    while True:
+        while index < len(text) and text[index].isspace():
+            index += 1
+        if index == len(text):
+            break
+        try:
+            message, index = decoder.raw_decode(text, index)
+        except ValueError as error:
+            raise PayloadError('Invalid JSON payload.') from error
+        if not isinstance(message, dict) or 'messageType' not in message:
+            raise PayloadError('Not a subscription payload.')
+        if message['messageType'] == 'DATA_MESSAGE':
+            if not isinstance(message.get('logGroup'), str) or not isinstance(
+                    message.get('logEvents'), list):
+                raise PayloadError('Not a subscription payload.')
+            for event in message['logEvents']:
+                if not isinstance(event, dict) or not isinstance(event.get('id'), str) \
+                        or not isinstance(event.get('timestamp'), int):
+                    raise PayloadError('Invalid log event.')
+            messages.append(message)
+    return messages
+
+
+def decode_data(data, max_bytes=MAX_PAYLOAD_BYTES):
+    """
+    Return the subscription payloads of a base64 string, gzipped or not.
+
+    Raises:
+    - PayloadError: If the data is not valid.
+    """
+
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as error:
+        raise PayloadError('Invalid base64 data.') from error
+    if raw[:2] == GZIP_MAGIC:
+        raw = gunzip([raw], max_bytes)
+    return parse_messages(raw)
+
+
+def read_payloads(stream, content_encoding='', max_bytes=MAX_PAYLOAD_BYTES):
+    """
+    Read the subscription payloads of a request body.
+
+    Accepted bodies:
+    - A Firehose HTTP endpoint request: {"records": [{"data": <base64>}]}.
+    - A forwarding Lambda event: {"awslogs": {"data": <base64>}}.
+    - The base64 string or the raw gzip bytes of a payload.
+    - A payload as plain JSON.
+
+    The body itself may be gzipped, with a `Content-Encoding: gzip` header.
+
+    Parameters:
+    - stream: File-like object of the body, e.g. the HttpRequest.
+    - content_encoding: The Content-Encoding header of the request.
+    - max_bytes: Maximum size of the body and of each decompressed payload.
+
+    Returns:
+    - list: The DATA_MESSAGE payload dicts.
+
+    Raises:
+    - PayloadError: If the body is not valid.
+    """
+
+    chunks = read_chunks(stream)
+    if 'gzip' in content_encoding.lower():
+        body = gunzip(chunks, max_bytes)
+    else:
+        head = next(chunks, b'')
+        chunks = itertools.chain([head], chunks)
+        if head[:2] == GZIP_MAGIC:
+            return parse_messages(gunzip(chunks, max_bytes))
+        body = read_all(chunks, max_bytes)
+
+    if not body.strip():
+        raise PayloadError('Empty payload.')
+    if body.lstrip()[:1] != b'{':
+        return decode_data(body.strip(), max_bytes)
+    try:
+        document = json.loads(body)
+    except ValueError as error:
+        raise PayloadError('Invalid JSON payload.') from error
+
+    try:
+        if 'records' in document:
+            return [message for record in document['records']
+                    for message in decode_data(record['data'], max_bytes)]
+        if 'awslogs' in document:
+            return decode_data(document['awslogs']['data'], max_bytes)
+    except (KeyError, TypeError) as error:
+        raise PayloadError('Invalid records.') from error
+    return parse_messages(body)
+
+
+class EventWriter:
+    """
+    Queue of subscription payloads written to ErrorEvent rows by a thread.
+
+    Parameters:
+    - batch_size: Events after which the queued payloads are written.
+    - flush_interval: Seconds after which the queued payloads are written.
+    - max_queue: Number of requests that can wait in the queue.
+    - dimension_ttl: Seconds the log group to Dimension map is reused.
+    - clock: Function returning the current time in seconds.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_queue=MAX_QUEUE, dimension_ttl=DIMENSION_TTL, clock=time.monotonic):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dimension_ttl = dimension_ttl
+        self.clock = clock
+        self.queue = queue.Queue(max_queue)
+        self.thread = None
+        self.lock = threading.Lock()
+        self._dimension_ids = None
+        self._dimensions_at = None
+
+    def start(self):
+        """
+        Start the writer thread, once.
+        """
+
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='error-event-writer',
+                                               daemon=True)
+                self.thread.start()
+
+    def submit(self, payloads):
+        """
+        Queue the payloads of one request, without waiting.
+
+        Raises:
+        - queue.Full: If the queue is full.
+        """
+
+        if payloads:
+            self.queue.put_nowait(payloads)
+
+    def take(self, block=True):
+        """
+        Take queued payloads until a batch is full or the interval elapsed.
+
+        Parameters:
+        - block: Wait for the first payloads.
+
+        Returns:
+        - list: The payload lists taken, each to be marked done.
+        """
+
+        try:
+            taken = [self.queue.get(block=block)]
+        except queue.Empty:
+            return []
+        events = sum(len(payload['logEvents']) for payload in taken[0])
+        deadline = self.clock() + self.flush_interval
+        while events < self.batch_size:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                break
+            try:
+                payloads = self.queue.get(block=block, timeout=remaining)
+            except queue.Empty:
+                break
+            taken.append(payloads)
+            events += sum(len(payload['logEvents']) for payload in payloads)
+        return taken
+
+    def dimension_ids(self):
+        """
+        Return the log group to Dimension id map, reloaded every dimension_ttl.
+        """
+
+        now = self.clock()
+        if self._dimension_ids is None or now - self._dimensions_at >= self.dimension_ttl:
+            self._dimension_ids = dimension_ids_by_log_group()
+            self._dimensions_at = now
+        return self._dimension_ids
+
+    def write(self, payloads):
+        """
+        Store the events of `payloads` that are not stored yet.
+
+        Parameters:
+        - payloads: DATA_MESSAGE payload dicts.
+
+        Returns:
+        - int: The number of events stored.
+        """
+
+        pending = {}
+        for payload in payloads:
+            for event in payload['logEvents']:
+                pending.setdefault((payload['logGroup'], event['id']), (payload, event))
+        if not pending:
+            return 0
+
+        dimension_ids = self.dimension_ids()
+        aggregator = BugAggregator()
+        events = [
+            build_event(payload['logGroup'], payload.get('logStream', ''), event['id'],
+                        event['timestamp'], event.get('message', ''),
+                        dimension_ids.get(payload['logGroup']))
+            for payload, event in pending.values()
+        ]
+        with transaction.atomic():
+            inserted = insert_events(events, aggregator, self.batch_size)
+            aggregator.flush()
+        return inserted
+
+    def drain(self, block=False):
+        """
+        Write one batch of queued payloads.
+
+        Returns:
+        - int: The number of events stored.
+        """
+
+        taken = self.take(block)
+        try:
+            return self.write([payload for payloads in taken for payload in payloads])
+        finally:
+            for _ in taken:
+                self.queue.task_done()
+
+    def run(self):
+        """
+        Write queued payloads until the process exits.
+        """
+
+        while True:
+            close_old_connections()
+            try:
+                self.drain(block=True)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Could not store pushed error events.')
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """
+    Return the process-wide, started EventWriter built from the `LOG_PUSH` setting.
+
+    The writer is created under a lock, so concurrent first requests share one.
+    """
+
+    global _writer  # pylint: disable=global-statement
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                config = getattr(settings, 'LOG_PUSH', {})
+                writer = EventWriter(batch_size=config.get('BATCH_SIZE', BATCH_SIZE),
+                                     flush_interval=config.get('FLUSH_INTERVAL', FLUSH_INTERVAL),
+                                     max_queue=config.get('MAX_QUEUE', MAX_QUEUE))
+                writer.start()
+                _writer = writer
+    return _writer
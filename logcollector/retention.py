@@ -0,0 +1,52 @@
+"""
+Retention of ErrorEvent rows.
+
+Old events are deleted in small chunks of primary keys, each in its own
+short transaction, with a pause between chunks. A purge then never holds
+locks on many rows at once nor builds a long undo log, so ingestion keeps
+writing to the table while it runs.
+"""
+import time
+
+from django.db import transaction
+
+from .models import ErrorEvent
+
+CHUNK_SIZE = 1000
+SLEEP = 0.1
+
+
+def purge_error_events(before, chunk_size=CHUNK_SIZE, sleep=SLEEP, sleeper=time.sleep):
+    """
+    Delete the error events logged before `before`.
+
+    Each chunk reads the next `chunk_size` primary keys from the timestamp
+    index, starting at the timestamp where the previous chunk stopped, and
+    deletes them by primary key.
+
+    Parameters:
+    - before: Aware datetime; events with an earlier timestamp are deleted.
+    - chunk_size: Rows deleted per statement.
+    - sleep: Seconds to wait between chunks.
+    - sleeper: Function called with `sleep`, for tests.
+
+    Returns:
+    - int: The number of deleted events.
+    """
+
+    deleted = 0
+    queryset = ErrorEvent.objects.filter(timestamp__lt=before).order_by('timestamp', 'pk')
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(timestamp__gte=last)
+        chunk = list(page.values_list('pk', 'timestamp')[:chunk_size])
+        if not chunk:
+            return deleted
+        with transaction.atomic():
+            count, _ = ErrorEvent.objects.filter(pk__in=[pk for pk, _ in chunk]).delete()
+        deleted += count
+        last = chunk[-1][1]
+        if len(chunk) < chunk_size:
+            return deleted
+        if sleep:
+            sleeper(sleep)
@@ -0,0 +1,100 @@
+"""
+Search over ErrorEvent and Bug rows.
+
+Messages are matched through the full-text index of each table, see
+`core.fulltext`, and results are paginated by keyset, see `core.pagination`,
+so the cost of a search depends on the matching rows and the page size,
+not on the number of stored events.
+"""
+from django.db.models import Exists, OuterRef
+
+from bugmanager.models import Bug
+from core.fulltext import filter_fulltext
+from core.pagination import keyset_page
+from .models import ErrorEvent
+
+MAX_LIMIT = 200
+
+
+def error_events_queryset(text='', dimension_ids=None, start=None, end=None, resolved=None):
+    """
+    Return the ErrorEvent rows matching the search filters.
+
+    Parameters:
+    - text: Words that must all appear in the message.
+    - dimension_ids: Only events of these Dimension ids.
+    - start, end: Only events with start <= timestamp < end.
+    - resolved: Only events whose Bug is resolved (True) or not (False).
+    """
+
+    queryset = filter_fulltext(ErrorEvent.objects.all(), 'message', text)
+    if dimension_ids:
+        queryset = queryset.filter(dimension_id__in=dimension_ids)
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(timestamp__lt=end)
+    if resolved is not None:
+        queryset = queryset.filter(Exists(Bug.objects.filter(
+            dimension_id=OuterRef('dimension_id'), fingerprint=OuterRef('fingerprint'),
+            resolved=resolved)))
+    return queryset
+
+
+def bugs_queryset(text='', dimension_ids=None, start=None, end=None, resolved=None):
+    """
+    Return the Bug rows matching the search filters.
+
+    Parameters:
+    - text: Words that must all appear in the example message.
+    - dimension_ids: Only bugs of these Dimension ids.
+    - start, end: Only bugs seen between start and end.
+    - resolved: Only resolved (True) or unresolved (False) bugs.
+    """
+
+    queryset = filter_fulltext(Bug.objects.all(), 'message', text)
+    if dimension_ids:
+        queryset = queryset.filter(dimension_id__in=dimension_ids)
+    if start is not None:
+        queryset = queryset.filter(last_seen__gte=start)
+    if end is not None:
+        queryset = queryset.filter(first_seen__lt=end)
+    if resolved is not None:
+        queryset = queryset.filter(resolved=resolved)
+    return queryset
+
+
+def search_error_events(text='', cursor=None, limit=50, **filters):
+    """
+    Return a page of error events, newest first.
+
+    Parameters:
+    - text: Words that must all appear in the message.
+    - cursor: The `next_cursor` of the previous page.
+    - limit: Events per page, at most MAX_LIMIT.
+    - filters: See `error_events_queryset`.
+
+    Returns:
+    - Page: ErrorEvent instances and the cursor of the next page.
+    """
+
+    return keyset_page(error_events_queryset(text, **filters).select_related('dimension'),
+                       ['timestamp', 'id'], cursor, min(limit, MAX_LIMIT))
+
+
+def search_bugs(text='', cursor=None, limit=50, **filters):
+    """
+    Return a page of bugs, most recently updated first.
+
+    Parameters:
+    - text: Words that must all appear in the example message.
+    - cursor: The `next_cursor` of the previous page.
+    - limit: Bugs per page, at most MAX_LIMIT.
+    - filters: See `bugs_queryset`.
+
+    Returns:
+    - Page: Bug instances and the cursor of the next page.
+    """
+
+    return keyset_page(bugs_queryset(text, **filters).select_related('dimension'),
+                       ['updated_at', 'bug_id'], cursor, min(limit, MAX_LIMIT))
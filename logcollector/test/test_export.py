@@ -0,0 +1,178 @@
+"""
+Test the streaming export of error events and bugs.
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from model_bakery import baker
+
+from bugmanager.models import Bug, BugOwner, Developer
+from cloudwatch.models import Dimension
+from core.export import accepts_gzip, export, iter_chunks
+from logcollector.export import BUG_FIELDS, EVENT_FIELDS, bug_rows, error_event_rows
+from logcollector.models import ErrorEvent
+
+T0 = datetime(2024, 4, 21, tzinfo=timezone.utc)
+
+
+def make_events(dimension, count):
+    ErrorEvent.objects.bulk_create([
+        ErrorEvent(log_group='/aws/lambda/fn', event_id=str(index),
+                   timestamp=T0 + timedelta(minutes=index), message=f'ERROR boom, "{index}"',
+                   dimension=dimension)
+        for index in range(count)])
+
+
+@pytest.mark.django_db
+class TestExport:
+    """
+    Test cases for core.export and the row generators.
+    """
+
+    def test_chunks_cover_every_row_once(self):
+        """
+        Test that the rows are read in chunks of at most chunk_size.
+        """
+        make_events(baker.make(Dimension), 7)
+
+        chunks = list(iter_chunks(ErrorEvent.objects.all(), chunk_size=3))
+
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        assert len({event.pk for chunk in chunks for event in chunk}) == 7
+
+    def test_csv_of_error_events(self):
+        """
+        Test the CSV header, quoting and joined Dimension name.
+        """
+        make_events(baker.make(Dimension, name='fn'), 3)
+
+        data = b''.join(export(error_event_rows(ErrorEvent.objects.all(), 2), EVENT_FIELDS))
+        rows = list(csv.DictReader(io.StringIO(data.decode('utf-8'))))
+
+        assert len(rows) == 3
+        assert rows[1]['message'] == 'ERROR boom, "1"'
+        assert rows[1]['dimension'] == 'fn'
+
+    def test_ndjson_of_bugs_with_owners(self):
+        """
+        Test that the owners of each bug are joined by username.
+        """
+        bug = baker.make(Bug, bug_id='b1', occurrences=4)
+        for username in ('ann', 'bob'):
+            developer = baker.make(Developer, user=baker.make(get_user_model(), username=username))
+            baker.make(BugOwner, bug=bug, user=developer)
+
+        lines = b''.join(export(bug_rows(Bug.objects.all()), BUG_FIELDS, 'ndjson')).splitlines()
+
+        row = json.loads(lines[0])
+        assert len(lines) == 1
+        assert row['occurrences'] == 4
+        assert sorted(row['owners'].split(';')) == ['ann', 'bob']
+
+    def test_gzip_round_trip(self):
+        """
+        Test that the gzipped stream decompresses to the plain stream.
+        """
+        make_events(baker.make(Dimension), 5)
+
+        def data(compress):
+            rows = error_event_rows(ErrorEvent.objects.all())
+            return b''.join(export(rows, EVENT_FIELDS, 'ndjson', compress))
+
+        assert gzip.decompress(data(True)) == data(False)
+
+    def test_unknown_format(self):
+        """
+        Test that an unknown format raises ValueError.
+        """
+        with pytest.raises(ValueError):
+            export([], EVENT_FIELDS, 'xml')
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate', True),
+    ('deflate, gzip;q=0.5', True),
+    ('gzip;q=0', False),
+    ('gzip; q=0.0, deflate', False),
+    ('*', True),
+    ('*;q=1, gzip;q=0', False),
+    ('identity', False),
+    ('', False),
+])
+def test_accepts_gzip_reads_q_values(header, expected):
+    """
+    Test that gzip is only used when the header accepts it with q above 0.
+    """
+    assert accepts_gzip(header) is expected
+
+
+@pytest.mark.django_db
+class TestExportView:
+    """
+    Test cases for the export endpoint and command.
+    """
+
+    def test_streams_gzipped_csv(self, admin_client):
+        """
+        Test that a client accepting gzip gets a gzipped stream.
+        """
+        make_events(baker.make(Dimension), 3)
+
+        response = admin_client.get('/logs/export/events.csv?q=boom',
+                                    HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        assert response.streaming
+        assert response['Content-Encoding'] == 'gzip'
+        data = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        assert len(data.splitlines()) == 4
+
+    def test_refused_gzip_streams_plain_csv(self, admin_client):
+        """
+        Test that gzip;q=0 gets an uncompressed stream.
+        """
+        make_events(baker.make(Dimension), 3)
+
+        response = admin_client.get('/logs/export/events.csv',
+                                    HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+
+        assert not response.has_header('Content-Encoding')
+        assert 'Accept-Encoding' in response['Vary']
+        assert len(b''.join(response.streaming_content).splitlines()) == 4
+
+    def test_unknown_format_is_not_found(self, admin_client):
+        """
+        Test that an unknown kind or format is a 404.
+        """
+        assert admin_client.get('/logs/export/events.xml').status_code == 404
+
+    def test_command_writes_file(self, tmp_path):
+        """
+        Test that the command writes the filtered rows to a file.
+        """
+        dimension = baker.make(Dimension)
+        make_events(dimension, 3)
+        make_events(baker.make(Dimension), 0)
+        output = tmp_path / 'events.ndjson'
+
+        call_command('export_errors', 'events', '--format', 'ndjson', '-o', str(output),
+                     '--dimension', str(dimension.pk), '--start', (T0 + timedelta(minutes=1)).isoformat())
+
+        assert len(output.read_bytes().splitlines()) == 2
+
+    def test_command_writes_to_the_given_stdout(self):
+        """
+        Test that stdout output goes through the stream given to the command.
+        """
+        make_events(baker.make(Dimension), 2)
+        stdout = io.StringIO()
+
+        call_command('export_errors', 'events', '--format', 'ndjson', stdout=stdout)
+
+        lines = stdout.getvalue().splitlines()
+        assert [json.loads(line)['event_id'] for line in lines] == ['0', '1']
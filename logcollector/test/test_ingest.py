@@ -0,0 +1,155 @@
+"""
+Test the checkpointed error-event ingestion.
+"""
+from io import StringIO
+from unittest import mock
+
+import pytest
+from botocore.exceptions import ClientError
+from django.core.management import call_command
+from model_bakery import baker
+
+from bugmanager.aggregator import BugAggregator
+from bugmanager.models import Bug
+from cloudwatch.models import Dimension
+from logcollector.ingest import ingest_log_group
+from logcollector.models import ErrorEvent, LogCursor
+
+GROUP = '/aws/lambda/AnimalGetById'
+
+
+def event(event_id, timestamp, message=None):
+    return {'eventId': event_id, 'timestamp': timestamp, 'logStreamName': 'stream',
+            'message': message or f'ERROR {event_id}'}
+
+
+def fake_logs(events):
+    """
+    Patch the logs client to page through `events` from startTime on.
+    """
+    client = mock.Mock()
+
+    def paginate(logGroupName, startTime, filterPattern):
+        matched = [item for item in events if item['timestamp'] >= startTime]
+        return [{'events': matched[start:start + 2]} for start in range(0, len(matched), 2)]
+
+    client.get_paginator.return_value.paginate.side_effect = paginate
+    return mock.patch('logcollector.ingest.get_client', return_value=client)
+
+
+@pytest.mark.django_db
+class TestIngestLogGroup:
+    """
+    Test cases for ingest_log_group.
+    """
+
+    def test_stores_events_in_chunks_and_moves_cursor(self):
+        """
+        Test that events are stored and the cursor points at the last one.
+        """
+        events = [event('a', 1000), event('b', 2000), event('c', 3000)]
+
+        with fake_logs(events):
+            stored = ingest_log_group(GROUP, chunk_size=2)
+
+        assert stored == 3
+        assert ErrorEvent.objects.count() == 3
+        cursor = LogCursor.objects.get(log_group=GROUP)
+        assert (cursor.last_timestamp, cursor.event_ids) == (3000, ['c'])
+
+    def test_resume_skips_stored_events_at_the_cursor(self):
+        """
+        Test that a second run only stores events after the cursor.
+        """
+        events = [event('a', 1000), event('b', 2000), event('c', 2000)]
+        with fake_logs(events[:2]):
+            ingest_log_group(GROUP)
+
+        with fake_logs(events + [event('d', 4000)]) as get_client:
+            stored = ingest_log_group(GROUP)
+
+        assert stored == 2
+        assert sorted(ErrorEvent.objects.values_list('event_id', flat=True)) == ['a', 'b', 'c', 'd']
+        paginate = get_client.return_value.get_paginator.return_value.paginate
+        assert paginate.call_args.kwargs['startTime'] == 2000
+
+    def test_interrupted_run_keeps_committed_chunks(self):
+        """
+        Test that a failure keeps the chunks stored so far and their cursor.
+        """
+        def failing_events(*args):
+            yield event('a', 1000)
+            yield event('b', 2000)
+            raise RuntimeError('connection reset')
+
+        with mock.patch('logcollector.ingest.iter_log_events', side_effect=failing_events), \
+                pytest.raises(RuntimeError):
+            ingest_log_group(GROUP, chunk_size=1)
+
+        assert ErrorEvent.objects.count() == 2
+        assert LogCursor.objects.get(log_group=GROUP).last_timestamp == 2000
+
+    def test_events_are_counted_into_bugs(self):
+        """
+        Test that events of a dimension are fingerprinted and counted as bugs.
+        """
+        dimension = baker.make(Dimension)
+        events = [event(event_id, timestamp, f'ERROR request {timestamp} failed')
+                  for event_id, timestamp in [('a', 1000), ('b', 2000), ('c', 3000)]]
+
+        with fake_logs(events):
+            ingest_log_group(GROUP, chunk_size=2, dimension_id=dimension.pk,
+                             aggregator=BugAggregator())
+
+        bug = Bug.objects.get()
+        assert bug.occurrences == 3
+        assert set(ErrorEvent.objects.values_list('fingerprint', flat=True)) == {bug.fingerprint}
+
+    def test_events_stored_by_another_writer_are_not_counted(self):
+        """
+        Test that an event already stored, e.g. pushed, adds no occurrence.
+        """
+        dimension = baker.make(Dimension)
+        events = [event('a', 1000, 'ERROR boom'), event('b', 2000, 'ERROR boom')]
+        baker.make(ErrorEvent, log_group=GROUP, event_id='a')
+
+        with fake_logs(events):
+            stored = ingest_log_group(GROUP, dimension_id=dimension.pk,
+                                      aggregator=BugAggregator())
+
+        assert stored == 1
+        assert Bug.objects.get().occurrences == 1
+
+
+@pytest.mark.django_db
+class TestIngestErrorsCommand:
+    """
+    Test cases for the ingest_errors command.
+    """
+
+    def test_missing_log_group_does_not_stop_the_pass(self):
+        """
+        Test that a log group that cannot be read is reported and skipped,
+        and that Dimensions of other services are not read at all.
+        """
+        baker.make(Dimension, value='arn:aws:lambda:us-east-1:1:function:Absent')
+        healthy = baker.make(Dimension, value='arn:aws:lambda:us-east-1:1:function:Healthy')
+        baker.make(Dimension, value='arn:aws:ec2:us-east-1:1:instance/i-123')
+        read = []
+
+        def log_events(log_group, start, filter_pattern, region):
+            read.append(log_group)
+            if log_group == '/aws/lambda/Absent':
+                raise ClientError({'Error': {'Code': 'ResourceNotFoundException',
+                                             'Message': 'The specified log group does not exist.'}},
+                                  'FilterLogEvents')
+            yield event('a', 1000)
+
+        stderr = StringIO()
+        with mock.patch('logcollector.ingest.iter_log_events', side_effect=log_events):
+            call_command('ingest_errors', once=True, stdout=StringIO(), stderr=stderr)
+
+        assert read == ['/aws/lambda/Absent', '/aws/lambda/Healthy']
+        assert 'ResourceNotFoundException' in stderr.getvalue()
+        assert list(ErrorEvent.objects.values_list('log_group', 'dimension_id')) == [
+            ('/aws/lambda/Healthy', healthy.pk)]
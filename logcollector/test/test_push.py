@@ -0,0 +1,228 @@
+"""
+Test the push ingestion of CloudWatch Logs subscription payloads.
+"""
+import base64
+import gzip
+import io
+import json
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from bugmanager.models import Bug
+from cloudwatch.models import Dimension
+from logcollector import push
+from logcollector.models import ErrorEvent
+from logcollector.push import EventWriter, PayloadError, gunzip, read_payloads
+
+ACCESS_KEY = 'secret'
+
+
+def payload(log_group='/aws/lambda/fn', ids=('1', '2'), message_type='DATA_MESSAGE'):
+    return {
+        'messageType': message_type,
+        'owner': '123456789012',
+        'logGroup': log_group,
+        'logStream': '2024/04/21/[$LATEST]abc',
+        'subscriptionFilters': ['errors'],
+        'logEvents': [{'id': event_id, 'timestamp': 1713657600000 + index,
+                       'message': f'ERROR boom {index}'}
+                      for index, event_id in enumerate(ids)],
+    }
+
+
+def compressed(*payloads):
+    return gzip.compress(''.join(json.dumps(p) for p in payloads).encode('utf-8'))
+
+
+def firehose(*payloads):
+    return json.dumps({
+        'requestId': 'r1', 'timestamp': 1713657600000,
+        'records': [{'data': base64.b64encode(compressed(p)).decode('ascii')} for p in payloads],
+    }).encode('utf-8')
+
+
+@pytest.fixture(name='writer')
+def fixture_writer(monkeypatch, settings):
+    settings.LOG_PUSH = {'ACCESS_KEY': ACCESS_KEY}
+    writer = EventWriter(flush_interval=0, max_queue=2)
+    monkeypatch.setattr(push, '_writer', writer)
+    return writer
+
+
+class TestReadPayloads:
+    """
+    Test cases for read_payloads.
+    """
+
+    @pytest.mark.parametrize('body', [
+        compressed(payload()),
+        base64.b64encode(compressed(payload())),
+        firehose(payload()),
+        json.dumps({'awslogs': {'data': base64.b64encode(compressed(payload())).decode()}}).encode(),
+        json.dumps(payload()).encode(),
+    ])
+    def test_accepted_bodies(self, body):
+        """
+        Test every supported body format.
+        """
+        assert read_payloads(io.BytesIO(body)) == [payload()]
+
+    def test_gzipped_body_and_control_messages(self):
+        """
+        Test a gzip Content-Encoding, and that control messages are dropped.
+        """
+        body = gzip.compress(firehose(payload(message_type='CONTROL_MESSAGE'), payload()))
+
+        assert read_payloads(io.BytesIO(body), 'gzip') == [payload()]
+
+    def test_decompressed_size_is_capped(self):
+        """
+        Test that a payload expanding past max_bytes is refused.
+        """
+        data = gzip.compress(b' ' * 100000)
+
+        with pytest.raises(PayloadError):
+            gunzip([data[:10], data[10:]], max_bytes=50000)
+        assert gunzip([data[:10], data[10:]]) == b' ' * 100000
+
+    @pytest.mark.parametrize('body', [b'', b'not base64!', compressed(payload())[:20],
+                                      b'{"records": [{}]}', b'{"messageType": "DATA_MESSAGE"}',
+                                      b'{"messageType": "DATA_MESSAGE", "logGroup": "g", "logEvents": [{}]}'])
+    def test_invalid_bodies(self, body):
+        """
+        Test that invalid bodies raise PayloadError.
+        """
+        with pytest.raises(PayloadError):
+            read_payloads(io.BytesIO(body))
+
+
+@pytest.mark.django_db
+class TestPushView:
+    """
+    Test cases for the push endpoint and the EventWriter.
+    """
+
+    def post(self, client, body, key=ACCESS_KEY):
+        return client.post('/logs/push/', data=body, content_type='application/json',
+                           headers={'X-Amz-Firehose-Access-Key': key,
+                                    'X-Amz-Firehose-Request-Id': 'r1'})
+
+    def test_requires_access_key(self, client, writer):
+        """
+        Test that a wrong access key is refused.
+        """
+        response = self.post(client, firehose(payload()), 'wrong')
+
+        assert response.status_code == 403
+        assert response.json()['requestId'] == 'r1'
+        assert response.json()['errorMessage'] == 'Invalid access key.'
+        assert writer.queue.empty()
+
+    def test_stores_events_once(self, client, writer):
+        """
+        Test that queued events are stored and counted into bugs once.
+        """
+        dimension = baker.make(Dimension, value='fn')
+
+        response = self.post(client, firehose(payload(), payload(ids=('2', '3'))))
+        assert response.json()['requestId'] == 'r1'
+        assert response.json()['events'] == 4
+        assert writer.drain() == 3
+
+        self.post(client, firehose(payload()))
+        assert writer.drain() == 0
+        assert ErrorEvent.objects.filter(dimension=dimension).count() == 3
+        assert sum(Bug.objects.values_list('occurrences', flat=True)) == 3
+
+    def test_events_stored_elsewhere_are_not_counted(self, writer):
+        """
+        Test that an event stored by another writer adds no occurrence.
+        """
+        baker.make(Dimension, value='fn')
+        baker.make(ErrorEvent, log_group='/aws/lambda/fn', event_id='1')
+
+        assert writer.write([payload(ids=('1', '2'))]) == 1
+        assert Bug.objects.get().occurrences == 1
+
+    def test_full_queue(self, client, writer):
+        """
+        Test that the sender is asked to retry when the queue is full.
+        """
+        for _ in range(2):
+            assert self.post(client, firehose(payload())).status_code == 200
+
+        response = self.post(client, firehose(payload()))
+
+        assert response.status_code == 503
+        assert set(response.json()) == {'requestId', 'timestamp', 'errorMessage'}
+        assert writer.queue.full()
+
+    def test_invalid_body(self, client, writer):
+        """
+        Test that an invalid body is a 400.
+        """
+        response = self.post(client, b'{"records": 1}')
+
+        assert response.status_code == 400
+        assert response.json()['requestId'] == 'r1'
+        assert response.json()['errorMessage'] == 'Invalid records.'
+
+
+def test_take_batches(writer):
+    """
+    Test that take stops at the batch size.
+    """
+    writer.batch_size = 2
+    writer.flush_interval = 60
+    writer.submit([payload()])
+    writer.submit([payload()])
+
+    assert len(writer.take(block=False)) == 1
+    assert len(writer.take(block=False)) == 1
+    assert writer.take(block=False) == []
+    with pytest.raises(queue.Full):
+        for _ in range(3):
+            writer.submit([payload()])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replay_command(tmp_path, writer, capsys):
+    """
+    Test that recorded payloads are replayed through the writer thread.
+    """
+    writer.queue = queue.Queue()
+    writer.start()
+    (tmp_path / 'a.json').write_bytes(firehose(payload()))
+    (tmp_path / 'b.gz').write_bytes(compressed(payload(ids=('3',))))
+
+    call_command('replay_payloads', str(tmp_path), '--repeat', '2')
+
+    assert ErrorEvent.objects.count() == 3
+    assert '4 requests, 6 events' in capsys.readouterr().out
+
+
+def test_get_writer_creates_one_writer(monkeypatch):
+    """
+    Test that concurrent first requests share one writer.
+    """
+    monkeypatch.setattr(push, '_writer', None)
+    created = []
+
+    def make_writer(**kwargs):
+        time.sleep(0.01)
+        created.append(mock.Mock())
+        return created[-1]
+
+    monkeypatch.setattr(push, 'EventWriter', make_writer)
+    with ThreadPoolExecutor(8) as executor:
+        writers = list(executor.map(lambda _: push.get_writer(), range(8)))
+
+    assert len(created) == 1
+    assert all(writer is created[0] for writer in writers)
+    created[0].start.assert_called_once_with()
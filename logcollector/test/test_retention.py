@@ -0,0 +1,62 @@
+"""
+Test the chunked purge of old error events.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.core.management import call_command
+
+from logcollector.models import ErrorEvent
+from logcollector.retention import purge_error_events
+
+T0 = datetime(2024, 4, 21, tzinfo=timezone.utc)
+
+
+def make_events(count):
+    ErrorEvent.objects.bulk_create([
+        ErrorEvent(log_group='/aws/lambda/fn', event_id=str(index),
+                   timestamp=T0 + timedelta(hours=index), message='ERROR boom')
+        for index in range(count)])
+
+
+@pytest.mark.django_db
+class TestPurgeErrorEvents:
+    """
+    Test cases for purge_error_events and the purge_errors command.
+    """
+
+    def test_deletes_old_events_in_chunks(self):
+        """
+        Test that only older events are deleted, pausing between chunks.
+        """
+        make_events(10)
+        sleeps = []
+
+        deleted = purge_error_events(T0 + timedelta(hours=7), chunk_size=3, sleep=0.5,
+                                     sleeper=sleeps.append)
+
+        assert deleted == 7
+        assert sleeps == [0.5, 0.5]
+        assert ErrorEvent.objects.order_by('timestamp').first().timestamp == T0 + timedelta(hours=7)
+
+    def test_nothing_to_delete(self):
+        """
+        Test that a purge without old events deletes nothing.
+        """
+        make_events(2)
+
+        assert purge_error_events(T0, sleeper=pytest.fail) == 0
+        assert ErrorEvent.objects.count() == 2
+
+    def test_command_dry_run(self, capsys):
+        """
+        Test that --dry-run only counts the events.
+        """
+        make_events(3)
+
+        call_command('purge_errors', '--dry-run')
+        assert ErrorEvent.objects.count() == 3
+
+        call_command('purge_errors', '--sleep', '0')
+        assert ErrorEvent.objects.count() == 0
+        assert 'Deleted 3 events' in capsys.readouterr().out
@@ -0,0 +1,127 @@
+"""
+Test the full-text search over error events and bugs.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from model_bakery import baker
+
+from bugmanager.fingerprints import bug_id_for
+from bugmanager.models import Bug
+from cloudwatch.models import Dimension
+from core.pagination import keyset_page
+from logcollector.models import ErrorEvent
+from logcollector.search import search_bugs, search_error_events
+
+T0 = datetime(2024, 4, 21, tzinfo=timezone.utc)
+
+
+def make_events(dimension, messages, fingerprint=''):
+    ErrorEvent.objects.bulk_create([
+        ErrorEvent(log_group='/aws/lambda/fn', event_id=f'{dimension.pk}-{index}',
+                   timestamp=T0 + timedelta(minutes=index), message=message,
+                   dimension=dimension, fingerprint=fingerprint)
+        for index, message in enumerate(messages)])
+
+
+@pytest.mark.django_db
+class TestSearchErrorEvents:
+    """
+    Test cases for search_error_events.
+    """
+
+    def test_every_word_must_match(self):
+        """
+        Test that events inserted at ingest are found by words and prefixes.
+        """
+        dimension = baker.make(Dimension)
+        make_events(dimension, ['ERROR Timeout calling owners service',
+                                'ERROR KeyError animal_id',
+                                'ERROR timeout reading animals table'])
+
+        page = search_error_events('timeout animal')
+
+        assert [event.message for event in page.items] == ['ERROR timeout reading animals table']
+        assert len(search_error_events('time').items) == 2
+
+    def test_filters_by_dimension_time_and_resolved(self):
+        """
+        Test the dimension, time range and resolved filters.
+        """
+        first, second = baker.make(Dimension, _quantity=2)
+        make_events(first, ['ERROR boom'] * 3, fingerprint='f1')
+        make_events(second, ['ERROR boom'], fingerprint='f1')
+        baker.make(Bug, bug_id=bug_id_for('f1', first.pk), dimension=first,
+                   fingerprint='f1', resolved=True)
+
+        assert len(search_error_events('boom', dimension_ids=[second.pk]).items) == 1
+        assert len(search_error_events('boom', start=T0 + timedelta(minutes=1),
+                                       end=T0 + timedelta(minutes=3)).items) == 2
+        assert len(search_error_events('boom', resolved=True).items) == 3
+
+    def test_keyset_pagination_walks_every_row_once(self):
+        """
+        Test that following next_cursor returns every event once, newest first.
+        """
+        dimension = baker.make(Dimension)
+        make_events(dimension, [f'ERROR failure {index}' for index in range(7)])
+
+        seen = []
+        cursor = None
+        while True:
+            page = search_error_events('failure', cursor=cursor, limit=3)
+            seen.extend(event.message for event in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert seen == [f'ERROR failure {index}' for index in reversed(range(7))]
+
+
+@pytest.mark.django_db
+def test_search_bugs_by_message():
+    """
+    Test that bugs are searched through the index of their messages.
+    """
+    dimension = baker.make(Dimension)
+    wanted = baker.make(Bug, bug_id='1', dimension=dimension, message='ERROR owner not found')
+    baker.make(Bug, bug_id='2', dimension=dimension, message='ERROR animal not found')
+
+    assert search_bugs('owner').items == [wanted]
+    assert search_bugs('owner', resolved=True).items == []
+
+
+@pytest.mark.django_db
+def test_search_view(admin_client):
+    """
+    Test the JSON search endpoint and its validation.
+    """
+    make_events(baker.make(Dimension), ['ERROR boom'])
+
+    response = admin_client.get('/logs/search/events/', {'q': 'boom'})
+    assert response.status_code == 200
+    assert response.json()['results'][0]['message'] == 'ERROR boom'
+    assert admin_client.get('/logs/search/events/', {'start': 'yesterday'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_search_view_clamps_limit(admin_client):
+    """
+    Test that a zero, negative or huge limit is clamped to 1..MAX_LIMIT.
+    """
+    make_events(baker.make(Dimension), ['ERROR boom'] * 3)
+
+    for limit, count in [(0, 1), (-5, 1), (10000, 3)]:
+        response = admin_client.get('/logs/search/events/', {'limit': limit})
+        assert response.status_code == 200
+        assert len(response.json()['results']) == count
+
+
+@pytest.mark.django_db
+def test_keyset_page_with_zero_limit():
+    """
+    Test that a zero limit returns an empty last page instead of failing.
+    """
+    make_events(baker.make(Dimension), ['ERROR boom'] * 2)
+
+    assert keyset_page(ErrorEvent.objects.all(), ['timestamp', 'id'], limit=0) == ([], None)
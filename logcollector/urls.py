@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("search/events/", views.error_events, name="search-error-events"),
+    path("search/bugs/", views.bugs, name="search-bugs"),
+    path("export/<str:kind>.<str:fmt>", views.export_view, name="export"),
+    path("push/", views.push_events, name="push-events"),
+]
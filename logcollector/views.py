@@ -0,0 +1,196 @@
+"""
+Search and export endpoints over collected error events and bugs, and the
+push endpoint of CloudWatch Logs subscriptions.
+"""
+import hmac
+import queue
+import time
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from core.export import FORMATS, accepts_gzip, export
+from .export import BUG_FIELDS, EVENT_FIELDS, bug_rows, error_event_rows
+from .push import MAX_PAYLOAD_BYTES, PayloadError, get_writer, read_payloads
+from .search import (MAX_LIMIT, bugs_queryset, error_events_queryset, search_bugs,
+                     search_error_events)
+
+EXPORTS = {
+    'events': (error_events_queryset, error_event_rows, EVENT_FIELDS),
+    'bugs': (bugs_queryset, bug_rows, BUG_FIELDS),
+}
+
+
+def search_filters(request):
+    """
+    Read the search filters from the query string.
+
+    Parameters: q, dimension (repeatable), start and end (ISO 8601),
+    resolved (true/false), cursor and limit (clamped to 1..MAX_LIMIT).
+
+    Raises:
+    - ValueError: If a parameter is not valid.
+    """
+
+    params = request.GET
+    filters = {
+        'text': params.get('q', ''),
+        'dimension_ids': [int(value) for value in params.getlist('dimension')],
+        'cursor': params.get('cursor') or None,
+        'limit': min(max(int(params.get('limit', 50)), 1), MAX_LIMIT),
+    }
+    for name in ('start', 'end'):
+        if params.get(name):
+            filters[name] = parse_datetime(params[name])
+            if filters[name] is None:
+                raise ValueError(f'Invalid {name}.')
+    if params.get('resolved'):
+        filters['resolved'] = params['resolved'].lower() in ('1', 'true', 'yes')
+    return filters
+
+
+@staff_member_required
+def error_events(request):
+    """
+    Search error events, newest first.
+    """
+
+    try:
+        page = search_error_events(**search_filters(request))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    return JsonResponse({
+        'results': [{
+            'id': event.pk,
+            'timestamp': event.timestamp,
+            'log_group': event.log_group,
+            'dimension': event.dimension.name if event.dimension else None,
+            'fingerprint': event.fingerprint,
+            'message': event.message,
+        } for event in page.items],
+        'next_cursor': page.next_cursor,
+    })
+
+
+@staff_member_required
+def bugs(request):
+    """
+    Search bugs, most recently updated first.
+    """
+
+    try:
+        page = search_bugs(**search_filters(request))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    return JsonResponse({
+        'results': [{
+            'bug_id': bug.bug_id,
+            'dimension': bug.dimension.name,
+            'resolved': bug.resolved,
+            'occurrences': bug.occurrences,
+            'first_seen': bug.first_seen,
+            'last_seen': bug.last_seen,
+            'message': bug.message,
+        } for bug in page.items],
+        'next_cursor': page.next_cursor,
+    })
+
+
+@staff_member_required
+def export_view(request, kind, fmt):
+    """
+    Stream every error event or bug matching the search filters.
+
+    The rows are read in chunks and encoded as the response is sent. The
+    response is gzipped on the fly when the Accept-Encoding header accepts
+    gzip with a non-zero q-value.
+
+    Parameters:
+    - request: The request, with the filters of `search_filters`.
+    - kind: 'events' or 'bugs'.
+    - fmt: 'csv' or 'ndjson'.
+    """
+
+    if kind not in EXPORTS or fmt not in FORMATS:
+        raise Http404
+    queryset_for, rows_for, fields = EXPORTS[kind]
+    try:
+        filters = search_filters(request)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    filters.pop('cursor')
+    filters.pop('limit')
+
+    gzip = accepts_gzip(request.headers.get('Accept-Encoding', ''))
+    response = StreamingHttpResponse(
+        export(rows_for(queryset_for(**filters)), fields, fmt, gzip),
+        content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if gzip:
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+
+@csrf_exempt
+@require_POST
+def push_events(request):
+    """
+    Queue the error events pushed by a CloudWatch Logs subscription.
+
+    The sender authenticates with the `LOG_PUSH['ACCESS_KEY']` setting in the
+    X-Amz-Firehose-Access-Key header; the endpoint is disabled without it.
+    Every answer, errors included, has the body a Firehose HTTP endpoint
+    must give, see `firehose_response`. A 503 asks the sender to retry later
+    when the queue is full.
+    """
+
+    config = getattr(settings, 'LOG_PUSH', {})
+    access_key = config.get('ACCESS_KEY', '')
+    if not access_key or not hmac.compare_digest(
+            request.headers.get('X-Amz-Firehose-Access-Key', ''), access_key):
+        return firehose_response(request, status=403, errorMessage='Invalid access key.')
+
+    try:
+        payloads = read_payloads(request, request.headers.get('Content-Encoding', ''),
+                                 config.get('MAX_PAYLOAD_BYTES', MAX_PAYLOAD_BYTES))
+    except PayloadError as error:
+        return firehose_response(request, status=400, errorMessage=str(error))
+    try:
+        get_writer().submit(payloads)
+    except queue.Full:
+        response = firehose_response(request, status=503,
+                                     errorMessage='Too many pending events.')
+        response['Retry-After'] = '1'
+        return response
+
+    return firehose_response(
+        request, events=sum(len(payload['logEvents']) for payload in payloads))
+
+
+def firehose_response(request, status=200, **fields):
+    """
+    Return a JSON response with the body of a Firehose HTTP endpoint.
+
+    The body echoes the X-Amz-Firehose-Request-Id header as `requestId`
+    and has the current epoch milliseconds as `timestamp`, so Firehose can
+    match the answer, or the `errorMessage` of a failure, to its request.
+
+    Parameters:
+    - request: The push request.
+    - status: The HTTP status.
+    - fields: More fields of the body, e.g. `errorMessage`.
+    """
+
+    return JsonResponse({
+        'requestId': request.headers.get('X-Amz-Firehose-Request-Id', ''),
+        'timestamp': int(time.time() * 1000),
+        **fields,
+    }, status=status)
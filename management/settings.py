@@ -40,7 +40,8 @@ INSTALLED_APPS = [
     'debug_toolbar',
     'core',
     'cloudwatch',
-    'bugmanager'
+    'bugmanager',
+    'logcollector',
 ]
 
 MIDDLEWARE = [
@@ -100,6 +101,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/#database-caching
+# Shared by every worker process, so invalidating cached autocomplete results
+# reaches all of them. Create the table with `manage.py createcachetable`.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -143,3 +157,65 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
 AUTH_USER_MODEL = 'core.User'
+
+
+# AWS clients
+# https://botocore.amazonaws.com/v1/documentation/api/latest/reference/config.html
+
+AWS_REGION = None
+
+# Regions listed by `manage.py discover_lambdas` when no --region is given.
+AWS_DISCOVERY_REGIONS = []
+
+# Seconds after which `manage.py discover_lambdas` lists a region again.
+AWS_DISCOVERY_MAX_AGE = 3600
+
+AWS_CLIENT_CONFIG = {
+    'max_pool_connections': 20,
+    'retries': {'mode': 'standard', 'max_attempts': 5},
+    'connect_timeout': 5,
+    'read_timeout': 30,
+}
+
+# Requests per second shared by every process, see cloudwatch/ratelimit.py.
+AWS_RATE_LIMIT = {
+    'BACKEND': 'file',
+    'PATH': BASE_DIR / '.aws-rate-limits',
+    'LIMITS': {
+        'cloudwatch.PutMetricAlarm': 3,
+        'cloudwatch.DescribeAlarms': 9,
+        'cloudwatch.GetMetricData': 10,
+        'logs.StartQuery': 5,
+        'logs.GetQueryResults': 5,
+    },
+}
+
+# Logs Insights queries run at once by one process, see cloudwatch/insights.py.
+# Keep it under the account quota of concurrent queries.
+INSIGHTS_MAX_CONCURRENT_QUERIES = 10
+
+# In-memory cache of Logs Insights results, see QueryCache in cloudwatch/insights.py.
+INSIGHTS_CACHE = {
+    'TTL': 60,
+    'MAX_BYTES': 64 * 1024 * 1024,
+    'BUCKET_SECONDS': 60,
+}
+
+# Seconds admin autocomplete results are cached, see cloudwatch/autocomplete.py.
+AUTOCOMPLETE_CACHE_TIMEOUT = 30
+
+# Directory of the metric time series, see cloudwatch/metricstore.py.
+METRIC_STORE_PATH = BASE_DIR / '.metric-store'
+
+# Days of error events kept by `manage.py purge_errors`.
+ERROR_EVENT_RETENTION_DAYS = 30
+
+# Push endpoint of CloudWatch Logs subscriptions, see logcollector/push.py.
+# The endpoint refuses every request while ACCESS_KEY is empty.
+LOG_PUSH = {
+    'ACCESS_KEY': '',
+    'MAX_PAYLOAD_BYTES': 64 * 1024 * 1024,
+    'BATCH_SIZE': 1000,
+    'FLUSH_INTERVAL': 1.0,
+    'MAX_QUEUE': 1000,
+}
@@ -22,5 +22,6 @@ import debug_toolbar
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("playground/", include('playground.urls')),
+    path("logs/", include('logcollector.urls')),
     path('__debug__/', include(debug_toolbar.urls)),
 ]
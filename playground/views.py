@@ -1,80 +1,49 @@
-import boto3
 from django.shortcuts import render
 import time
 import datetime
-
-# client_resource = boto3.resource('cloudwatch')
-client = boto3.client('cloudwatch')
-client_log = boto3.client('logs')
+from cloudwatch.clients import get_client
+from cloudwatch.insights import (InsightsQueryError, dimension_log_groups, fan_out,
+                                 get_query_cache)
+from cloudwatch.models import Dimension
 
 
 # Create your views here.
 
-def hello(request):
-    # now = datetime.now()
-    # datetime.datetime.strptime(now, '%Y-%m-%dT%H:%M:%S.%fZ')
-    # t = int((datetime.datetime.now() - datetime.timedelta(hours=1)).timestamp())
-    # print(t)
-    # d = datetime.datetime.strptime(t, '%Y-%m-%dT%H:%M:%S.%fZ')
-    # print(d)
-    now = datetime.datetime.now()
-    start_datetime = int(now.timestamp())
-    end_datetime = int((now - datetime.timedelta(minutes=5)).timestamp())
+async def hello(request):
+    """
+    Show the latest errors of every Lambda function with Logs Insights.
 
-    response = client_log.start_query(
-        logGroupName="/aws/lambda/OrivetApi-OrivetNestedSta-AnimalGetByIdFunction045-GQhyRG6XvWeP",
-        queryString=
-        # "\
-        #     fields @timestamp, @message \
-        #     | sort @timestamp desc \
-        #     | limit 10 \
-        #     ",
-        "fields @timestamp \
-            | filter level = 'ERROR' \
-            | sort @timestamp desc \
-            | limit 5  \
-            | display @message",
-        # endTime=1713711470217,
-        # startTime=1713700522091,
-        startTime=end_datetime,
-        endTime=start_datetime
-        # limit=5
-    )
-    query_id = response['queryId']
+    One query runs per 50 log groups of the Dimension rows, concurrently,
+    and rows are collected as each query completes. A query that fails, e.g.
+    for a log group that does not exist yet, is reported on its own and the
+    rows of the other queries are still shown. Results are cached for
+    a minute and shared by concurrent requests. The view is async:
+    while the queries run, the worker serves other requests.
+    """
 
-    results = None
-    while results == None or results['status'] == 'Running':
-        time.sleep(1)
-        results = client_log.get_query_results(
-            queryId=query_id
-        )
-    timestamp_s = 1713700522091 / 1000.0  # Convert milliseconds to seconds
-    datetime_obj = datetime.datetime.fromtimestamp(timestamp_s)
-    print(datetime_obj)
-    now = datetime.datetime.now()
-    five_min_back = now - datetime.timedelta(minutes=5)
-    print(now)
-    print(five_min_back)
+    log_groups = dimension_log_groups([dimension async for dimension in Dimension.objects.all()])
+    now = int(time.time())
+    messages = []
+    errors = []
+    async for _, result in fan_out(
+            log_groups,
+            "fields @timestamp \
+                | filter level = 'ERROR' \
+                | sort @timestamp desc \
+                | limit 5  \
+                | display @message",
+            start=now - 5 * 60,
+            end=now,
+            cache=get_query_cache(),
+            return_exceptions=True,
+            timeout=30):
+        if isinstance(result, InsightsQueryError):
+            errors.append(str(result))
+        else:
+            messages.extend(row.get('@message') for row in result.rows)
 
+    return render(request, 'hello.html', {'resource': messages, 'errors': errors})
 
-    for result in results['results']:
-        print(result[0].get('value'))
-        print('======')
-    # response = client_log.filter_log_events(
-    #     logGroupName='/aws/lambda/OrivetApi-OrivetNestedSta-AnimalGetByIdFunction045-GQhyRG6XvWeP',
-    #     # filterPattern="fields @timestamp \
-    #     #     | filter level = 'ERROR' \
-    #     #     | sort @timestamp desc \
-    #     #     | limit 5 \
-    #     #     | display @message"
-    #     limit= 20,
-    #         startTime=1711365890625,
-    #         endTime=1711365890695
-    #     )
-    # print(response)
-    
-    return render(request, 'hello.html', {'resource': []})
-    
 
 def hello1(request):
     # Define alarm parameters
@@ -118,6 +87,7 @@ def hello1(request):
         },
     ]
 
+    client = get_client('cloudwatch')
     resource = client.put_metric_alarm(
         AlarmName=alarm_name,
         AlarmDescription=alarm_description,